@@ -0,0 +1,97 @@
+import os
+import json
+import mimetypes
+import threading
+from urllib.parse import urlparse, unquote
+from bible_text import clean_verse_text
+
+# Configuration
+LOCAL_ORIGIN = "http://aibible.local"  # 실제 서버 없이 라우팅으로만 응답하는 가상 주소
+SITE_ROOT = "."
+CACHE_EXTERNAL = True  # CDN(tailwind, lucide, 폰트 등) 응답도 프로세스 메모리에 캐시
+
+
+def clean_bible_json(raw_bytes):
+    """버전 JSON 을 한 번만 파싱/정리해서 다시 직렬화합니다 (페이지의 cleanData 는 그대로 통과)."""
+    data = json.loads(raw_bytes.decode('utf-8-sig'))
+    for book in data:
+        book['chapters'] = [[clean_verse_text(v) for v in chapter] for chapter in book.get('chapters', [])]
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class AssetRouter:
+    """
+    렌더러 브라우저 컨텍스트의 요청을 가로채서 index.html, json/*.json, images/** 를
+    프로세스 메모리 캐시에서 바로 응답합니다. server.sh(python -m http.server) 가 필요 없고,
+    정리된 버전 JSON 은 한 번 만들어서 모든 페이지가 같은 바이트를 공유합니다.
+    """
+
+    def __init__(self, root=SITE_ROOT, origin=LOCAL_ORIGIN, cache_external=CACHE_EXTERNAL):
+        self.root = os.path.abspath(root)
+        self.origin = origin.rstrip('/')
+        self.cache_external = cache_external
+        self._cache = {}  # key -> (status, headers, body)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self, context):
+        context.route("**/*", self._handle)
+
+    def _load_local(self, path):
+        rel = unquote(path).lstrip('/') or "index.html"
+        full = os.path.abspath(os.path.join(self.root, rel))
+        # 사이트 루트 밖으로 나가는 경로 차단
+        if not full.startswith(self.root + os.sep) or not os.path.isfile(full):
+            return 404, {"content-type": "text/plain"}, b"Not Found"
+
+        with open(full, 'rb') as f:
+            body = f.read()
+        # json/<버전>.json 만 정리 (json/<버전>/ 의 샤드는 corpus_build.py 에서 이미 정리됨)
+        if rel.startswith("json/") and rel.count("/") == 1 and rel.endswith(".json") and rel != "json/index.json":
+            body = clean_bible_json(body)
+        content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/json":
+            content_type += "; charset=utf-8"
+        return 200, {"content-type": content_type}, body
+
+    def _get(self, key, loader):
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        entry = loader()
+        # 실패 응답은 캐시하지 않음
+        if entry[0] == 200:
+            with self._lock:
+                self._cache[key] = entry
+        return entry
+
+    def _handle(self, route):
+        request = route.request
+        url = request.url
+        if url.startswith(self.origin + "/") or url == self.origin:
+            path = urlparse(url).path
+            status, headers, body = self._get(("local", path), lambda: self._load_local(path))
+            route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        if self.cache_external and request.method == "GET":
+            def fetch_external():
+                response = route.fetch()
+                headers = {k: v for k, v in response.headers.items() if k.lower() == "content-type"}
+                return response.status, headers, response.body()
+            try:
+                status, headers, body = self._get(("external", url), fetch_external)
+            except Exception:
+                route.continue_()
+                return
+            route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        route.continue_()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
@@ -0,0 +1,55 @@
+import wave
+import subprocess
+import numpy as np
+from ffmpeg_encoder import FFMPEG
+
+# Configuration
+SAMPLE_RATE = 24000       # edge-tts 출력과 같은 샘플레이트 (리샘플링 없이 디코딩)
+CHANNELS = 1
+VERSE_GAP_SECONDS = 0.0   # 절 사이에 넣는 무음 길이(초)
+
+
+def decode_pcm(path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """ffmpeg 로 오디오 파일 하나를 16bit PCM numpy 배열(샘플 수 x 채널)로 디코딩합니다."""
+    result = subprocess.run(
+        [FFMPEG, "-v", "error", "-i", path, "-f", "s16le", "-ac", str(channels), "-ar", str(sample_rate), "-"],
+        capture_output=True, check=True
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, channels)
+
+
+def assemble_chapter_audio(audio_paths, out_path, gap_seconds=VERSE_GAP_SECONDS,
+                           sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """
+    절 오디오들을 한 번씩만 디코딩해서 하나의 챕터 트랙(WAV, PCM)으로 이어 씁니다.
+
+    절을 하나 디코딩할 때마다 바로 파일에 쓰고 버리므로 메모리에는 절 하나 분량만 올라갑니다
+    (시편 119편처럼 긴 챕터도 동일). 길이는 샘플 수로 세기 때문에 자막 시간이 샘플 단위로 정확합니다.
+    AAC 인코딩은 영상 mux 단계에서 한 번만 일어납니다.
+
+    반환값: (절별 (시작 초, 끝 초) 목록, 영상에서 절마다 보여줄 길이(뒤쪽 무음 포함) 목록)
+    """
+    gap_samples = int(round(gap_seconds * sample_rate))
+    silence = np.zeros((gap_samples, channels), dtype=np.int16)
+    timestamps = []
+    durations = []
+    position = 0  # 지금까지 쓴 샘플 수
+
+    with wave.open(out_path, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for i, path in enumerate(audio_paths):
+            samples = decode_pcm(path, sample_rate, channels)
+            start = position
+            out.writeframes(samples.tobytes())
+            position += len(samples)
+            timestamps.append((start / sample_rate, position / sample_rate))
+
+            # 마지막 절 뒤에는 무음을 넣지 않음
+            if gap_samples and i < len(audio_paths) - 1:
+                out.writeframes(silence.tobytes())
+                position += gap_samples
+            durations.append((position - start) / sample_rate)
+
+    return timestamps, durations
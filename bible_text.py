@@ -0,0 +1,68 @@
+import os
+import re
+import json
+from corpus_pack import load_corpus
+
+VERSIONS_DIR = "json"
+VERSION_INDEX = os.path.join(VERSIONS_DIR, "index.json")
+
+# Bible Names Mapping
+BIBLE_NAMES = {
+    "gn": "Genesis", "ex": "Exodus", "lv": "Leviticus", "nm": "Numbers", "dt": "Deuteronomy",
+    "js": "Joshua", "jud": "Judges", "rt": "Ruth", "1sm": "1 Samuel", "2sm": "2 Samuel",
+    "1kgs": "1 Kings", "2kgs": "2 Kings", "1ch": "1 Chronicles", "2ch": "2 Chronicles",
+    "ezr": "Ezra", "ne": "Nehemiah", "et": "Esther", "job": "Job", "ps": "Psalms",
+    "prv": "Proverbs", "ec": "Ecclesiastes", "so": "Song of Solomon", "is": "Isaiah", "jr": "Jeremiah",
+    "lm": "Lamentations", "ez": "Ezekiel", "dn": "Daniel", "ho": "Hosea", "jl": "Joel",
+    "am": "Amos", "ob": "Obadiah", "jn": "Jonah", "mi": "Micah", "na": "Nahum",
+    "hk": "Habakkuk", "zp": "Zephaniah", "hg": "Haggai", "zc": "Zechariah", "ml": "Malachi",
+    "mt": "Matthew", "mk": "Mark", "lk": "Luke", "jo": "John",
+    "act": "Acts", "rm": "Romans", "1co": "1 Corinthians", "2co": "2 Corinthians",
+    "gl": "Galatians", "eph": "Ephesians", "ph": "Philippians", "cl": "Colossians",
+    "1ts": "1 Thessalonians", "2ts": "2 Thessalonians", "1tm": "1 Timothy",
+    "2tm": "2 Timothy", "tt": "Titus", "phm": "Philemon", "hb": "Hebrews",
+    "jm": "James", "1pe": "1 Peter", "2pe": "2 Peter", "1jo": "1 John",
+    "2jo": "2 John", "3jo": "3 John", "jd": "Jude", "re": "Revelation"
+}
+
+
+def clean_verse_text(text):
+    # index.html 의 cleanData() 와 같은 규칙: HTML 엔티티 복원, { ... Heb. ... } 주석 제거, 남은 중괄호 제거
+    if isinstance(text, str):
+        text = text.replace("&#x27;", "'").replace("&quot;", '"')
+        text = re.sub(r'\{[^}]*Heb\.[^}]*\}', '', text)
+        text = re.sub(r'\{|\}', '', text)
+        text = text.strip()
+    return text
+
+
+# 정경 순서 (버전마다 약어가 다를 수 있으므로 - 예: pt_* 의 시편은 'sl' - 파일 이름/이미지는 순서 기준으로 통일)
+CANONICAL_ABBREVS = list(BIBLE_NAMES.keys())
+
+
+def canonical_book(book_idx):
+    """책 순서(0=창세기)로 (정경 약어, 영어 이름) 을 돌려줍니다."""
+    abbrev = CANONICAL_ABBREVS[book_idx]
+    return abbrev, BIBLE_NAMES[abbrev]
+
+
+def list_versions(versions_dir=VERSIONS_DIR):
+    """json/ 에 실제로 파일이 있는 버전 약어 목록 (index.json 제외)."""
+    return sorted(
+        name[:-len(".json")] for name in os.listdir(versions_dir)
+        if name.endswith(".json") and name != "index.json"
+    )
+
+
+def version_languages(index_path=VERSION_INDEX):
+    """index.json 기준 {버전 약어: 언어 이름}."""
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r', encoding='utf-8-sig') as f:
+        groups = json.load(f)
+    return {v['abbreviation']: group['language'] for group in groups for v in group['versions']}
+
+
+def load_version(version, versions_dir=VERSIONS_DIR):
+    # corpus_pack.py 로 만든 최신 팩이 있으면 mmap 뷰 (JSON 파싱 없음), 없으면 JSON
+    return load_corpus(os.path.join(versions_dir, f"{version}.json"))
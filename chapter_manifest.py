@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = "manifest.json"
+JOURNAL_NAME = "manifest.jsonl"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text):
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+class ChapterManifest:
+    """
+    챕터 작업 폴더의 manifest.json 에 절마다 완료된 자산(이미지/오디오)의 경로, 체크섬, 길이를 기록합니다.
+    실패 후 재시도하면 체크섬이 맞는 절은 건너뛰고, 처음으로 빠진 절부터 다시 만듭니다.
+
+    절마다 manifest.json 전체를 다시 쓰면 챕터 하나가 절 수의 제곱에 비례하므로 (시편 119편은 176번),
+    기록은 manifest.jsonl 에 한 줄씩 추가하고 close()/with 블록 종료 때 manifest.json 으로 합칩니다.
+    중간에 죽어도 저널이 남아 있으므로 다음 실행의 load() 가 그대로 이어서 읽습니다.
+    """
+
+    def __init__(self, chapter_dir, book, chapter):
+        self.chapter_dir = chapter_dir
+        self.path = os.path.join(chapter_dir, MANIFEST_NAME)
+        self.journal_path = os.path.join(chapter_dir, JOURNAL_NAME)
+        self.book = book
+        self.chapter = chapter
+        self.verses = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"Manifest unreadable, starting fresh: {self.path}")
+                data = {}
+            # 다른 챕터의 매니페스트면 무시
+            if data.get('book') == self.book and data.get('chapter') == self.chapter:
+                self.verses = data.get('verses', {})
+        self._replay_journal()
+
+    def _replay_journal(self):
+        # 마지막 합치기 이후에 추가된 절 기록 (잘린 마지막 줄은 무시)
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('book') == self.book and record.get('chapter') == self.chapter:
+                    self.verses[str(record['idx'])] = record['entry']
+
+    def _append(self, idx, entry):
+        os.makedirs(self.chapter_dir, exist_ok=True)
+        record = {"book": self.book, "chapter": self.chapter, "idx": idx, "entry": entry}
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        """저널을 manifest.json 으로 합치고 지웁니다."""
+        if os.path.exists(self.journal_path):
+            self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self):
+        os.makedirs(self.chapter_dir, exist_ok=True)
+        data = {
+            "book": self.book,
+            "chapter": self.chapter,
+            "updated_at": datetime.now().isoformat(),
+            "verses": self.verses
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _entry(self, idx, text):
+        entry = self.verses.get(str(idx))
+        text_hash = text_sha256(text)
+        # 절 텍스트가 바뀌었으면 기존 기록은 버림
+        if entry is None or entry.get('text_sha256') != text_hash:
+            entry = {"text_sha256": text_hash}
+            self.verses[str(idx)] = entry
+        return entry
+
+    def _valid_file(self, entry, kind):
+        path = entry.get(kind)
+        if not path or not os.path.exists(path):
+            return None
+        if file_sha256(path) != entry.get(f"{kind}_sha256"):
+            return None
+        return path
+
+    def completed_image(self, idx, text):
+        entry = self.verses.get(str(idx))
+        if entry is None or entry.get('text_sha256') != text_sha256(text):
+            return None
+        return self._valid_file(entry, 'image')
+
+    def completed_audio(self, idx, text):
+        """(오디오 경로, 길이) 또는 None."""
+        entry = self.verses.get(str(idx))
+        if entry is None or entry.get('text_sha256') != text_sha256(text):
+            return None
+        path = self._valid_file(entry, 'audio')
+        if path is None:
+            return None
+        return path, entry.get('duration')
+
+    def record_image(self, idx, text, path):
+        entry = self._entry(idx, text)
+        entry['image'] = path
+        entry['image_sha256'] = file_sha256(path)
+        self._append(idx, entry)
+
+    def record_audio(self, idx, text, path, duration=None):
+        entry = self._entry(idx, text)
+        entry['audio'] = path
+        entry['audio_sha256'] = file_sha256(path)
+        entry['duration'] = duration
+        self._append(idx, entry)
+
+    def first_missing(self, texts, need_image=True, need_audio=True):
+        for idx, text in enumerate(texts):
+            if need_audio and self.completed_audio(idx, text) is None:
+                return idx
+            if need_image and self.completed_image(idx, text) is None:
+                return idx
+        return None
@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+from bible_text import VERSIONS_DIR, clean_verse_text, list_versions
+from corpus_pack import build_pack
+from search_index import build_index
+from parallel_corpus import build_parallel
+
+# Configuration
+MANIFEST_NAME = "manifest.json"
+SHARD_FORMAT = 1  # 샤드/매니페스트 구조를 바꾸면 올림 (index.html 이 확인)
+
+
+def shard_dir_for(version, versions_dir=VERSIONS_DIR):
+    """json/<버전>/ — index.html 은 json/<버전>/manifest.json 이 있으면 샤드로 읽습니다."""
+    return os.path.join(versions_dir, version)
+
+
+def shard_name(book_idx, abbrev):
+    return f"{book_idx:02d}_{abbrev}.json"
+
+
+def write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def build_shards(version, versions_dir=VERSIONS_DIR):
+    """
+    json/<버전>.json 을 한 번만 정리(clean_verse_text = index.html 의 cleanData 규칙)해서
+    책별 샤드 json/<버전>/NN_<약어>.json 과 매니페스트를 만듭니다.
+    매니페스트에는 책마다 장별 절 수가 들어 있어서, 앱은 본문 없이도 책/장 목록을 바로 그릴 수 있습니다.
+    """
+    json_path = os.path.join(versions_dir, f"{version}.json")
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    books = json.loads(raw.decode('utf-8-sig'))
+
+    out_dir = shard_dir_for(version, versions_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_books = []
+    for book_idx, book in enumerate(books):
+        chapters = [[clean_verse_text(v) for v in chapter] for chapter in book['chapters']]
+        name = shard_name(book_idx, book.get('abbrev'))
+        size = write_json(os.path.join(out_dir, name),
+                          {"abbrev": book.get('abbrev'), "name": book.get('name'), "chapters": chapters})
+        manifest_books.append({
+            "abbrev": book.get('abbrev'),
+            "name": book.get('name'),
+            "file": name,
+            "bytes": size,
+            "verses": [len(chapter) for chapter in chapters],
+        })
+
+    # 이전 빌드에서 남은 (책 구성이 바뀐) 샤드 정리
+    keep = {b["file"] for b in manifest_books} | {MANIFEST_NAME}
+    for stale in set(os.listdir(out_dir)) - keep:
+        if stale.endswith(".json"):
+            os.remove(os.path.join(out_dir, stale))
+
+    manifest = {
+        "format": SHARD_FORMAT,
+        "version": version,
+        "cleaned": True,
+        "source_sha256": hashlib.sha256(raw).hexdigest(),
+        "books": manifest_books,
+    }
+    write_json(os.path.join(out_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def build_corpus(versions=None, versions_dir=VERSIONS_DIR):
+    """
+    버전마다 샤드 + 매니페스트, corpus_pack 의 mmap 팩, search_index 의 검색 색인을 만들고,
+    마지막으로 (모든 버전을 함께 보는) parallel_corpus 의 병렬 말뭉치를 다시 만듭니다.
+    """
+    for version in versions or list_versions(versions_dir):
+        manifest = build_shards(version, versions_dir)
+        build_pack(os.path.join(versions_dir, f"{version}.json"))
+        index_info = build_index(version, versions_dir)
+        total = sum(b["bytes"] for b in manifest["books"])
+        largest = max(manifest["books"], key=lambda b: b["bytes"])
+        print(f"{version}: {len(manifest['books'])} shards, {total / 1e6:.1f} MB total, "
+              f"largest {largest['file']} {largest['bytes'] / 1e3:.0f} KB; "
+              f"search index {index_info['terms']} terms, {index_info['bytes'] / 1e6:.1f} MB")
+    parallel = build_parallel(versions_dir=versions_dir, out_dir=os.path.join(versions_dir, "parallel"))
+    print(f"parallel: {len(parallel['versions'])} versions, {len(parallel['alignments'])} alignment records")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean each version once and emit per-book shards + manifest for index.html.")
+    parser.add_argument("versions", nargs="*", help="Version abbreviations (default: every json/<version>.json)")
+    args = parser.parse_args()
+
+    build_corpus(args.versions or None)
@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+
+# Configuration
+PACK_EXT = ".pack"
+MAGIC = b"BIBPACK1"
+# magic, 메타 JSON 길이, 책 수, 장 수, 절 수 (모두 little-endian)
+HEADER = struct.Struct("<8sIIII")
+
+# json/<버전>.json 을 한 번 컴파일해 두는 바이너리 팩 형식:
+#
+#     [헤더] [메타 JSON (책 약어/이름, 원본 크기/수정 시각), 4바이트 정렬]
+#     [책 -> 첫 장 번호   u32 x (책 수 + 1)]
+#     [장 -> 첫 절 번호   u32 x (장 수 + 1)]
+#     [절 -> 본문 시작 바이트 u32 x (절 수 + 1)]
+#     [UTF-8 본문 blob]
+#
+# 파일은 mmap 으로 열기 때문에 JSON 전체를 파싱하지 않고, 필요한 절의 바이트만 읽어서 디코딩합니다.
+# (책, 장, 절) -> 본문은 표 두 번 + slice 한 번인 O(1) 조회입니다.
+
+
+def pack_path_for(json_path):
+    return os.path.splitext(json_path)[0] + PACK_EXT
+
+
+def build_pack(json_path, pack_path=None):
+    """JSON 버전 파일을 팩으로 컴파일합니다. 원본 크기/수정 시각을 메타에 적어 두고 열 때 최신인지 확인합니다."""
+    with open(json_path, 'r', encoding='utf-8-sig') as f:
+        books = json.load(f)
+    stat = os.stat(json_path)
+    return write_pack(books, pack_path or pack_path_for(json_path),
+                      source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+
+
+def write_pack(books, pack_path, **meta_extra):
+    """json.load 모양의 책 목록 [{abbrev, name, chapters: [[절...]...]}] 을 팩 파일로 씁니다."""
+    book_index, chapter_index, verse_offsets = array('I', [0]), array('I', [0]), array('I', [0])
+    blob = bytearray()
+    for book in books:
+        for chapter in book['chapters']:
+            for verse in chapter:
+                blob += str(verse).encode('utf-8')
+                verse_offsets.append(len(blob))
+            chapter_index.append(len(verse_offsets) - 1)
+        book_index.append(len(chapter_index) - 1)
+
+    meta = json.dumps({
+        "books": [{"abbrev": book.get('abbrev'), "name": book.get('name')} for book in books],
+        **meta_extra,
+    }, ensure_ascii=False).encode('utf-8')
+    meta += b" " * (-(HEADER.size + len(meta)) % 4)  # 오프셋 표를 4바이트 경계에 맞춤
+
+    if sys.byteorder != "little":
+        for table in (book_index, chapter_index, verse_offsets):
+            table.byteswap()
+
+    tmp_path = f"{pack_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(meta), len(books), len(chapter_index) - 1, len(verse_offsets) - 1))
+        f.write(meta)
+        for table in (book_index, chapter_index, verse_offsets):
+            table.tofile(f)
+        f.write(blob)
+    os.replace(tmp_path, pack_path)
+    return pack_path
+
+
+class CorpusPack(Sequence):
+    """
+    mmap 으로 연 팩 파일. json.load 결과와 같은 모양으로 쓸 수 있습니다:
+    pack[book_idx]['chapters'][chapter_idx][verse_idx], book['abbrev'], book.get('name'), len(...), for ... in ...
+    본문은 접근할 때만 디코딩하므로 여러 버전을 동시에 열어도 상주 메모리는 오프셋 표 크기 정도입니다.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("CorpusPack supports little-endian hosts only")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_len, n_books, n_chapters, n_verses = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a corpus pack")
+
+        start = HEADER.size
+        self.meta = json.loads(self._map[start:start + meta_len])
+        self._books = self.meta["books"]
+        self._abbrev_index = {book["abbrev"]: i for i, book in enumerate(self._books)}
+
+        view = memoryview(self._map)
+        start += meta_len
+        self._book_index = view[start:start + 4 * (n_books + 1)].cast('I')
+        start += 4 * (n_books + 1)
+        self._chapter_index = view[start:start + 4 * (n_chapters + 1)].cast('I')
+        start += 4 * (n_chapters + 1)
+        self._verse_offsets = view[start:start + 4 * (n_verses + 1)].cast('I')
+        self._blob_start = start + 4 * (n_verses + 1)
+
+    # --- 조회 API ---
+
+    def book_index(self, abbrev):
+        """약어 -> 책 순서 (없으면 None). 책 목록을 훑지 않는 O(1) 조회."""
+        return self._abbrev_index.get(abbrev)
+
+    def chapter_count(self, book_idx):
+        return self._book_index[book_idx + 1] - self._book_index[book_idx]
+
+    def verse_count(self, book_idx, chapter_idx):
+        c = self._chapter_id(book_idx, chapter_idx)
+        return self._chapter_index[c + 1] - self._chapter_index[c]
+
+    def verse(self, book_idx, chapter_idx, verse_idx):
+        """절 하나 (모두 0부터 시작하는 인덱스)."""
+        c = self._chapter_id(book_idx, chapter_idx)
+        v = self._chapter_index[c] + verse_idx
+        if not 0 <= verse_idx < self._chapter_index[c + 1] - self._chapter_index[c]:
+            raise IndexError(f"verse {verse_idx} out of range")
+        return self._text(v, v + 1)[0]
+
+    def verse_range(self, book_idx, chapter_idx, start=0, stop=None):
+        """한 장 안의 절 목록 [start, stop) — 해당 바이트 구간만 한 번에 디코딩합니다."""
+        c = self._chapter_id(book_idx, chapter_idx)
+        first, end = self._chapter_index[c], self._chapter_index[c + 1]
+        start, stop, _ = slice(start, stop).indices(end - first)
+        return self._text(first + start, first + max(start, stop))
+
+    def chapter(self, book_idx, chapter_idx):
+        return self.verse_range(book_idx, chapter_idx)
+
+    def close(self):
+        for table in (self._book_index, self._chapter_index, self._verse_offsets):
+            table.release()
+        self._map.close()
+
+    # --- 내부 ---
+
+    def _chapter_id(self, book_idx, chapter_idx):
+        if not 0 <= chapter_idx < self.chapter_count(book_idx):
+            raise IndexError(f"chapter {chapter_idx} out of range")
+        return self._book_index[book_idx] + chapter_idx
+
+    def _text(self, first, stop):
+        offsets = self._verse_offsets
+        base = self._blob_start + offsets[first]
+        data = self._map[base:self._blob_start + offsets[stop]]
+        return [data[offsets[v] - offsets[first]:offsets[v + 1] - offsets[first]].decode('utf-8')
+                for v in range(first, stop)]
+
+    # --- json.load 호환 (책 목록) ---
+
+    def __len__(self):
+        return len(self._books)
+
+    def __getitem__(self, book_idx):
+        if isinstance(book_idx, slice):
+            return [self[i] for i in range(*book_idx.indices(len(self)))]
+        if book_idx < 0:
+            book_idx += len(self)
+        if not 0 <= book_idx < len(self):
+            raise IndexError("book index out of range")
+        return PackBook(self, book_idx)
+
+
+class PackBook(Mapping):
+    """책 하나의 dict 호환 뷰: 'abbrev', 'name', 'chapters' 키 (keys/items/in/dict(...) 모두 dict 처럼 동작)."""
+
+    KEYS = ('abbrev', 'name', 'chapters')
+
+    def __init__(self, pack, book_idx):
+        self.pack = pack
+        self.book_idx = book_idx
+
+    def __getitem__(self, key):
+        if key == 'chapters':
+            return PackChapters(self.pack, self.book_idx)
+        return self.pack._books[self.book_idx][key]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def get(self, key, default=None):
+        # 원본 JSON 에 없던 키는 팩에 None 으로 저장되므로 json.load 결과처럼 default 를 돌려줌
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+
+class PackChapters(Sequence):
+    def __init__(self, pack, book_idx):
+        self.pack = pack
+        self.book_idx = book_idx
+
+    def __len__(self):
+        return self.pack.chapter_count(self.book_idx)
+
+    def __getitem__(self, chapter_idx):
+        if isinstance(chapter_idx, slice):
+            return [self[i] for i in range(*chapter_idx.indices(len(self)))]
+        if chapter_idx < 0:
+            chapter_idx += len(self)
+        return self.pack.chapter(self.book_idx, chapter_idx)
+
+
+def open_pack(json_path):
+    """최신 팩이 있으면 CorpusPack, 없거나 원본 JSON 이 더 새로우면 None."""
+    pack_path = pack_path_for(json_path)
+    if not os.path.exists(pack_path):
+        return None
+    try:
+        pack = CorpusPack(pack_path)
+    except (ValueError, OSError):
+        return None
+    stat = os.stat(json_path) if os.path.exists(json_path) else None
+    if stat and (stat.st_size, stat.st_mtime_ns) != (pack.meta.get("source_size"), pack.meta.get("source_mtime_ns")):
+        pack.close()
+        return None
+    return pack
+
+
+def load_corpus(json_path):
+    """json.load 대체: 최신 팩이 있으면 mmap 뷰를, 없으면 기존처럼 JSON 을 파싱해서 돌려줍니다."""
+    pack = open_pack(json_path)
+    if pack is not None:
+        return pack
+    with open(json_path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+
+def find_book(corpus, abbrev):
+    """약어로 책 찾기: 팩이면 O(1) 색인, JSON 목록이면 기존처럼 순회."""
+    if isinstance(corpus, CorpusPack):
+        book_idx = corpus.book_index(abbrev)
+        return None if book_idx is None else corpus[book_idx]
+    return next((book for book in corpus if book.get('abbrev') == abbrev), None)
+
+
+if __name__ == "__main__":
+    import glob
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile json/<version>.json files into memory-mapped verse packs.")
+    parser.add_argument("paths", nargs="*", help="Version JSON files (default: every json/*.json except index.json)")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(p for p in glob.glob(os.path.join("json", "*.json"))
+                                 if os.path.basename(p) != "index.json")
+    for json_path in paths:
+        started = time.perf_counter()
+        pack_path = build_pack(json_path)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        pack = CorpusPack(pack_path)
+        opened = (time.perf_counter() - started) * 1000
+        print(f"{json_path} -> {pack_path}: {len(pack)} books, {os.path.getsize(pack_path) / 1e6:.1f} MB "
+              f"(built {built:.2f}s, opens in {opened:.1f} ms)")
+        pack.close()
@@ -0,0 +1,196 @@
+import io
+import json
+import time
+import wave
+import random
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8765
+SAMPLE_RATE = 24000
+SECONDS_PER_CHAR = 0.06    # 만들어 줄 무음 오디오 길이 (대략 실제 낭독 속도)
+BASE_LATENCY = 0.3         # 요청당 기본 지연(초)
+LATENCY_PER_CHAR = 0.002   # 글자 수에 비례하는 추가 지연
+LATENCY_JITTER = 0.1       # 0 ~ 이 값 사이의 무작위 지연
+MAX_CONCURRENT = 8         # 동시에 처리 중인 요청이 이보다 많으면 503
+RATE_LIMIT = 5.0           # 초당 허용 요청 수 (토큰 버킷), 넘으면 429
+BURST = 10
+
+
+class FakeTTSState:
+    """지연/요청 제한 설정과 통계. 모든 요청 스레드가 공유합니다."""
+
+    def __init__(self, base_latency=BASE_LATENCY, latency_per_char=LATENCY_PER_CHAR, jitter=LATENCY_JITTER,
+                 max_concurrent=MAX_CONCURRENT, rate_limit=RATE_LIMIT, burst=BURST):
+        self.base_latency = base_latency
+        self.latency_per_char = latency_per_char
+        self.jitter = jitter
+        self.max_concurrent = max_concurrent
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self.active = 0
+        self.peak_active = 0
+        self.served = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def admit(self):
+        """요청을 받을 수 있으면 None, 아니면 (상태 코드, Retry-After 초)."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate_limit:
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_limit)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.rate_limited += 1
+                    return 429, (1 - self._tokens) / self.rate_limit
+                self._tokens -= 1
+            if self.max_concurrent and self.active >= self.max_concurrent:
+                self.overloaded += 1
+                return 503, 1.0
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            return None
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+
+    def latency(self, text):
+        return self.base_latency + self.latency_per_char * len(text) + random.random() * self.jitter
+
+    def stats(self):
+        return {"served": self.served, "rate_limited": self.rate_limited, "overloaded": self.overloaded,
+                "peak_active": self.peak_active}
+
+
+def silent_wav(seconds, sample_rate=SAMPLE_RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    state = None  # make_server 에서 설정
+
+    def do_POST(self):
+        if self.path != "/synthesize":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            text = str(payload["text"])
+        except (ValueError, KeyError):
+            self.send_error(400, "expected JSON {text, voice, rate}")
+            return
+
+        rejected = self.state.admit()
+        if rejected:
+            status, retry_after = rejected
+            self.send_response(status)
+            self.send_header("Retry-After", f"{retry_after:.2f}")
+            self.end_headers()
+            return
+
+        try:
+            time.sleep(self.state.latency(text))
+            body = silent_wav(max(0.2, len(text) * SECONDS_PER_CHAR))
+        finally:
+            self.state.release()
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 로그를 찍지 않음
+
+
+def make_server(host=HOST, port=PORT, state=None):
+    handler = type("BoundFakeTTSHandler", (FakeTTSHandler,), {"state": state or FakeTTSState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_benchmark(server, count, in_flight_levels, requests_per_second):
+    """
+    같은 가짜 서버에 대해 동시 요청 수(max_in_flight)를 바꿔가며 TTSPipeline 처리량을 잽니다.
+    캐시를 끄고 매번 새 문장을 보내므로 순수 파이프라인 + 서버 제한만 측정됩니다.
+    """
+    from tts_backends import HttpBackend
+    from tts_pipeline import TTSPipeline
+
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}/synthesize"
+    texts = [f"Benchmark verse {i}: " + "In the beginning God created the heaven and the earth. " * (1 + i % 3)
+             for i in range(count)]
+
+    print(f"{'in-flight':>9} {'seconds':>8} {'req/s':>7} {'sent':>6} {'429':>5} {'503':>5} {'peak':>5}")
+    for level in in_flight_levels:
+        state = server.RequestHandlerClass.state
+        before = state.stats()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_paths = [f"{tmp_dir}/{i}.wav" for i in range(count)]
+            started = time.monotonic()
+            with TTSPipeline(engine=HttpBackend(url), max_in_flight=level,
+                             requests_per_second=requests_per_second) as tts:
+                tts.submit_many(texts, voice="en", out_paths=out_paths).result()
+                sent = tts.requests_sent
+            elapsed = time.monotonic() - started
+        after = state.stats()
+        print(f"{level:>9} {elapsed:>8.2f} {count / elapsed:>7.2f} {sent:>6} "
+              f"{after['rate_limited'] - before['rate_limited']:>5} {after['overloaded'] - before['overloaded']:>5} "
+              f"{after['peak_active']:>5}")
+        state.peak_active = 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in TTS server with configurable latency and throttling.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=BASE_LATENCY, help="Base latency per request (s)")
+    parser.add_argument("--latency-per-char", type=float, default=LATENCY_PER_CHAR)
+    parser.add_argument("--jitter", type=float, default=LATENCY_JITTER)
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT, help="503 above this (0 = unlimited)")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT, help="Requests/s before 429 (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=BURST)
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="Instead of serving forever, benchmark TTSPipeline with N requests and exit")
+    parser.add_argument("--in-flight", default="1,2,4,8,16", help="Comma-separated max_in_flight levels for --bench")
+    parser.add_argument("--client-rps", type=float, default=0, help="Client-side rate limit for --bench (0 = none)")
+    args = parser.parse_args()
+
+    state = FakeTTSState(args.latency, args.latency_per_char, args.jitter,
+                         args.max_concurrent, args.rate_limit, args.burst)
+    server = make_server(args.host, 0 if args.bench else args.port, state)
+
+    if args.bench:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            run_benchmark(server, args.bench, [int(v) for v in args.in_flight.split(",")], args.client_rps)
+        finally:
+            server.shutdown()
+    else:
+        print(f"Fake TTS server on http://{args.host}:{args.port}/synthesize "
+              f"(latency {args.latency}s, {args.rate_limit} req/s, max {args.max_concurrent} concurrent)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,217 @@
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+
+# Configuration
+FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
+VIDEO_CRF = 23
+VIDEO_PRESET = "medium"
+AUDIO_BITRATE = "128k"
+SEGMENT_FPS = 25  # 절 세그먼트 고정 프레임레이트 (모든 세그먼트가 같아야 -c copy 로 이어 붙일 수 있음)
+SEGMENT_AUDIO_RATE = 48000
+STREAM_FPS = 4  # 스트리밍 모드의 고정 프레임레이트 (절 전환 시점 오차 최대 1/STREAM_FPS 초)
+
+
+def probe_duration(path):
+    """ffprobe 로 미디어 길이(초)를 읽습니다."""
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+        capture_output=True, text=True, check=True
+    )
+    return float(json.loads(result.stdout)["format"]["duration"])
+
+
+def _concat_line(path):
+    # concat demuxer 용 경로 이스케이프 (작은따옴표)
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+
+def write_concat_list(list_path, paths, durations=None):
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.write("ffconcat version 1.0\n")
+        for i, path in enumerate(paths):
+            f.write(_concat_line(path))
+            if durations is not None:
+                f.write(f"duration {durations[i]:.6f}\n")
+        # concat demuxer 는 마지막 항목의 duration 을 무시하므로 마지막 이미지를 한 번 더 넣어줌
+        if durations is not None and paths:
+            f.write(_concat_line(paths[-1]))
+
+
+def keyframe_args(keyframe_times):
+    """절 시작 시각마다 키프레임을 강제하는 ffmpeg 인자 (스트림 복사로 절 단위 추출이 가능하도록)."""
+    if not keyframe_times:
+        return []
+    return ["-force_key_frames", ",".join(f"{t:.3f}" for t in keyframe_times)]
+
+
+def encode_still_video(images, audios, durations, out_path, fps=None, crf=VIDEO_CRF, preset=VIDEO_PRESET,
+                       keyframe_times=None):
+    """
+    절마다 정지 이미지 1장 + 오디오 1개를 ffmpeg 한 번으로 인코딩합니다.
+
+    MoviePy 처럼 초당 24장씩 같은 프레임을 Python 에서 만들지 않고, 이미지와 길이를 concat demuxer 로
+    바로 넘깁니다. fps 가 None 이면 가변 프레임레이트(이미지가 바뀔 때만 프레임)로 인코딩합니다.
+    오디오 트랙도 같은 패스에서 합쳐서 mux 합니다. keyframe_times 를 주면 그 시각마다 키프레임을 넣습니다.
+    """
+    work_dir = tempfile.mkdtemp(prefix="ffenc_", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        image_list = os.path.join(work_dir, "images.txt")
+        audio_list = os.path.join(work_dir, "audio.txt")
+        write_concat_list(image_list, images, durations)
+        write_concat_list(audio_list, audios)
+
+        cmd = [
+            FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", image_list,
+            "-f", "concat", "-safe", "0", "-i", audio_list,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "libx264", "-tune", "stillimage", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p",
+        ] + keyframe_args(keyframe_times)
+        if fps:
+            cmd += ["-r", str(fps)]
+        else:
+            cmd += ["-vsync", "vfr"]
+        cmd += [
+            "-c:a", "aac", "-b:a", AUDIO_BITRATE,
+            "-movflags", "+faststart",
+            "-shortest",
+            out_path
+        ]
+        subprocess.run(cmd, check=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return out_path
+
+
+def encode_frame_stream(frames, durations, audios, out_path, fps=STREAM_FPS, crf=VIDEO_CRF, preset=VIDEO_PRESET,
+                        keyframe_times=None):
+    """
+    메모리에 있는 프레임(PNG/JPEG 바이트)을 ffmpeg stdin 으로 바로 흘려 넣어 인코딩합니다.
+    중간 PNG 파일을 디스크에 쓰지 않습니다.
+
+    image2pipe 는 프레임별 길이를 받을 수 없으므로 낮은 고정 fps 로 같은 프레임을 반복해서 넣습니다
+    (x264 는 반복 프레임을 거의 비용 없이 처리). 반복 횟수는 누적 시간 기준으로 반올림해 오차가 쌓이지 않게 합니다.
+    오디오는 concat 프로토콜로 같은 패스에서 합칩니다(임시 목록 파일도 만들지 않음).
+    """
+    cmd = [
+        FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "image2pipe", "-framerate", str(fps), "-i", "-",
+        "-i", "concat:" + "|".join(os.path.abspath(a) for a in audios),
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "libx264", "-tune", "stillimage", "-preset", preset, "-crf", str(crf),
+        "-pix_fmt", "yuv420p", "-r", str(fps),
+    ] + keyframe_args(keyframe_times) + [
+        "-c:a", "aac", "-b:a", AUDIO_BITRATE,
+        "-movflags", "+faststart",
+        "-shortest",
+        out_path
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    written = 0
+    elapsed = 0.0
+    try:
+        for frame, duration in zip(frames, durations):
+            elapsed += duration
+            target = max(written + 1, int(round(elapsed * fps)))
+            for _ in range(target - written):
+                proc.stdin.write(frame)
+            written = target
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    finally:
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd[0])
+    return out_path
+
+
+def segment_settings(fps=SEGMENT_FPS, crf=VIDEO_CRF, preset=VIDEO_PRESET):
+    """세그먼트 캐시 키에 들어가는 인코더 설정 (하나라도 바뀌면 모든 세그먼트를 다시 인코딩)."""
+    return {
+        "vcodec": "libx264", "tune": "stillimage", "fps": fps, "crf": crf, "preset": preset,
+        "pix_fmt": "yuv420p", "acodec": "aac", "audio_bitrate": AUDIO_BITRATE, "audio_rate": SEGMENT_AUDIO_RATE
+    }
+
+
+def encode_segment(image, audio, out_path, fps=SEGMENT_FPS, crf=VIDEO_CRF, preset=VIDEO_PRESET):
+    """
+    절 하나(정지 이미지 + 오디오)를 독립된 mp4 세그먼트로 인코딩합니다.
+    image 는 파일 경로 또는 PNG/JPEG 바이트(스트리밍 모드)입니다.
+    모든 세그먼트가 같은 코덱 파라미터를 쓰므로 concat_segments 로 재인코딩 없이 이어 붙일 수 있습니다.
+    """
+    frame_path = None
+    if isinstance(image, (bytes, bytearray)):
+        # 메모리 프레임은 세그먼트 옆에 잠깐 써두고 인코딩 후 바로 지움 (새로 인코딩하는 절만 해당)
+        frame_path = out_path + ".frame.png"
+        with open(frame_path, 'wb') as f:
+            f.write(image)
+        image = frame_path
+    try:
+        subprocess.run([
+            FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+            "-loop", "1", "-framerate", str(fps), "-i", image,
+            "-i", audio,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "libx264", "-tune", "stillimage", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-r", str(fps),
+            "-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ar", str(SEGMENT_AUDIO_RATE),
+            "-shortest",
+            "-f", "mp4",
+            out_path
+        ], check=True)
+    finally:
+        if frame_path and os.path.exists(frame_path):
+            os.remove(frame_path)
+    return out_path
+
+
+def concat_segments(segments, out_path):
+    """같은 설정으로 인코딩된 세그먼트들을 스트림 복사(-c copy)로 한 파일로 합칩니다 (무손실, 재인코딩 없음)."""
+    work_dir = tempfile.mkdtemp(prefix="ffcat_", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        list_path = os.path.join(work_dir, "segments.txt")
+        write_concat_list(list_path, segments)
+        subprocess.run([
+            FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-movflags", "+faststart",
+            out_path
+        ], check=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return out_path
+
+
+def probe_streams(path):
+    """
+    첫 번째 비디오/오디오 스트림의 주요 파라미터. 스트림 복사 concat 이 가능한지 비교할 때 사용합니다.
+    반환값: {'video': {...} 또는 None, 'audio': {...} 또는 None, 'duration': 초 또는 None}
+    """
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_data_hash", "sha256",
+         "-show_entries", "stream=codec_type,codec_name,profile,level,extradata_hash,width,height,pix_fmt,"
+                          "time_base,r_frame_rate,sample_rate,channels:format=duration",
+         "-of", "json", path],
+        capture_output=True, text=True, check=True
+    )
+    data = json.loads(result.stdout)
+    info = {"video": None, "audio": None, "duration": None}
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind == "video" and info["video"] is None:
+            info["video"] = {k: stream.get(k) for k in ("codec_name", "width", "height", "pix_fmt",
+                                                       "time_base", "r_frame_rate",
+                                                       "profile", "level", "extradata_hash")}
+        elif kind == "audio" and info["audio"] is None:
+            info["audio"] = {k: stream.get(k) for k in ("codec_name", "sample_rate", "channels")}
+    duration = data.get("format", {}).get("duration")
+    if duration not in (None, "N/A"):
+        info["duration"] = float(duration)
+    return info
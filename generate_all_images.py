@@ -1,16 +1,15 @@
 from nanobanana_gen import generate_image_rest
 import os
 import time
-import json
 import re
+from corpus_pack import load_corpus, find_book
 
 # Load Bible Data
 JSON_PATH = "json/en_kjv.json"
-with open(JSON_PATH, 'r', encoding='utf-8-sig') as f:
-    bible_data = json.load(f)
+bible_data = load_corpus(JSON_PATH)
 
 # Find Genesis
-genesis = next((b for b in bible_data if b['abbrev'] == 'gn'), None)
+genesis = find_book(bible_data, 'gn')
 if not genesis:
     print("Genesis data not found.")
     exit(1)
@@ -1,11 +1,13 @@
 import os
-import json
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from gtts import gTTS
 from moviepy import *
+from tts_cache import TTSCache
+from tts_pipeline import TTSPipeline
+from audio_assembler import assemble_chapter_audio
+from corpus_pack import load_corpus, find_book
 
 # Configuration
 BASE_URL = "http://localhost:8080"
@@ -14,8 +16,20 @@ FINAL_VIDEO = "genesis_chapter_1.mp4"
 JSON_PATH = "json/en_kjv.json"
 
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+TTS_ENGINE = "gtts"  # tts_backends 에 등록된 엔진 (gtts, edge, offline, http)
+TTS_VOICE = "en"     # gTTS 는 언어 코드
+TTS_RATE = "normal"  # 기존 gTTS 캐시 키와 동일하게 유지
+READY_TIMEOUT = 15  # index.html 준비 신호(data-*) 대기 한도(초)
+
+def wait_for_ready(driver, condition_js, timeout=READY_TIMEOUT):
+    # 고정 sleep 대신 index.html 이 body data-* 속성으로 알려주는 준비 신호를 기다림
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+        lambda d: d.execute_script(f"return {condition_js};")
+    )
+
 def setup_driver():
     options = Options()
     options.add_argument("--headless")
@@ -29,19 +43,14 @@ def setup_driver():
     return driver
 
 def load_verses():
-    with open(JSON_PATH, 'r', encoding='utf-8-sig') as f:
-        data = json.load(f)
+    data = load_corpus(JSON_PATH)
     
     # Simple search for Genesis (gn)
     # The cleanData function in app might handle entities, we should too if needed
     # But usually json load handles standard escapes. 
     # The app does: verse.replace(/&#x27;/g, "'").replace(/&quot;/g, '"')
     
-    genesis = None
-    for book in data:
-        if book.get('abbrev') == 'gn':
-            genesis = book
-            break
+    genesis = find_book(data, 'gn')
             
     if not genesis:
         raise Exception("Genesis not found in JSON")
@@ -56,6 +65,40 @@ def load_verses():
         
     return cleaned_verses
 
+def synthesize_verse_audio(tts, verse_text):
+    # 캐시(텍스트 해시)에 있으면 즉시 완료되는 Future. 캡처와 병행해서 합성됨
+    return tts.submit(verse_text, voice=TTS_VOICE, rate=TTS_RATE)
+
+def collect_verse_audio(generated_assets):
+    for i, item in enumerate(generated_assets):
+        try:
+            item['audio'] = item.pop('audio_future').result()
+        except Exception as e:
+            print(f"TTS Error on verse {i}: {e}")
+            item['audio'] = None
+
+def generate_assets_native(verses):
+    # 브라우저 없이 Pillow 로 리더 화면을 그려서 프레임 생성
+    from native_renderer import NativeFrameRenderer, chapter_image_path
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    native = NativeFrameRenderer()
+    native.begin_chapter(chapter_image_path('gn', 'Genesis', 1), 'Genesis', 1, verses)
+
+    generated_assets = []
+    with TTSPipeline(engine=TTS_ENGINE, cache=TTSCache()) as tts:
+        for i, verse_text in enumerate(verses):
+            print(f"Processing Verse {i+1}/{len(verses)} (native)...")
+            img_path = os.path.join(OUTPUT_DIR, f"verse_{i}.png")
+            native.save_frame(i, img_path)
+            generated_assets.append({'image': img_path, 'audio_future': synthesize_verse_audio(tts, verse_text)})
+
+        collect_verse_audio(generated_assets)
+        print(f"TTS cache: {tts.cache.stats()}")
+    return generated_assets
+
 def generate_assets(verses, driver):
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
@@ -84,7 +127,7 @@ def generate_assets(verses, driver):
     
     # Let's reload to be clean
     driver.get(BASE_URL)
-    time.sleep(1)
+    wait_for_ready(driver, "document.body.dataset.appReady === '1'")
     
     # Click 'Open Bible'
     try:
@@ -98,7 +141,7 @@ def generate_assets(verses, driver):
         time.sleep(1)
         # Click '1' (Chapter 1)
         driver.find_elements(By.XPATH, "//div[contains(@class,'grid')]//button")[0].click()
-        time.sleep(2) # Wait for image and text to render
+        wait_for_ready(driver, "document.body.dataset.imageReady === '1' && document.body.dataset.textReady === '1'") # Wait for image and text to render
     except Exception as e:
         print(f"Navigation failed: {e}")
         # Fallback to JS injection if UI changed, but UI looks stable.
@@ -107,6 +150,7 @@ def generate_assets(verses, driver):
     # User said "Show the app running", so keeping UI is good.
     
     generated_assets = []
+    tts = TTSPipeline(engine=TTS_ENGINE, cache=TTSCache())
 
     for i, verse_text in enumerate(verses):
         print(f"Processing Verse {i+1}/{len(verses)}...")
@@ -114,63 +158,55 @@ def generate_assets(verses, driver):
         # Highlight Verse using App's logic
         # state.speakingVerseIndex = i; updateHighlight();
         # scrollIntoView
-        driver.execute_script(f"""
-            window.state.speakingVerseIndex = {i};
-            window.updateHighlight();
-            const el = document.getElementById('verse-{i}');
-            if(el) {{
-                el.scrollIntoView({{behavior: 'instant', block: 'center'}});
-            }}
-        """)
-        time.sleep(0.5) # Allow render update
+        # highlightVerse 는 하이라이트/스크롤이 자리잡으면 resolve 되는 Promise 를 돌려줌
+        driver.execute_async_script(
+            "const done = arguments[arguments.length - 1];"
+            "window.highlightVerse(arguments[0]).then(done);", i
+        )
         
         # Take Screenshot
         img_path = os.path.join(OUTPUT_DIR, f"verse_{i}.png")
         driver.save_screenshot(img_path)
         
-        # Generate Audio
-        audio_path = os.path.join(OUTPUT_DIR, f"verse_{i}.mp3")
-        if not os.path.exists(audio_path): # Cache check
-            try:
-                tts = gTTS(text=verse_text, lang='en', slow=False)
-                tts.save(audio_path)
-            except Exception as e:
-                print(f"TTS Error on verse {i}: {e}")
-                # Create silent or empty audio fallback?
-                # For now let's hope it passes.
-        
-        generated_assets.append({'image': img_path, 'audio': audio_path})
+        # Generate Audio (백그라운드 파이프라인)
+        generated_assets.append({'image': img_path, 'audio_future': synthesize_verse_audio(tts, verse_text)})
         
+    collect_verse_audio(generated_assets)
+    tts.close()
+    print(f"TTS cache: {tts.cache.stats()}")
     return generated_assets
 
 def create_video(assets):
     print("Combining video...")
-    clips = []
-    
-    for item in assets:
-        # Load Audio
-        audio_clip = AudioFileClip(item['audio'])
-        
-        # Load Image, set duration to audio duration
-        img_clip = ImageClip(item['image']).with_duration(audio_clip.duration)
-        img_clip = img_clip.with_audio(audio_clip)
-        
-        clips.append(img_clip)
-        
-    final_clip = concatenate_videoclips(clips)
+    # 절 오디오를 한 번씩만 디코딩해 챕터 트랙 하나로 합친 뒤, 이미지 길이는 샘플 기준 길이를 사용
+    chapter_audio = os.path.join(OUTPUT_DIR, "chapter_audio.wav")
+    _, durations = assemble_chapter_audio([item['audio'] for item in assets], chapter_audio)
+
+    clips = [ImageClip(item['image']).with_duration(d) for item, d in zip(assets, durations)]
+    final_clip = concatenate_videoclips(clips).with_audio(AudioFileClip(chapter_audio))
     final_clip.write_videofile(FINAL_VIDEO, fps=24, codec='libx264', audio_codec='aac')
     print(f"Video saved to {os.path.abspath(FINAL_VIDEO)}")
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render Genesis 1 video with Selenium.")
+    parser.add_argument("--renderer", choices=["browser", "native"], default="browser",
+                        help="Frame renderer: Selenium screenshots or native Pillow compositor")
+    args = parser.parse_args()
+
     try:
-        driver = setup_driver()
         verses = load_verses()
         
         # Limit for testing? User asked for "1 to end".
         # verses = verses[:3] # Debug
         
-        assets = generate_assets(verses, driver)
-        driver.quit()
+        if args.renderer == 'native':
+            assets = generate_assets_native(verses)
+        else:
+            driver = setup_driver()
+            assets = generate_assets(verses, driver)
+            driver.quit()
         
         create_video(assets)
         
@@ -1,41 +1,41 @@
 import os
 import json
 import time
-import re
-from playwright.sync_api import sync_playwright
-# from gtts import gTTS # Removed for Edge TTS
-import subprocess # Added for Edge TTS
+import shutil
+from renderer_service import RendererService, BASE_URL
+from bible_text import BIBLE_NAMES, clean_verse_text, canonical_book, list_versions, load_version
+from tts_pipeline import TTSPipeline, DEFAULT_VOICE, DEFAULT_ENGINE, split_batches, voice_for_version, engine_for_version
+from tts_backends import BACKENDS, get_backend
+from tts_cache import TTSCache
+from ffmpeg_encoder import encode_still_video, encode_frame_stream, concat_segments, probe_duration, keyframe_args
+from segment_cache import SegmentCache
+from audio_assembler import assemble_chapter_audio, VERSE_GAP_SECONDS
+from verse_clips import write_verse_index, verse_index_path
+from native_renderer import NativeFrameRenderer, chapter_image_path
+from chapter_manifest import ChapterManifest
+from corpus_pack import load_corpus
+from media_verifier import MediaVerifier
 from moviepy import *
 from datetime import datetime
+from contextlib import contextmanager
 
 # Configuration
-BASE_URL = "http://localhost:8080"
 OUTPUT_DIR = "video_assets"
 MOVIES_DIR = "movies"
 JSON_PATH = "json/en_kjv.json"
+MAX_JOB_ATTEMPTS = 3        # 병렬 모드에서 챕터 하나당 최대 시도 횟수
+FAILED_JOB_COOLDOWN = 30    # 병렬 모드 워커가 실패 후 쉬는 시간(초)
+CHAPTER_RETRY_BASE_DELAY = 5    # 챕터 재시도 대기(초), 실패할 때마다 2배
+CHAPTER_RETRY_MAX_DELAY = 300
+RENDER_READY_TIMEOUT_MS = 15000  # index.html 준비 신호 대기 한도
+VIDEO_ENCODER = "ffmpeg"    # 'ffmpeg' (정지 이미지용 직접 인코딩), 'segments' (절 세그먼트 캐시 + 무손실 concat) 또는 'moviepy'
+FRAME_RENDERER = "browser"  # 'browser' (Playwright 스크린샷) 또는 'native' (Pillow 합성)
+TTS_MODE = "verse"          # 'verse' (절마다 TTS 요청) 또는 'chapter' (챕터 일괄 합성 후 단어 경계로 분할)
+CHAPTER_LOCK_NAME = ".lock"  # 병렬 모드에서 챕터 작업 폴더를 쓰는 워커 표시
 
 if not os.path.exists(MOVIES_DIR):
     os.makedirs(MOVIES_DIR)
 
-# Bible Names Mapping
-BIBLE_NAMES = {
-    "gn": "Genesis", "ex": "Exodus", "lv": "Leviticus", "nm": "Numbers", "dt": "Deuteronomy",
-    "js": "Joshua", "jud": "Judges", "rt": "Ruth", "1sm": "1 Samuel", "2sm": "2 Samuel",
-    "1kgs": "1 Kings", "2kgs": "2 Kings", "1ch": "1 Chronicles", "2ch": "2 Chronicles",
-    "ezr": "Ezra", "ne": "Nehemiah", "et": "Esther", "job": "Job", "ps": "Psalms",
-    "prv": "Proverbs", "ec": "Ecclesiastes", "so": "Song of Solomon", "is": "Isaiah", "jr": "Jeremiah",
-    "lm": "Lamentations", "ez": "Ezekiel", "dn": "Daniel", "ho": "Hosea", "jl": "Joel",
-    "am": "Amos", "ob": "Obadiah", "jn": "Jonah", "mi": "Micah", "na": "Nahum",
-    "hk": "Habakkuk", "zp": "Zephaniah", "hg": "Haggai", "zc": "Zechariah", "ml": "Malachi",
-    "mt": "Matthew", "mk": "Mark", "lk": "Luke", "jo": "John",
-    "act": "Acts", "rm": "Romans", "1co": "1 Corinthians", "2co": "2 Corinthians",
-    "gl": "Galatians", "eph": "Ephesians", "ph": "Philippians", "cl": "Colossians",
-    "1ts": "1 Thessalonians", "2ts": "2 Thessalonians", "1tm": "1 Timothy",
-    "2tm": "2 Timothy", "tt": "Titus", "phm": "Philemon", "hb": "Hebrews",
-    "jm": "James", "1pe": "1 Peter", "2pe": "2 Peter", "1jo": "1 John",
-    "2jo": "2 John", "3jo": "3 John", "jd": "Jude", "re": "Revelation"
-}
-
 def format_time(seconds):
     millis = int((seconds - int(seconds)) * 1000)
     seconds = int(seconds)
@@ -43,142 +43,399 @@ def format_time(seconds):
     hours, minutes = divmod(minutes, 60)
     return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
 
-def load_bible_data():
-    with open(JSON_PATH, 'r', encoding='utf-8-sig') as f:
-        data = json.load(f)
-    return data
+def load_bible_data(version=None):
+    # version 이 주어지면 json/<version>.json (매트릭스 모드), 아니면 기존 JSON_PATH
+    if version:
+        return load_version(version)
+    return load_corpus(JSON_PATH)
 
-def clean_verse_text(text):
-    if isinstance(text, str):
-        text = text.replace("&#x27;", "'").replace("&quot;", '"')
-        text = re.sub(r'\{[^}]*Heb\.[^}]*\}', '', text)
-        text = re.sub(r'\{|\}', '', text)
-        text = text.strip()
-    return text
+def movies_dir_for(version=None):
+    # 매트릭스 모드 결과물은 movies/<버전>/ 아래로 분리
+    return os.path.join(MOVIES_DIR, version) if version else MOVIES_DIR
 
-def process_chapter_video(book_idx, book_abbrev, book_name, chapter_idx, verses):
-    chapter_num = chapter_idx + 1
+def chapter_video_path(book_name, chapter_num, version=None):
+    return os.path.join(movies_dir_for(version), f"{book_name.replace(' ', '_')}_Chapter_{chapter_num}.mp4")
+
+def chapter_work_dir(book_name, chapter_num, version=None, work_dir=OUTPUT_DIR):
+    # (버전, 책, 장) 기준 작업 폴더 — 병렬 모드에서도 워커가 아니라 작업 기준이라 다른 워커가 재시도를 이어받음
     safe_book_name = book_name.replace(" ", "_")
-    
-    final_video_name = f"{safe_book_name}_Chapter_{chapter_num}.mp4"
-    final_video_path = os.path.join(MOVIES_DIR, final_video_name)
-    srt_path = os.path.join(MOVIES_DIR, f"{safe_book_name}_Chapter_{chapter_num}.srt")
-    
-    # Check if exists
-    if os.path.exists(final_video_path):
-        print(f"Skipping {final_video_name} (Exists)")
-        return final_video_path, True # Path, Skipped
+    return os.path.join(work_dir, f"{version}_{safe_book_name}" if version else safe_book_name) + f"_Chapter_{chapter_num}"
 
-    print(f"--- Generating {book_name} Chapter {chapter_num} ---")
-    
-    assets = []
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(viewport={'width': 1920, 'height': 1080})
-        
-        page.goto(BASE_URL)
-        page.wait_for_timeout(2000)
+@contextmanager
+def claim_chapter_dir(chapter_dir):
+    """
+    챕터 작업 폴더를 이 프로세스가 쓰도록 잠급니다 (.lock 파일에 pid). 죽은 프로세스가 남긴 잠금은 넘겨받고,
+    살아 있는 다른 프로세스가 쓰는 중이면 RuntimeError (작업 실패로 처리되어 나중에 다시 시도됨).
+    """
+    os.makedirs(chapter_dir, exist_ok=True)
+    lock_path = os.path.join(chapter_dir, CHAPTER_LOCK_NAME)
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                with open(lock_path, 'r') as f:
+                    owner = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            if owner and owner != os.getpid() and pid_alive(owner):
+                raise RuntimeError(f"{chapter_dir} is in use by process {owner}")
+            # 주인이 없거나 죽은 잠금: 지우고 다시 시도
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    try:
+        yield chapter_dir
+    finally:
+        # 성공하면 process_chapter_video 가 폴더째 지우므로 잠금 파일이 없을 수 있음
+        try:
+            os.remove(lock_path)
+            if not os.listdir(chapter_dir):
+                os.rmdir(chapter_dir)  # 이미 영상이 있어 건너뛴 작업은 빈 폴더만 남음
+        except FileNotFoundError:
+            pass
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
 
+def start_verse_audio(manifest, tts, i, cleaned_text, voice=DEFAULT_VOICE, engine=None):
+    # tts 가 None 이면 챕터 일괄 합성 모드 (오디오는 챕터 단위로 따로 받음)
+    if tts is None:
+        return {'audio': None, 'duration': None, 'audio_future': None}
+    # 이미 완료(체크섬 일치)된 절 오디오는 재사용, 아니면 TTS 파이프라인에 제출
+    done = manifest.completed_audio(i, cleaned_text)
+    if done:
+        return {'audio': done[0], 'duration': done[1], 'audio_future': None}
+    # TTS 는 백그라운드 파이프라인에 맡기고 바로 캡처 진행 (캐시에 있으면 즉시 완료)
+    return {'audio': None, 'duration': None, 'audio_future': tts.submit(cleaned_text, voice=voice, engine=engine)}
+
+def capture_chapter_assets(page, book_idx, book_name, chapter_idx, verses, assets, tts, manifest,
+                           work_dir=OUTPUT_DIR, stream=False, voice=DEFAULT_VOICE, version=None, engine=None):
+    chapter_num = chapter_idx + 1
+    cleaned_verses = [clean_verse_text(v) for v in verses]
+    done_images = [None if stream else manifest.completed_image(i, t) for i, t in enumerate(cleaned_verses)]
+
+    if all(done_images):
+        print(f"All frames for {book_name} {chapter_num} already captured.")
+    else:
         # State Injection for Navigation
         print(f"Navigating to {book_name} {chapter_num}...")
         testament = 'old' if book_idx < 39 else 'new'
+        canonical_abbrev, english_name = canonical_book(book_idx)
+        image_url = chapter_image_path(canonical_abbrev, english_name, chapter_num).replace(os.sep, '/')
+        if version:
+            # 풀의 페이지는 마지막으로 쓴 버전을 유지하므로 다를 때만 바꿈 (JSON 은 라우터 메모리 캐시에서 받음)
+            page.evaluate("""async (v) => {
+                if (window.state.currentVersion.abbreviation === v) return;
+                await changeVersion(v);
+                if (window.state.currentVersion.abbreviation !== v) {
+                    // index.json 에 없는 버전이면 데이터만 직접 로드
+                    await loadBibleData(v);
+                    window.state.currentVersion = { ...window.state.currentVersion, abbreviation: v };
+                }
+            }""", version)
         
-        page.evaluate(f"""
+        page.evaluate(f"""async () => {{
+            // 책별 샤드 모드면 본문을 먼저 받아 둠 (전체 JSON 모드에서는 즉시 resolve)
+            if (window.ensureBook) await window.ensureBook({book_idx});
             window.state.view = 'reader';
             window.state.currentBookIndex = {book_idx};
             window.state.currentChapterIndex = {chapter_idx};
             window.state.currentTestament = '{testament}';
             window.state.uiLang = 'en';
+            // 배경은 Python 이 고른 장 이미지로 고정 (네이티브 렌더러와 같은 이미지, 버전별 약어와 무관).
+            // 재개/재실행 때 프레임이 바뀌지 않아야 매니페스트 프레임과 세그먼트 캐시를 그대로 쓸 수 있음
+            window.state.currentImageUrl = {json.dumps(image_url)};
             render();
-            // Force image update
-            tryUpdateImage(window.state.bibleData[{book_idx}], {chapter_idx}, 0);
-        """)
-        page.wait_for_timeout(3000) # Wait for render and image load
-
-        for i, verse_text in enumerate(verses):
-            print(f"Processing Verse {i+1}/{len(verses)}...")
-            cleaned_text = clean_verse_text(verse_text)
-            
-            page.evaluate(f"""
-                document.querySelectorAll('.verse-item').forEach(e => e.classList.remove('verse-highlight'));
-                const el = document.getElementById('verse-{i}');
-                if(el) {{
-                    el.classList.add('verse-highlight');
-                    el.scrollIntoView({{behavior: 'instant', block: 'center'}});
-                }}
-            """)
-            page.wait_for_timeout(500)
-            
-            img_path = os.path.join(OUTPUT_DIR, f"v{i}.png")
+            updateImageDOM();
+        }}""")
+        # 고정 3초 대기 대신 index.html 의 이미지 준비 신호를 기다림
+        page.wait_for_function("() => document.body.dataset.imageReady === '1'", timeout=RENDER_READY_TIMEOUT_MS)
+
+    for i, cleaned_text in enumerate(cleaned_verses):
+        item = start_verse_audio(manifest, tts, i, cleaned_text, voice, engine)
+        item.update({'image': done_images[i], 'frame': None, 'text': cleaned_text})
+        assets.append(item)
+
+        if done_images[i]:
+            continue
+        print(f"Processing Verse {i+1}/{len(verses)}...")
+        
+        # 하이라이트 + 스크롤이 자리잡을 때까지 기다리는 Promise (고정 0.5초 대기 대체)
+        page.evaluate("(i) => window.highlightVerse(i)", i)
+        
+        if stream:
+            # 스트리밍 모드: 스크린샷을 메모리 버퍼로만 보관 (디스크에 PNG 를 쓰지 않음)
+            item['frame'] = page.screenshot()
+        else:
+            img_path = os.path.join(work_dir, f"v{i}.png")
             page.screenshot(path=img_path)
-            
-            audio_path = os.path.join(OUTPUT_DIR, f"v{i}.mp3")
-            if os.path.exists(audio_path): os.remove(audio_path)
-            
-            # Edge TTS via subprocess
-            # Voice: en-US-ChristopherNeural (Male) or en-US-AriaNeural (Female)
-            edge_tts_cmd = [
-                "/Users/dayyoung/Library/Python/3.9/bin/edge-tts",
-                "--text", cleaned_text,
-                "--write-media", audio_path,
-                "--voice", "en-US-ChristopherNeural"
-            ]
-            
-            try:
-                import subprocess
-                subprocess.run(edge_tts_cmd, check=True)
-            except Exception as e:
-                print(f"Edge TTS Error: {e}")
-                # Fallback or retry? usually reliable.
-                pass
+            manifest.record_image(i, cleaned_text, img_path)
+            item['image'] = img_path
+
+def capture_chapter_assets_native(book_abbrev, book_name, chapter_idx, verses, assets, tts, manifest,
+                                  work_dir=OUTPUT_DIR, stream=False, voice=DEFAULT_VOICE, display_name=None,
+                                  engine=None):
+    # 브라우저 없이 Pillow 로 같은 리더 레이아웃을 그림 (정적 레이어는 챕터당 한 번만 생성)
+    # 장 이미지는 정경 약어/영어 이름 기준이라 버전이 달라도 같은 이미지(와 패널 캐시)를 공유
+    chapter_num = chapter_idx + 1
+    cleaned_verses = [clean_verse_text(v) for v in verses]
 
-            assets.append({
-                'image': img_path, 
-                'audio': audio_path,
-                'text': cleaned_text 
-            })
+    native = NativeFrameRenderer()
+    native.begin_chapter(chapter_image_path(book_abbrev, book_name, chapter_num), display_name or book_name,
+                         chapter_num, cleaned_verses)
 
-            # Rate limit protection (Edge TTS is lenient but good to have small delay)
-            time.sleep(0.5) 
-            
-        browser.close()
+    for i, cleaned_text in enumerate(cleaned_verses):
+        item = start_verse_audio(manifest, tts, i, cleaned_text, voice, engine)
+        item.update({'image': None, 'frame': None, 'text': cleaned_text})
+        assets.append(item)
 
-    # Combine Video
-    print(f"Combining video for {book_name} {chapter_num}...")
-    clips = []
+        if stream:
+            item['frame'] = native.frame_bytes(i)
+            continue
+        item['image'] = manifest.completed_image(i, cleaned_text)
+        if item['image'] is None:
+            print(f"Processing Verse {i+1}/{len(verses)} (native)...")
+            img_path = os.path.join(work_dir, f"v{i}.png")
+            native.save_frame(i, img_path)
+            manifest.record_image(i, cleaned_text, img_path)
+            item['image'] = img_path
+
+def collect_verse_audio(assets, manifest):
+    """
+    TTS 결과를 절 단위로 모아 매니페스트에 기록합니다. 실패한 절이 있어도 성공한 절은 모두 기록한 뒤
+    예외를 올리므로, 다음 재시도는 빠진 절만 다시 합성합니다.
+    """
+    failures = []
+    for i, item in enumerate(assets):
+        if item['audio_future'] is None:
+            continue
+        try:
+            item['audio'] = item['audio_future'].result()
+        except Exception as e:
+            failures.append((i, e))
+            continue
+        try:
+            item['duration'] = probe_duration(item['audio'])
+        except Exception:
+            item['duration'] = None
+        manifest.record_audio(i, item['text'], item['audio'], item['duration'])
+
+    if failures:
+        first_idx, first_error = failures[0]
+        raise RuntimeError(f"TTS failed for {len(failures)} verse(s), first at verse {first_idx + 1}: {first_error}")
+
+def start_chapter_audio(tts, cleaned_verses, voice=DEFAULT_VOICE, engine=None):
+    """
+    챕터 일괄 합성 모드: 절들을 MAX_BATCH_CHARS 이하 묶음으로 나눠 묶음마다 TTS 요청 1번만 보냅니다.
+    재시도 시에는 TTS 캐시가 묶음 오디오와 단어 경계를 그대로 돌려주므로 매니페스트에 따로 기록하지 않습니다.
+    """
+    return [(first, tts.submit_batch(texts, voice=voice, engine=engine)) for first, texts in split_batches(cleaned_verses)]
+
+def collect_chapter_audio(assets, batch_futures):
+    # 묶음별 절 길이를 각 절에 나눠 넣고, 조립에 쓸 오디오 트랙(묶음 파일) 목록을 돌려줌
+    tracks = []
+    for first, future in batch_futures:
+        result = future.result()
+        for j, duration in enumerate(result['durations']):
+            assets[first + j]['duration'] = duration
+        tracks.append(result['audio'])
+    return tracks
+
+def build_srt(assets, durations, timestamps=None):
+    # timestamps 가 있으면 (시작, 끝) 샘플 기준 시간을 그대로 사용 (절 사이 무음 구간에는 자막 없음)
     srt_content = ""
     current_time = 0.0
-    
-    for i, item in enumerate(assets):
-        audio_clip = AudioFileClip(item['audio'])
-        duration = audio_clip.duration
-        
-        img_clip = ImageClip(item['image']).with_duration(duration)
-        img_clip = img_clip.with_audio(audio_clip)
-        clips.append(img_clip)
-        
-        start_fmt = format_time(current_time)
-        end_fmt = format_time(current_time + duration)
+
+    for i, (item, duration) in enumerate(zip(assets, durations)):
+        start, end = timestamps[i] if timestamps else (current_time, current_time + duration)
+        start_fmt = format_time(start)
+        end_fmt = format_time(end)
         
         srt_content += f"{i+1}\n"
         srt_content += f"{start_fmt} --> {end_fmt}\n"
         srt_content += f"{item['text']}\n\n"
         
         current_time += duration
-        
-    final_clip = concatenate_videoclips(clips)
-    final_clip.write_videofile(final_video_path, fps=24, codec='libx264', audio_codec='aac')
+    return srt_content
+
+def write_video_moviepy(assets, out_path, audio_tracks, durations, keyframe_times=None):
+    # MoviePy 경로: 절마다 ImageClip 을 만들어 이어 붙임 (fps=24 로 모든 프레임을 인코딩)
+    # 오디오는 이미 합쳐진 트랙(또는 일괄 합성 묶음)만 열어서 한 번에 입힘 (절마다 리더를 열어두지 않음)
+    clips = [ImageClip(item['image']).with_duration(d) for item, d in zip(assets, durations) if d > 0]
+    audio_clips = [AudioFileClip(path) for path in audio_tracks]
+    audio_clip = audio_clips[0] if len(audio_clips) == 1 else concatenate_audioclips(audio_clips)
+    final_clip = concatenate_videoclips(clips).with_audio(audio_clip)
+    final_clip.write_videofile(out_path, fps=24, codec='libx264', audio_codec='aac',
+                               ffmpeg_params=keyframe_args(keyframe_times))
+
+def process_chapter_video(book_idx, book_abbrev, book_name, chapter_idx, verses, renderer=None, tts=None,
+                          work_dir=OUTPUT_DIR, encoder=VIDEO_ENCODER, frame_renderer=FRAME_RENDERER,
+                          stream_frames=False, tts_mode=TTS_MODE, verse_gap=VERSE_GAP_SECONDS,
+                          version=None, display_name=None, tts_engine=DEFAULT_ENGINE):
+    chapter_num = chapter_idx + 1
+    # 버전 언어를 기본 엔진이 지원하지 않으면 다른 엔진으로 전환 (예: 에스페란토 -> gTTS)
+    engine = engine_for_version(version, tts.engine if tts is not None else tts_engine)
+    voice = voice_for_version(version, engine)
+    if tts_mode == 'chapter' and not get_backend(engine).supports_boundaries:
+        print(f"TTS engine '{engine}' has no word-boundary timings. Using per-verse TTS for this chapter.")
+        tts_mode = 'verse'
+    
+    final_video_path = chapter_video_path(book_name, chapter_num, version)
+    final_video_name = os.path.basename(final_video_path)
+    srt_path = os.path.splitext(final_video_path)[0] + ".srt"
     
-    with open(srt_path, 'w', encoding='utf-8') as f:
-        f.write(srt_content)
+    # Check if exists
+    if os.path.exists(final_video_path):
+        print(f"Skipping {final_video_name} (Exists)")
+        return final_video_path, True # Path, Skipped
+
+    if encoder == 'segments' and tts_mode == 'chapter':
+        raise ValueError("encoder='segments' needs per-verse audio (tts_mode='verse')")
+
+    print(f"--- Generating {book_name} Chapter {chapter_num}{f' [{version}]' if version else ''} ---")
+    
+    assets = []
+    # 챕터 전용 작업 폴더 + 매니페스트 (실패 후 재시도 시 완료된 절은 건너뜀)
+    chapter_dir = chapter_work_dir(book_name, chapter_num, version, work_dir)
+    os.makedirs(chapter_dir, exist_ok=True)
+    manifest = ChapterManifest(chapter_dir, book_name, chapter_num)
+    cleaned_verses = [clean_verse_text(v) for v in verses]
+    resume_idx = manifest.first_missing(cleaned_verses, need_image=not stream_frames,
+                                        need_audio=tts_mode != 'chapter')
+    if resume_idx is None:
+        print("All verse assets found in manifest. Skipping capture and TTS.")
+    elif resume_idx > 0:
+        print(f"Resuming {book_name} {chapter_num} from verse {resume_idx + 1} (manifest)")
+        
+    # 렌더러가 주어지지 않으면 이 챕터 전용으로 하나 띄움 (단독 실행 호환)
+    own_renderer = renderer is None and frame_renderer == 'browser'
+    if own_renderer:
+        renderer = RendererService(BASE_URL, pool_size=1).start()
+    own_tts = tts is None
+    if own_tts:
+        tts = TTSPipeline(engine=tts_engine, cache=TTSCache())
+
+    try:
+        batch_futures = None
+        verse_tts = tts
+        if tts_mode == 'chapter':
+            # 챕터 일괄 합성은 캡처 전에 제출해서 캡처와 겹치게 진행
+            batch_futures = start_chapter_audio(tts, cleaned_verses, voice, engine)
+            verse_tts = None
+
+        if frame_renderer == 'native':
+            capture_chapter_assets_native(book_abbrev, book_name, chapter_idx, verses, assets, verse_tts, manifest,
+                                          chapter_dir, stream=stream_frames, voice=voice, display_name=display_name,
+                                          engine=engine)
+        else:
+            with renderer.page() as page:
+                capture_chapter_assets(page, book_idx, book_name, chapter_idx, verses, assets, verse_tts, manifest,
+                                       chapter_dir, stream=stream_frames, voice=voice, version=version,
+                                       engine=engine)
+
+        # 캡처가 끝난 뒤, 조립 직전에만 남은 TTS 결과를 기다림
+        if batch_futures is not None:
+            audio_tracks = collect_chapter_audio(assets, batch_futures)
+        else:
+            collect_verse_audio(assets, manifest)
+            audio_tracks = [item['audio'] for item in assets]
+    finally:
+        manifest.close()
+        if own_renderer:
+            renderer.close()
+        if own_tts:
+            tts.close()
+
+    # Combine Video
+    print(f"Combining video for {book_name} {chapter_num} ({encoder})...")
+
+    # 작업 폴더에 먼저 쓰고 movies/ 로 원자적으로 교체 (중간에 죽어도 반쪽짜리 mp4 가 남지 않음)
+    tmp_video_path = os.path.join(chapter_dir, final_video_name)
+    tmp_srt_path = os.path.join(chapter_dir, os.path.basename(srt_path))
+
+    timestamps = None
+    if encoder == 'segments':
+        # 절마다 캐시된 세그먼트를 쓰고, 바뀐 절만 새로 인코딩한 뒤 스트림 복사로 이어 붙임.
+        # 자막/절 인덱스는 오디오 길이가 아니라 세그먼트의 실제 길이(프레임 반올림, AAC 패딩 포함)로 계산
+        segment_cache = SegmentCache()
+        segments = [
+            segment_cache.get_or_encode(item['text'], f"{engine}:{voice}",
+                                        item['frame'] if stream_frames else item['image'], item['audio'])
+            for item in assets
+        ]
+        durations = [segment_cache.duration(path) for path in segments]
+    elif tts_mode != 'chapter':
+        # 절 오디오를 한 번씩만 디코딩해 챕터 트랙 하나로 합침 (샘플 단위 시간, 절 사이 무음, 메모리는 절 하나 분량)
+        chapter_audio = os.path.join(chapter_dir, "chapter_audio.wav")
+        timestamps, durations = assemble_chapter_audio(audio_tracks, chapter_audio, verse_gap)
+        audio_tracks = [chapter_audio]
+    else:
+        durations = [item['duration'] if item['duration'] is not None else probe_duration(item['audio']) for item in assets]
+
+    # 절 화면이 바뀌는 시각 = 자막 시작 시각, 여기마다 키프레임을 넣음
+    verse_starts = [sum(durations[:i]) for i in range(len(durations))]
+    if timestamps is None:
+        timestamps = [(start, start + d) for start, d in zip(verse_starts, durations)]
+
+    if encoder == 'segments':
+        concat_segments(segments, tmp_video_path)
+        print(f"Segment cache: {segment_cache.stats()}")
+    elif stream_frames:
+        # 메모리 프레임을 ffmpeg stdin 으로 바로 전달
+        encode_frame_stream(
+            [item['frame'] for item in assets],
+            durations,
+            audio_tracks,
+            tmp_video_path,
+            keyframe_times=verse_starts
+        )
+    elif encoder == 'ffmpeg':
+        encode_still_video(
+            [item['image'] for item in assets],
+            audio_tracks,
+            durations, tmp_video_path,
+            keyframe_times=verse_starts
+        )
+    else:
+        write_video_moviepy(assets, tmp_video_path, audio_tracks, durations, keyframe_times=verse_starts)
+
+    with open(tmp_srt_path, 'w', encoding='utf-8') as f:
+        f.write(build_srt(assets, durations, timestamps))
+    # 절 → (시작, 끝, 키프레임 바이트 위치) 인덱스 (verse_clips.py 로 절 단위 스트림 복사 추출)
+    index_path = verse_index_path(final_video_path)
+    tmp_index_path = os.path.join(chapter_dir, os.path.basename(index_path))
+    write_verse_index(tmp_video_path, timestamps, tmp_index_path, [item['text'] for item in assets])
+
+    os.makedirs(os.path.dirname(final_video_path), exist_ok=True)
+    os.replace(tmp_srt_path, srt_path)
+    os.replace(tmp_index_path, index_path)
+    os.replace(tmp_video_path, final_video_path)
+
+    # 완성되면 챕터 작업 폴더(프레임 + 매니페스트) 정리
+    shutil.rmtree(chapter_dir, ignore_errors=True)
         
     return final_video_path, False
 
-def update_history(book, chapter, file_path):
+def update_history(book, chapter, file_path, version=None):
     history_file = 'video_history.json'
+    # 깨진/잘린 영상은 히스토리(업로드 대기열)에 넣지 않고 격리
+    verifier = MediaVerifier()
+    ok, reason = verifier.verify_many([file_path])[file_path]
+    if not ok:
+        verifier.quarantine(file_path, reason)
+        return
+
     try:
         if os.path.exists(history_file):
             with open(history_file, 'r') as f:
@@ -188,7 +445,8 @@ def update_history(book, chapter, file_path):
     except json.JSONDecodeError:
         history = []
         
-    file_name = os.path.basename(file_path)
+    # movies/ 기준 상대 경로 (매트릭스 모드는 "<버전>/Book_Chapter_N.mp4")
+    file_name = os.path.relpath(file_path, MOVIES_DIR).replace(os.sep, "/")
     file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
     
     entry = {
@@ -199,6 +457,8 @@ def update_history(book, chapter, file_path):
         "created_at": datetime.now().isoformat(),
         "uploaded": False
     }
+    if version:
+        entry["version"] = version
     
     history.append(entry)
     
@@ -206,18 +466,205 @@ def update_history(book, chapter, file_path):
         json.dump(history, f, indent=2)
     print(f"Added {file_name} to history.")
 
+def job_book(corpora, job):
+    """작업 (버전, book_idx, chapter_idx) 의 (약어, 파일용 책 이름, 화면용 책 이름, 절 목록)."""
+    version, book_idx, chapter_idx = job
+    book = corpora[version][book_idx]
+    verses = book['chapters'][chapter_idx]
+    if version:
+        # 버전마다 약어/이름 표기가 다르므로 파일 이름과 이미지는 정경 순서 기준으로 통일
+        abbrev, book_name = canonical_book(book_idx)
+        return abbrev, book_name, book.get('name') or book_name, verses
+    abbrev = book['abbrev']
+    book_name = BIBLE_NAMES.get(abbrev, abbrev)
+    return abbrev, book_name, book_name, verses
+
+def render_worker(worker_id, job_queue, result_queue, chapter_options, base_url=BASE_URL):
+    """
+    병렬 모드 워커 프로세스. 자체 브라우저/페이지와 TTS 파이프라인을 가지고 공유 큐에서
+    (버전, book_idx, chapter_idx) 작업을 하나씩 가져와 처리합니다. 챕터 작업 폴더(프레임 + 매니페스트)는
+    워커별이 아니라 video_assets/ 아래 작업 기준이라, 실패한 작업을 다른 워커가 받아도 이어서 진행합니다.
+    버전 데이터는 처음 필요할 때 한 번만 읽어 둡니다.
+    """
+    work_dir = OUTPUT_DIR
+    os.makedirs(work_dir, exist_ok=True)
+    corpora = {}
+
+    renderer = None
+    if chapter_options.get('frame_renderer', FRAME_RENDERER) == 'browser':
+        renderer = RendererService(base_url, pool_size=1).start()  # 워커는 페이지를 하나만 씀
+    tts = TTSPipeline(engine=chapter_options.get('tts_engine', DEFAULT_ENGINE), cache=TTSCache())
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            version, book_idx, chapter_idx = job
+            if version not in corpora:
+                corpora[version] = load_bible_data(version)
+            abbrev, book_name, display_name, verses = job_book(corpora, job)
+            try:
+                with claim_chapter_dir(chapter_work_dir(book_name, chapter_idx + 1, version, work_dir)):
+                    video_path, skipped = process_chapter_video(
+                        book_idx, abbrev, book_name, chapter_idx, verses,
+                        renderer=renderer, tts=tts, work_dir=work_dir,
+                        version=version, display_name=display_name, **chapter_options
+                    )
+                result_queue.put((job, book_name, video_path, skipped, None))
+            except Exception as e:
+                print(f"[worker {worker_id}] Error processing {book_name} Ch {chapter_idx+1}: {e}")
+                result_queue.put((job, book_name, None, False, str(e)))
+                # 실패 직후(대개 TTS 제한) 잠시 쉬었다가 다음 작업을 가져감
+                time.sleep(FAILED_JOB_COOLDOWN)
+    finally:
+        if renderer is not None:
+            renderer.close()
+        tts.close()
+        print(f"[worker {worker_id}] TTS cache: {tts.cache.stats()}, requests sent: {tts.requests_sent}")
+
+def collect_jobs(corpora, start_index, chapter_major=False):
+    """
+    아직 영상이 없는 (버전, book_idx, chapter_idx) 작업 목록. 기존 단일 버전 모드는 버전이 None 입니다.
+    chapter_major=True 면 같은 장의 버전들을 붙여서 배치(native 렌더러가 장 이미지 패널을 공유),
+    아니면 버전별로 모아서 배치(브라우저 페이지가 버전 전환 없이 연속 처리)합니다.
+    """
+    jobs = []
+    for version, bible_data in corpora.items():
+        for book_idx in range(start_index, len(bible_data)):
+            book = bible_data[book_idx]
+            for chapter_idx in range(len(book['chapters'])):
+                _, book_name, _, _ = job_book(corpora, (version, book_idx, chapter_idx))
+                # 이미 만들어진 챕터는 큐에 넣지 않음
+                if not os.path.exists(chapter_video_path(book_name, chapter_idx + 1, version)):
+                    jobs.append((version, book_idx, chapter_idx))
+    if chapter_major:
+        order = list(corpora)
+        jobs.sort(key=lambda job: (job[1], job[2], order.index(job[0])))
+    return jobs
+
+def run_parallel(jobs, workers, chapter_options, base_url=BASE_URL):
+    import multiprocessing as mp
+    import queue
+
+    print(f"Parallel mode: {len(jobs)} chapters queued for {workers} workers.")
+    if not jobs:
+        return
+
+    job_queue = mp.Queue()
+    result_queue = mp.Queue()
+    for job in jobs:
+        job_queue.put(job)
+
+    procs = []
+    for worker_id in range(workers):
+        proc = mp.Process(target=render_worker, args=(worker_id, job_queue, result_queue, chapter_options, base_url))
+        proc.start()
+        procs.append(proc)
+
+    # 히스토리 파일은 부모 프로세스만 기록 (동시 쓰기 방지)
+    attempts = {}
+    remaining = len(jobs)
+    try:
+        while remaining > 0:
+            try:
+                job, book_name, video_path, skipped, error = result_queue.get(timeout=60)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    print(f"All workers exited with {remaining} chapters unfinished.")
+                    break
+                continue
+            version, _, chapter_idx = job
+            if error is None:
+                remaining -= 1
+                if not skipped:
+                    update_history(book_name, chapter_idx + 1, video_path, version)
+                continue
+
+            attempts[job] = attempts.get(job, 0) + 1
+            if attempts[job] < MAX_JOB_ATTEMPTS:
+                print(f"Re-queueing {book_name} Ch {chapter_idx+1} (attempt {attempts[job] + 1}/{MAX_JOB_ATTEMPTS})")
+                job_queue.put(job)
+            else:
+                print(f"Giving up on {book_name} Ch {chapter_idx+1} after {MAX_JOB_ATTEMPTS} attempts.")
+                remaining -= 1
+    finally:
+        for _ in procs:
+            job_queue.put(None)
+        for proc in procs:
+            proc.join()
+
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render Bible chapter videos with Playwright.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel render workers (1 = sequential)")
+    parser.add_argument("--start-book", type=int, default=0,
+                        help="Book index to start from (0 = Genesis)")
+    parser.add_argument("--encoder", choices=["ffmpeg", "segments", "moviepy"], default=VIDEO_ENCODER,
+                        help="Video encoder backend for chapter assembly")
+    parser.add_argument("--renderer", choices=["browser", "native"], default=FRAME_RENDERER,
+                        help="Frame renderer: Playwright screenshots or native Pillow compositor")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Reader URL. The default serves index.html/json/images in-process (no server.sh needed)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Keep frames in memory and pipe them straight into ffmpeg (no PNGs on disk)")
+    parser.add_argument("--verse-gap", type=float, default=VERSE_GAP_SECONDS,
+                        help="Seconds of silence inserted between verses (verse TTS mode, non-segment encoders)")
+    parser.add_argument("--versions",
+                        help="Matrix mode: 'all' or comma-separated versions from json/ (e.g. pt_nvi,es_rvr). "
+                             "Renders version x book x chapter through the worker pool into movies/<version>/")
+    parser.add_argument("--tts-engine", choices=sorted(BACKENDS), default=DEFAULT_ENGINE,
+                        help="Default TTS engine (falls back per language when the engine lacks a voice)")
+    parser.add_argument("--tts-mode", choices=["verse", "chapter"], default=TTS_MODE,
+                        help="TTS granularity: one request per verse, or one per chapter split by word-boundary timings")
+    args = parser.parse_args()
+    if args.encoder == "segments" and args.tts_mode == "chapter":
+        parser.error("--encoder segments needs per-verse audio (--tts-mode verse)")
+
     try:
         from upload_youtube import upload_video
     except ImportError:
         print("Upload module not found.")
         upload_video = None
 
-    bible_data = load_bible_data()
-    
     # Process from 1 Kings (index 10) to End
-    start_index = 0 
+    start_index = args.start_book
+    # process_chapter_video 에 그대로 넘기는 옵션 (병렬 워커에도 동일하게 전달)
+    chapter_options = {'encoder': args.encoder, 'frame_renderer': args.renderer, 'stream_frames': args.stream,
+                       'tts_mode': args.tts_mode, 'verse_gap': args.verse_gap, 'tts_engine': args.tts_engine}
+
+    chapter_major = args.renderer == 'native'
+    if args.versions:
+        # 매트릭스 모드: 모든 (버전 x 책 x 장) 작업을 하나의 워커 풀로 처리
+        versions = list_versions() if args.versions == "all" else [v.strip() for v in args.versions.split(",") if v.strip()]
+        corpora = {version: load_bible_data(version) for version in versions}
+        print(f"Matrix mode: {len(versions)} version(s): {', '.join(versions)}")
+        run_parallel(collect_jobs(corpora, start_index, chapter_major), max(1, args.workers),
+                     chapter_options, args.base_url)
+        return
+
+    bible_data = load_bible_data()
+    if args.workers > 1:
+        run_parallel(collect_jobs({None: bible_data}, start_index, chapter_major), args.workers,
+                     chapter_options, args.base_url)
+        return
     
+    # 브라우저 하나 + 워밍된 리더 페이지 풀을 전체 실행 동안 재사용 (native 렌더러는 브라우저 불필요)
+    renderer = RendererService(args.base_url).start() if args.renderer == 'browser' else None
+    tts = TTSPipeline(engine=args.tts_engine, cache=TTSCache())
+    try:
+        run_chapters(bible_data, start_index, renderer, tts, chapter_options)
+    finally:
+        tts.close()
+        print(f"TTS cache: {tts.cache.stats()}, requests sent: {tts.requests_sent}")
+        if renderer is not None:
+            renderer.close()
+            print(f"Renderer pages created: {renderer.pages_created}, recycled: {renderer.pages_recycled}")
+            if renderer.router is not None:
+                print(f"Asset router: {renderer.router.stats()}")
+
+def run_chapters(bible_data, start_index, renderer, tts, chapter_options):
     for book_idx in range(start_index, len(bible_data)):
         book = bible_data[book_idx]
         abbrev = book['abbrev']
@@ -227,10 +674,11 @@ def main():
         print(f"\n========== Processing Book: {book_name} ({len(chapters)} Chapters) ==========")
         
         for chapter_idx, verses in enumerate(chapters):
+            attempt = 0
             while True:  # Retry loop for the chapter
                 try:
                     # verses is a list of strings
-                    video_path, skipped = process_chapter_video(book_idx, abbrev, book_name, chapter_idx, verses)
+                    video_path, skipped = process_chapter_video(book_idx, abbrev, book_name, chapter_idx, verses, renderer=renderer, tts=tts, **chapter_options)
                     
                     if not skipped:
                         update_history(book_name, chapter_idx + 1, video_path)
@@ -244,9 +692,12 @@ def main():
                     # import traceback
                     # traceback.print_exc()
                     
-                    # On critical error (likely TTS), wait effectively and retry SAME chapter
-                    print("Waiting 5 minutes before retrying same chapter...")
-                    time.sleep(300)
+                    # 같은 챕터를 재시도하되, 매니페스트 덕분에 빠진 절부터 이어서 진행하므로 짧게 대기
+                    # (절 단위 TTS 재시도/백오프는 TTSPipeline 이 처리)
+                    delay = min(CHAPTER_RETRY_MAX_DELAY, CHAPTER_RETRY_BASE_DELAY * (2 ** attempt))
+                    attempt += 1
+                    print(f"Waiting {delay}s before resuming same chapter...")
+                    time.sleep(delay)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,223 @@
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, ImageDraw
+from bible_text import BIBLE_NAMES
+from native_renderer import load_font, chapter_image_path, image_panel_base, SERIF_BOLD_FONTS, SANS_FONTS
+from ffmpeg_encoder import FFMPEG, encode_still_video
+from audio_assembler import assemble_chapter_audio
+from tts_cache import TTSCache
+from tts_pipeline import DEFAULT_RATE, DEFAULT_ENGINE, engine_for_version, voice_for_version
+from tts_backends import BACKENDS, get_backend
+from subtitles import parse_srt
+
+# Configuration
+MOVIES_DIR = "movies"
+SHORTS_DIR = "short"          # merge_shorts.py 가 합치는 폴더
+SHORT_WIDTH = 1080            # 9:16 세로 영상
+SHORT_HEIGHT = 1920
+SHORT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+TEXT_MARGIN_X = 90
+VERSE_FONT_SIZE = 64
+VERSE_LINE_HEIGHT = 92
+TITLE_FONT_SIZE = 48
+DIM_ALPHA = 0.45              # 배경 이미지 위에 덮는 검정 비율 (글자 가독성)
+
+BOOK_ABBREVS = {name: abbrev for abbrev, name in BIBLE_NAMES.items()}
+SELECTION_PATTERN = re.compile(r"^\s*(.+?)\s+(\d+):(\d+)(?:-(\d+))?\s*$")
+
+
+def parse_selection(spec):
+    """'John 3:16', '1 Kings 2:3-5' -> (책 이름, 장, 시작 절, 끝 절)."""
+    match = SELECTION_PATTERN.match(spec)
+    if not match:
+        raise ValueError(f"Cannot parse selection '{spec}' (expected e.g. 'John 3:16-18')")
+    book, chapter, first, last = match.groups()
+    book = next((name for name in BOOK_ABBREVS if name.lower() == book.strip().lower()), None)
+    if book is None:
+        raise ValueError(f"Unknown book in '{spec}'")
+    first = int(first)
+    return book, int(chapter), first, int(last) if last else first
+
+
+def chapter_assets(book, chapter, version=None):
+    """기존 챕터 결과물 (mp4 경로 또는 None, srt 경로). 예전 소문자 파일 이름도 찾습니다."""
+    movies_dir = os.path.join(MOVIES_DIR, version) if version else MOVIES_DIR
+    base = f"{book.replace(' ', '_')}_Chapter_{chapter}"
+    for name in (base, base.lower()):
+        srt_path = os.path.join(movies_dir, name + ".srt")
+        if os.path.exists(srt_path):
+            video_path = os.path.join(movies_dir, name + ".mp4")
+            return (video_path if os.path.exists(video_path) else None), srt_path
+    raise FileNotFoundError(f"No rendered chapter found for {book} {chapter} in {movies_dir}/")
+
+
+def cached_verse_audio(texts, version=None, engine=DEFAULT_ENGINE, voice=None):
+    """
+    챕터 렌더링 때 TTS 캐시에 들어간 절 오디오 경로들. 하나라도 없으면 None (새로 합성하지 않음).
+    engine/voice 는 챕터를 렌더링할 때 쓴 값 (--tts-engine) 과 같아야 캐시 키가 맞습니다.
+    """
+    engine = engine_for_version(version, engine)
+    voice = voice or voice_for_version(version, engine)
+    backend = get_backend(engine)
+    cache = TTSCache()
+    paths = []
+    for text in texts:
+        path = cache.get(cache.key(text, voice, DEFAULT_RATE, engine, backend.ext), backend.ext)
+        if path is None:
+            return None
+        paths.append(path)
+    return paths
+
+
+def cut_audio(video_path, start, duration, out_path):
+    # 캐시에 오디오가 없으면 챕터 영상에서 해당 구간 오디오만 잘라 씀
+    subprocess.run([
+        FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{duration:.3f}",
+        "-vn", "-c:a", "pcm_s16le", out_path
+    ], check=True)
+    return out_path
+
+
+def wrap_lines(text, font, max_width):
+    lines, current = [], ""
+    for word in text.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if font.getlength(candidate) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = ""
+        # 공백 없는 언어(중국어 등)나 긴 단어는 글자 단위로 자름
+        for ch in word:
+            if current and font.getlength(current + ch) > max_width:
+                lines.append(current)
+                current = ""
+            current += ch
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_short_frame(image_path, reference, text, out_path):
+    """배경(장 이미지 cover + 그라데이션) 위에 절 본문과 출처를 가운데 정렬로 그립니다."""
+    frame = image_panel_base(image_path, SHORT_WIDTH, SHORT_HEIGHT).copy()
+    frame = Image.blend(frame, Image.new("RGB", frame.size, (0, 0, 0)), DIM_ALPHA)
+    draw = ImageDraw.Draw(frame)
+
+    verse_font = load_font(tuple(SERIF_BOLD_FONTS), VERSE_FONT_SIZE)
+    title_font = load_font(tuple(SANS_FONTS), TITLE_FONT_SIZE)
+    lines = wrap_lines(text, verse_font, SHORT_WIDTH - 2 * TEXT_MARGIN_X)
+    y = (SHORT_HEIGHT - len(lines) * VERSE_LINE_HEIGHT) // 2
+    for line in lines:
+        x = (SHORT_WIDTH - verse_font.getlength(line)) / 2
+        draw.text((x, y), line, font=verse_font, fill=(255, 255, 255))
+        y += VERSE_LINE_HEIGHT
+
+    draw.text(((SHORT_WIDTH - title_font.getlength(reference)) / 2, y + 60), reference,
+              font=title_font, fill=(230, 230, 230))
+    frame.save(out_path, format="PNG", compress_level=1)
+    return out_path
+
+
+def short_path(book, chapter, first, last, version=None):
+    verses = f"{first}" if first == last else f"{first}-{last}"
+    prefix = f"{version}_" if version else ""
+    return os.path.join(SHORTS_DIR, f"{prefix}{book.replace(' ', '_')}_{chapter}_{verses}.mp4")
+
+
+def build_short(spec, version=None, engine=DEFAULT_ENGINE, voice=None):
+    """
+    워커 프로세스에서 실행: 선택 구간 하나를 9:16 쇼츠로 만듭니다.
+    TTS 캐시의 절 오디오(없으면 챕터 영상 오디오 구간), 장 이미지, SRT 시간만 사용하므로
+    TTS 요청이나 브라우저 캡처는 일어나지 않습니다.
+    """
+    book, chapter, first, last = parse_selection(spec)
+    out_path = short_path(book, chapter, first, last, version)
+    if os.path.exists(out_path):
+        return out_path, True
+
+    video_path, srt_path = chapter_assets(book, chapter, version)
+    entries = parse_srt(srt_path)
+    if not (1 <= first <= last <= len(entries)):
+        raise ValueError(f"{spec}: chapter has {len(entries)} verses")
+    selected = entries[first - 1:last]
+    texts = [text for _, _, text in selected]
+
+    work_dir = tempfile.mkdtemp(prefix="short_")
+    try:
+        audio_path = os.path.join(work_dir, "audio.wav")
+        cached = cached_verse_audio(texts, version, engine, voice)
+        if cached:
+            _, durations = assemble_chapter_audio(cached, audio_path)
+        elif video_path:
+            # SRT 기준: 절이 화면에 있는 시간 = 다음 절 시작까지 (절 사이 무음 포함)
+            starts = [start for start, _, _ in selected]
+            end = entries[last][0] if last < len(entries) else selected[-1][1]
+            durations = [b - a for a, b in zip(starts, starts[1:] + [end])]
+            cut_audio(video_path, starts[0], end - starts[0], audio_path)
+        else:
+            raise FileNotFoundError(f"{spec}: verse audio is neither cached nor available from the chapter video")
+
+        image_path = chapter_image_path(BOOK_ABBREVS[book], book, chapter)
+        frames = []
+        for offset, text in enumerate(texts):
+            reference = f"{book} {chapter}:{first + offset}"
+            frames.append(render_short_frame(image_path, reference, text, os.path.join(work_dir, f"f{offset}.png")))
+
+        os.makedirs(SHORTS_DIR, exist_ok=True)
+        tmp_out = os.path.join(work_dir, os.path.basename(out_path))
+        encode_still_video(frames, [audio_path], durations, tmp_out)
+        shutil.move(tmp_out, out_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return out_path, False
+
+
+def build_shorts(specs, version=None, workers=SHORT_WORKERS, engine=DEFAULT_ENGINE, voice=None):
+    """선택 목록을 워커 풀에서 병렬로 처리합니다. 실패한 항목은 건너뛰고 마지막에 모아서 보고합니다."""
+    made, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_short, spec, version, engine, voice): spec for spec in specs}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                path, skipped = future.result()
+            except Exception as e:
+                print(f"Failed: {spec}: {e}")
+                failures.append(spec)
+                continue
+            print(f"{'Exists' if skipped else 'Created'}: {path}")
+            made.append(path)
+    return made, failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cut 9:16 verse shorts from already rendered chapters.")
+    parser.add_argument("selections", nargs="*", help="e.g. 'John 3:16' 'Psalms 23:1-6'")
+    parser.add_argument("--file", help="Text file with one selection per line (# comments allowed)")
+    parser.add_argument("--version", help="Use chapters rendered in matrix mode (movies/<version>/)")
+    parser.add_argument("--workers", type=int, default=SHORT_WORKERS)
+    parser.add_argument("--tts-engine", choices=sorted(BACKENDS), default=DEFAULT_ENGINE,
+                        help="TTS engine the chapters were rendered with (selects the cached verse audio)")
+    parser.add_argument("--voice", help="Voice the chapters were rendered with (default: the engine's voice for the version)")
+    args = parser.parse_args()
+
+    specs = list(args.selections)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            specs += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    if not specs:
+        parser.error("no selections given")
+
+    made, failures = build_shorts(specs, args.version, args.workers, args.tts_engine, args.voice)
+    print(f"Shorts: {len(made)} ready, {len(failures)} failed.")
+    sys.exit(1 if failures else 0)
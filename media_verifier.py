@@ -0,0 +1,190 @@
+import os
+import json
+import shutil
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from ffmpeg_encoder import FFMPEG, probe_streams
+from subtitles import parse_srt
+
+# Configuration
+MOVIES_DIR = "movies"
+QUARANTINE_DIR = os.path.join(MOVIES_DIR, "quarantine")
+CACHE_FILE = "media_verify_cache.json"
+VERIFY_WORKERS = 8
+DURATION_TOLERANCE = 1.0         # 초 (자막 끝 시각과 영상 길이 차이 허용치)
+DURATION_TOLERANCE_RATIO = 0.02  # 또는 길이의 2% 중 큰 값
+SIDECAR_SUFFIXES = (".srt", ".verses.json")
+
+
+def expected_duration(video_path):
+    """같은 이름의 .srt 가 있으면 마지막 자막 끝 시각 (절 사이 무음이 없으면 자막 길이 합과 같음)."""
+    srt_path = os.path.splitext(video_path)[0] + ".srt"
+    if not os.path.exists(srt_path):
+        return None
+    entries = parse_srt(srt_path)
+    return entries[-1][1] if entries else None
+
+
+def check_tail_decodes(path):
+    # 마지막 1초를 실제로 디코딩해 봄: 중간에 잘린 파일은 moov 가 앞에 있어도 여기서 에러가 남
+    result = subprocess.run(
+        [FFMPEG, "-v", "error", "-sseof", "-1", "-i", path, "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    return result.returncode == 0 and not result.stderr.strip()
+
+
+def verify_media(path):
+    """
+    영상 하나를 검사합니다. 반환값: (ok, 사유, 길이)
+    - 컨테이너를 ffprobe 가 읽을 수 있는지, 끝부분이 디코딩되는지
+    - 비디오/오디오 스트림이 모두 있는지
+    - 길이가 SRT 자막 끝 시각과 맞는지 (SRT 가 있을 때)
+    """
+    try:
+        info = probe_streams(path)
+    except (subprocess.CalledProcessError, ValueError) as e:
+        return False, f"unreadable container ({e})", None
+    if info["video"] is None:
+        return False, "no video stream", info["duration"]
+    if info["audio"] is None:
+        return False, "no audio stream", info["duration"]
+    if not info["duration"]:
+        return False, "zero duration", info["duration"]
+
+    expected = expected_duration(path)
+    if expected is not None:
+        tolerance = max(DURATION_TOLERANCE, expected * DURATION_TOLERANCE_RATIO)
+        if abs(info["duration"] - expected) > tolerance:
+            return False, f"duration {info['duration']:.2f}s != subtitles {expected:.2f}s", info["duration"]
+
+    if not check_tail_decodes(path):
+        return False, "truncated (tail does not decode)", info["duration"]
+    return True, "ok", info["duration"]
+
+
+class MediaVerifier:
+    """
+    movies/ 의 영상을 스레드 풀로 검사하고 결과를 (경로, 크기, 수정 시각) 기준으로 캐시합니다.
+    파일이 바뀌지 않았으면 다시 검사하지 않으므로 반복 스캔 비용이 거의 없습니다.
+    실패한 파일은 movies/quarantine/ 으로 옮겨서 히스토리/업로드 대상에서 빠지게 합니다.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE, quarantine_dir=QUARANTINE_DIR, workers=VERIFY_WORKERS,
+                 movies_dir=MOVIES_DIR):
+        self.cache_file = cache_file
+        self.quarantine_dir = quarantine_dir
+        self.movies_dir = movies_dir
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._cache = self._load()
+        self.checked = 0
+        self.cached = 0
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def save(self):
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+
+    def verify(self, path):
+        """(ok, 사유). 캐시에 같은 크기/수정 시각의 결과가 있으면 그대로 사용합니다."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            with self._lock:
+                self.cached += 1
+            return entry["ok"], entry["reason"]
+
+        ok, reason, duration = verify_media(path)
+        with self._lock:
+            self.checked += 1
+            self._cache[key] = {
+                "size": stat.st_size, "mtime": stat.st_mtime, "ok": ok, "reason": reason,
+                "duration": duration, "checked_at": datetime.now().isoformat()
+            }
+        return ok, reason
+
+    def verify_many(self, paths):
+        """{경로: (ok, 사유)} — 스레드 풀에서 병렬 검사 후 캐시를 저장합니다."""
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(zip(paths, pool.map(self.verify, paths)))
+        self.save()
+        return results
+
+    def quarantine_target(self, path):
+        """
+        격리 위치: movies/ 기준 상대 경로를 격리 폴더 아래에 그대로 유지 (movies/<버전>/... 끼리 겹치지 않음).
+        같은 이름이 이미 격리되어 있으면 (반복 실행) 시각 접미사를 붙여 기존 파일을 덮어쓰지 않습니다.
+        반환값: 확장자 없는 대상 경로 (영상/자막/인덱스가 같은 이름을 씀)
+        """
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.movies_dir))
+        if rel.startswith(os.pardir):
+            rel = os.path.basename(path)
+        stem, ext = os.path.splitext(os.path.join(self.quarantine_dir, rel))
+        candidate, n = stem, 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        while any(os.path.exists(candidate + s) for s in (ext, ext + ".reason.txt") + SIDECAR_SUFFIXES):
+            candidate = f"{stem}.{stamp}" if n == 1 else f"{stem}.{stamp}.{n}"
+            n += 1
+        return candidate
+
+    def quarantine(self, path, reason):
+        """영상과 자막/인덱스 파일을 격리 폴더로 옮깁니다. 옮긴 영상 경로를 돌려줍니다."""
+        base = os.path.splitext(path)[0]
+        target_base = self.quarantine_target(path)
+        os.makedirs(os.path.dirname(target_base), exist_ok=True)
+        target = target_base + os.path.splitext(path)[1]
+        shutil.move(path, target)
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(base + suffix):
+                shutil.move(base + suffix, target_base + suffix)
+        with open(target + ".reason.txt", 'w', encoding='utf-8') as f:
+            f.write(f"{datetime.now().isoformat()} {reason}\n")
+        print(f"Quarantined {path}: {reason}")
+        return target
+
+    def gate(self, paths):
+        """검사를 통과한 경로만 돌려주고, 실패한 파일은 격리합니다."""
+        passed = []
+        for path, (ok, reason) in self.verify_many(paths).items():
+            if ok:
+                passed.append(path)
+            else:
+                self.quarantine(path, reason)
+        return passed
+
+    def stats(self):
+        return {"checked": self.checked, "cached": self.cached}
+
+
+def scan_movies(movies_dir=MOVIES_DIR):
+    """movies/ 와 버전별 하위 폴더의 mp4 (격리 폴더 제외)."""
+    found = []
+    for root, dirs, files in os.walk(movies_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != QUARANTINE_DIR]
+        found += [os.path.join(root, f) for f in files if f.endswith(".mp4")]
+    return sorted(found)
+
+
+if __name__ == "__main__":
+    verifier = MediaVerifier()
+    paths = scan_movies()
+    passed = verifier.gate(paths)
+    print(f"Verified {len(paths)} video(s): {len(passed)} ok, {len(paths) - len(passed)} quarantined "
+          f"({verifier.stats()})")
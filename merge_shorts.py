@@ -1,63 +1,237 @@
 import os
+import re
+import shutil
 import datetime
-from moviepy import *
+import tempfile
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from ffmpeg_encoder import FFMPEG, VIDEO_CRF, VIDEO_PRESET, AUDIO_BITRATE, probe_streams, write_concat_list
 
-def merge_todays_shorts():
-    short_dir = os.path.join(os.getcwd(), "short")
+# Configuration
+SHORT_DIR = "short"
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+NORMALIZE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# 이 스크립트가 만든 결과물(2024_05_01.mp4, 2024_05_01-2024_05_07.mp4)은 다시 입력으로 쓰지 않음
+MERGED_NAME = re.compile(r"^\d{4}_\d{2}_\d{2}(-\d{4}_\d{2}_\d{2})?\.mp4$")
+VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+
+def clip_signature(info):
+    """
+    스트림 복사로 이어 붙이려면 같아야 하는 값들 (코덱, 해상도, 픽셀 포맷, 타임베이스, 프레임레이트, 오디오 형식,
+    그리고 H.264 profile/level/extradata(SPS/PPS) 해시 — 인코더 설정이 다르면 이어 붙인 뒤 재생이 깨짐).
+    """
+    video, audio = info["video"], info["audio"]
+    if video is None:
+        return None
+    return (
+        video["codec_name"], video["width"], video["height"], video["pix_fmt"],
+        video["time_base"], video["r_frame_rate"],
+        audio["codec_name"] if audio else None,
+        audio["sample_rate"] if audio else None,
+        audio["channels"] if audio else None,
+        video.get("profile"), video.get("level"), video.get("extradata_hash"),
+    )
+
+
+def find_clips(short_dir, start_date, end_date):
+    """수정 날짜가 start_date ~ end_date(포함) 인 영상들."""
+    clips = []
+    for f in os.listdir(short_dir):
+        if not f.lower().endswith(VIDEO_EXTENSIONS) or MERGED_NAME.match(f):
+            continue
+        filepath = os.path.join(short_dir, f)
+        mtime = datetime.date.fromtimestamp(os.path.getmtime(filepath))
+        if start_date <= mtime <= end_date:
+            clips.append(filepath)
+    return clips
+
+
+def order_clips(clips, order="mtime", explicit=None):
+    """
+    order: 'mtime'(수정 시각, 기존 동작), 'name'(파일 이름).
+    explicit 이 주어지면 그 순서를 우선하고, 목록에 없는 나머지는 수정 시각 순으로 뒤에 붙입니다.
+    """
+    if order == "name":
+        clips = sorted(clips, key=lambda x: os.path.basename(x))
+    else:
+        clips = sorted(clips, key=lambda x: os.path.getmtime(x))
+    if not explicit:
+        return clips
+    by_name = {os.path.basename(c): c for c in clips}
+    head = []
+    for name in explicit:
+        path = by_name.pop(os.path.basename(name), None)
+        if path is None and os.path.exists(name):
+            path = name  # 날짜 범위 밖이어도 직접 지정한 파일은 포함
+        if path is None:
+            print(f"Warning: {name} not found, skipping.")
+            continue
+        head.append(path)
+    return head + [c for c in clips if os.path.basename(c) in by_name]
+
+
+def encoder_profile_args(codec, profile, level):
+    """ffprobe 의 profile/level 을 libx264/libx265 옵션으로 (예: 'High', 31 -> -profile:v high -level 3.1)."""
+    args = []
+    if profile and profile != "unknown":
+        args += ["-profile:v", profile.lower().replace("constrained ", "")]
+    if codec == "h264" and level not in (None, "", -99):
+        args += ["-level", f"{int(level) / 10:g}"]
+    return args
+
+
+def normalize_clip(path, target, out_path):
+    """
+    기준 형식(target 시그니처)과 다른 클립만 같은 코덱/해상도/타임베이스/profile/level 로 다시 인코딩합니다.
+    extradata(SPS/PPS)는 인코더 설정 전체에 달려 있어서 항상 같게 만들 수는 없습니다 (merge_clips 가 확인).
+    """
+    codec, width, height, pix_fmt, time_base, frame_rate, a_codec, sample_rate, channels, profile, level = target[:11]
+    info = probe_streams(path)
+    timescale = time_base.split("/")[1]
+    # 비율 유지 + 레터박스로 기준 해상도에 맞춤
+    vf = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+          f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={frame_rate}")
+
+    cmd = [FFMPEG, "-y", "-hide_banner", "-loglevel", "error", "-i", path]
+    if info["audio"] is None and a_codec:
+        # 오디오가 없는 클립은 무음 트랙을 붙여 스트림 구성을 맞춤
+        layout = "mono" if str(channels) == "1" else "stereo"
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={sample_rate}:cl={layout}", "-shortest"]
+        cmd += ["-map", "0:v:0", "-map", "1:a:0"]
+    else:
+        cmd += ["-map", "0:v:0"] + (["-map", "0:a:0"] if a_codec else [])
+    cmd += [
+        "-vf", vf,
+        "-c:v", VIDEO_ENCODERS.get(codec, "libx264"), "-preset", VIDEO_PRESET, "-crf", str(VIDEO_CRF),
+        "-pix_fmt", pix_fmt, "-video_track_timescale", timescale,
+    ] + encoder_profile_args(codec, profile, level)
+    if a_codec:
+        cmd += ["-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ar", str(sample_rate), "-ac", str(channels)]
+    cmd.append(out_path)
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def normalize_clips(paths, target, work_dir, workers=NORMALIZE_WORKERS, start=0):
+    normalized = {}
+    if not paths:
+        return normalized
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            path: pool.submit(normalize_clip, path, target, os.path.join(work_dir, f"norm_{start + i}.mp4"))
+            for i, path in enumerate(paths)
+        }
+        for path, future in futures.items():
+            normalized[path] = future.result()
+            print(f" - normalized {os.path.basename(path)}")
+    return normalized
+
+
+def merge_clips(clips, output_path, workers=NORMALIZE_WORKERS):
+    """
+    가장 많은 클립이 쓰는 형식을 기준으로 삼아, 형식이 같은 클립은 그대로 두고 다른 클립만 병렬로 정규화한 뒤
+    concat demuxer 의 스트림 복사(-c copy)로 합칩니다. 모두 같으면 재인코딩이 전혀 없습니다.
+    """
+    infos = {path: probe_streams(path) for path in clips}
+    signatures = {path: clip_signature(info) for path, info in infos.items()}
+    usable = [s for s in signatures.values() if s is not None]
+    if not usable:
+        raise ValueError("No clip has a video stream")
+    target = Counter(usable).most_common(1)[0][0]
+    if target[0] not in VIDEO_ENCODERS or (target[6] not in (None, "aac")):
+        # 다시 만들 수 없는 코덱이 기준이면 h264/aac 로 통일
+        # (원래 코덱의 profile/level/extradata 는 의미가 없으므로 비움)
+        video = target[:6] + target[9:] if target[0] in VIDEO_ENCODERS else ("h264",) + target[1:6] + (None, None, None)
+        audio = ("aac",) + target[7:9] if target[6] else target[6:9]
+        target = video[:6] + audio + video[6:]
+
+    mismatched = [path for path in clips if signatures[path] != target]
+    print(f"{len(clips) - len(mismatched)} clip(s) match {target[0]} {target[1]}x{target[2]}; "
+          f"{len(mismatched)} need normalizing.")
+
+    work_dir = tempfile.mkdtemp(prefix="merge_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        normalized = normalize_clips(mismatched, target, work_dir, workers)
+        if normalized and len(normalized) < len(clips):
+            # 다시 인코딩한 클립이 기준 클립의 SPS/PPS 와 같으면 나머지는 그대로 스트림 복사.
+            # 기준 클립을 만든 인코더 설정을 재현할 수 없을 때만 (extradata 가 다름) 전체를 다시 인코딩
+            reference = clip_signature(probe_streams(next(iter(normalized.values()))))
+            if reference != target:
+                rest = [path for path in clips if path not in normalized]
+                print(f"Normalized clips cannot match the target's SPS/PPS (profile/level/extradata "
+                      f"{target[9:]} vs {reference[9:]}); re-encoding the other {len(rest)} clip(s) too.")
+                normalized.update(normalize_clips(rest, target, work_dir, workers, start=len(normalized)))
+
+        list_path = os.path.join(work_dir, "clips.txt")
+        write_concat_list(list_path, [normalized.get(path, path) for path in clips])
+        tmp_output = os.path.join(work_dir, os.path.basename(output_path))
+        subprocess.run([
+            FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-movflags", "+faststart",
+            tmp_output
+        ], check=True)
+        os.replace(tmp_output, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_path
+
+
+def merge_shorts(start_date=None, end_date=None, order="mtime", explicit=None, short_dir=None):
+    short_dir = short_dir or os.path.join(os.getcwd(), SHORT_DIR)
     if not os.path.exists(short_dir):
         print(f"Directory not found: {short_dir}")
-        return
+        return None
 
-    today = datetime.date.today()
-    todays_files = []
+    start_date = start_date or datetime.date.today()
+    end_date = end_date or start_date
+    label = start_date.strftime('%Y_%m_%d')
+    if end_date != start_date:
+        label += f"-{end_date.strftime('%Y_%m_%d')}"
 
-    print(f"Scanning for videos in {short_dir} modified on {today}...")
+    print(f"Scanning for videos in {short_dir} modified {start_date} ~ {end_date}...")
+    clips = order_clips(find_clips(short_dir, start_date, end_date), order, explicit)
+    if not clips:
+        print("No video files found in that date range.")
+        return None
 
-    # Find files
-    for f in os.listdir(short_dir):
-        if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
-            filepath = os.path.join(short_dir, f)
-            mtime = datetime.date.fromtimestamp(os.path.getmtime(filepath))
-            
-            if mtime == today:
-                todays_files.append(filepath)
-
-    if not todays_files:
-        print("No video files found modified today.")
-        return
-
-    # Sort by modification time to maintain order
-    todays_files.sort(key=lambda x: os.path.getmtime(x))
-    print(f"Found {len(todays_files)} videos to merge:")
-    for tf in todays_files:
+    print(f"Found {len(clips)} videos to merge:")
+    for tf in clips:
         print(f" - {os.path.basename(tf)}")
 
-    # Load clips
-    clips = []
+    output_path = os.path.join(short_dir, f"{label}.mp4")
     try:
-        for tf in todays_files:
-            clip = VideoFileClip(tf)
-            clips.append(clip)
-            
-        if clips:
-            final_clip = concatenate_videoclips(clips)
-            
-            output_filename = f"{today.strftime('%Y_%m_%d')}.mp4"
-            output_path = os.path.join(short_dir, output_filename)
-            
-            print(f"Merging into {output_path}...")
-            final_clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
-            print(f"Successfully created: {output_path}")
-            
+        print(f"Merging into {output_path}...")
+        merge_clips(clips, output_path)
+        print(f"Successfully created: {output_path}")
+        return output_path
     except Exception as e:
         print(f"An error occurred during merging: {e}")
-    finally:
-        # Close clips to release resources
-        for clip in clips:
-            try:
-                clip.close()
-            except:
-                pass
+        return None
+
+
+def merge_todays_shorts():
+    return merge_shorts()
+
 
 if __name__ == "__main__":
-    merge_todays_shorts()
+    import argparse
+
+    def parse_date(value):
+        return datetime.date.fromisoformat(value)
+
+    parser = argparse.ArgumentParser(description="Merge shorts in short/ with stream-copy concat.")
+    parser.add_argument("--from", dest="start", type=parse_date, help="First modification date (YYYY-MM-DD), default today")
+    parser.add_argument("--to", dest="end", type=parse_date, help="Last modification date (YYYY-MM-DD), default --from")
+    parser.add_argument("--order", choices=["mtime", "name"], default="mtime")
+    parser.add_argument("--list", help="Text file with clip file names in the desired order (one per line)")
+    parser.add_argument("clips", nargs="*", help="Explicit clip order (file names in short/ or paths)")
+    args = parser.parse_args()
+
+    explicit = list(args.clips)
+    if args.list:
+        with open(args.list, 'r', encoding='utf-8') as f:
+            explicit += [line.strip() for line in f if line.strip()]
+    merge_shorts(args.start, args.end, args.order, explicit or None)
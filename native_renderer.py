@@ -0,0 +1,289 @@
+import io
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+from search_index import shard_of
+
+# Configuration
+FRAME_WIDTH = 1920
+FRAME_HEIGHT = 1080
+IMAGES_DIR = "images"
+FALLBACK_IMAGE_DIR = os.path.join(IMAGES_DIR, "genesis")
+FALLBACK_IMAGE_COUNT = 50
+
+# index.html 의 리더 화면(lg 레이아웃, 기본 글자 크기 18px)을 그대로 옮긴 치수
+HEADER_HEIGHT = 56          # h-[3.5rem]
+FONT_SIZE = 18              # state.fontSize
+LINE_HEIGHT = 36            # leading-loose (2.0)
+VERSE_PADDING = 8           # p-2
+VERSE_SPACING = 16          # space-y-4
+NUMBER_WIDTH = 20           # min-w-[20px]
+NUMBER_GAP = 12             # gap-3
+COLUMN_MAX_WIDTH = 672      # max-w-2xl
+COLUMN_PADDING_X = 40       # md:px-10
+COLUMN_PADDING_Y = 48       # md:py-12
+COLUMN_TAIL = 240           # 이전/다음 버튼 + 푸터 높이 (스크롤 한계 계산용)
+
+# 색상 (Tailwind)
+PAGE_BG = (250, 247, 242)       # bg-[#faf7f2]
+HEADER_BG = (255, 255, 255)
+HEADER_BORDER = (231, 229, 228)
+IMAGE_PANEL_BG = (231, 229, 228)  # bg-stone-200
+TEXT_COLOR = (41, 37, 36)       # text-stone-800
+HIGHLIGHT_BG = (254, 240, 138)  # .verse-highlight #fef08a
+
+# 폰트 후보 (index.html 은 Noto Serif KR / Noto Sans KR 사용)
+SERIF_FONTS = [
+    "NotoSerifKR-Regular.otf", "NotoSerifCJK-Regular.ttc", "NotoSerif-Regular.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
+    "/System/Library/Fonts/Supplemental/Times New Roman.ttf",
+]
+SERIF_BOLD_FONTS = [
+    "NotoSerifKR-Bold.otf", "NotoSerifCJK-Bold.ttc", "NotoSerif-Bold.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSerifCJK-Bold.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf",
+    "/System/Library/Fonts/Supplemental/Times New Roman Bold.ttf",
+]
+SANS_BOLD_FONTS = [
+    "NotoSansKR-Bold.otf", "NotoSansCJK-Bold.ttc", "NotoSans-Bold.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+]
+SANS_FONTS = [
+    "NotoSansKR-Regular.otf", "NotoSansCJK-Regular.ttc", "NotoSans-Regular.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+]
+
+
+@lru_cache(maxsize=None)
+def load_font(candidates, size):
+    for path in candidates:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def blend(fg, bg, alpha):
+    # Tailwind opacity 클래스(opacity-40 등)를 배경색과 섞은 단색으로 근사
+    return tuple(int(round(f * alpha + b * (1 - alpha))) for f, b in zip(fg, bg))
+
+
+def chapter_image_path(book_abbrev, book_name, chapter_num):
+    """
+    index.html 의 tryUpdateImage 와 같은 규칙: 책 전용 장 이미지가 있으면 사용하고,
+    없으면 images/genesis/ch1~50 중 하나를 사용합니다. 번호는 "<약어>_<장>" 의 FNV-1a 해시로 정하며
+    index.html 도 같은 해시(shardOf)를 쓰므로 브라우저/네이티브 렌더러가 같은 배경을 고릅니다.
+    """
+    folder = book_name.lower().replace(" ", "_")
+    path = os.path.join(IMAGES_DIR, folder, f"ch{chapter_num}.png")
+    if os.path.exists(path):
+        return path
+    number = shard_of(f"{book_abbrev}_{chapter_num}", FALLBACK_IMAGE_COUNT) + 1
+    return os.path.join(FALLBACK_IMAGE_DIR, f"ch{number}.png")
+
+
+@lru_cache(maxsize=16)
+def image_panel_base(image_path, panel_w, panel_h):
+    """
+    좌측 이미지 패널의 글자 없는 바탕 (object-cover 이미지 + 그라데이션).
+    같은 장 이미지를 쓰는 여러 버전(매트릭스 모드)이 디코딩/리사이즈를 한 번만 하도록 캐시합니다.
+    """
+    panel = Image.new("RGB", (panel_w, panel_h), IMAGE_PANEL_BG)
+
+    if image_path and os.path.exists(image_path):
+        with Image.open(image_path) as src:
+            src = src.convert("RGB")
+            # object-cover: 비율 유지하며 꽉 채우고 가운데 기준으로 잘라냄
+            scale = max(panel_w / src.width, panel_h / src.height)
+            resized = src.resize((int(src.width * scale + 0.5), int(src.height * scale + 0.5)), Image.LANCZOS)
+            left = (resized.width - panel_w) // 2
+            top = (resized.height - panel_h) // 2
+            cover = resized.crop((left, top, left + panel_w, top + panel_h))
+        panel = Image.blend(panel, cover, 0.9)  # opacity-90
+
+    # bg-gradient-to-t from-black/60 to-transparent
+    gradient = Image.linear_gradient("L").resize((panel_w, panel_h))
+    alpha = gradient.point(lambda v: int(v * 0.6))
+    panel.paste(Image.new("RGB", (panel_w, panel_h), (0, 0, 0)), (0, 0), alpha)
+    return panel
+
+
+class NativeFrameRenderer:
+    """
+    브라우저 없이 Pillow 로 리더 화면 프레임을 그립니다.
+
+    begin_chapter() 에서 챕터마다 한 번만 정적 레이어(헤더 + 좌측 이미지 패널)와
+    본문 컬럼(일반/하이라이트 두 벌)을 만들어 두고, render_frame() 은 스크롤 위치에 맞춰
+    컬럼을 잘라 붙인 뒤 현재 절의 하이라이트 영역만 덮어씁니다.
+    """
+
+    def __init__(self, width=FRAME_WIDTH, height=FRAME_HEIGHT, font_size=FONT_SIZE):
+        self.width = width
+        self.height = height
+        self.font_size = font_size
+        self.text_font = load_font(tuple(SERIF_FONTS), font_size)
+        self.number_font = load_font(tuple(SANS_BOLD_FONTS), 12)
+        self._word_widths = {}
+        self._background = None
+        self._column_plain = None
+        self._column_highlight = None
+        self._verse_boxes = []
+
+        self.pane_x = width // 2
+        self.pane_width = width - self.pane_x
+        self.pane_height = height - HEADER_HEIGHT
+        column_width = min(COLUMN_MAX_WIDTH, self.pane_width)
+        self.column_x = self.pane_x + (self.pane_width - column_width) // 2
+        self.column_width = column_width
+        self.text_width = column_width - 2 * COLUMN_PADDING_X - 2 * VERSE_PADDING - NUMBER_WIDTH - NUMBER_GAP
+
+    # ----- 텍스트 줄바꿈 (단어 폭 캐시) -----
+
+    def _measure(self, word):
+        width = self._word_widths.get(word)
+        if width is None:
+            width = self.text_font.getlength(word)
+            self._word_widths[word] = width
+        return width
+
+    def wrap_text(self, text):
+        lines = []
+        current = ""
+        space = self._measure(" ")
+        current_width = 0.0
+        for word in text.split(" "):
+            word_width = self._measure(word)
+            # 공백이 없는 언어(중국어 등)나 아주 긴 단어는 글자 단위로 자름
+            if word_width > self.text_width:
+                for ch in word:
+                    ch_width = self._measure(ch)
+                    if current and current_width + ch_width > self.text_width:
+                        lines.append(current)
+                        current, current_width = "", 0.0
+                    current += ch
+                    current_width += ch_width
+                continue
+            extra = word_width + (space if current else 0)
+            if current and current_width + extra > self.text_width:
+                lines.append(current)
+                current, current_width = word, word_width
+            else:
+                current = f"{current} {word}" if current else word
+                current_width += extra
+        if current:
+            lines.append(current)
+        return lines or [""]
+
+    # ----- 챕터 단위 정적 레이어 -----
+
+    def _draw_header(self, frame, book_name, chapter_num):
+        draw = ImageDraw.Draw(frame)
+        draw.rectangle([0, 0, self.width, HEADER_HEIGHT - 1], fill=HEADER_BG)
+        draw.line([0, HEADER_HEIGHT - 1, self.width, HEADER_HEIGHT - 1], fill=HEADER_BORDER)
+
+        # 뒤로가기 화살표
+        draw.line([(22, 28), (16, 22)], fill=TEXT_COLOR, width=2)
+        draw.line([(16, 22), (22, 16)], fill=TEXT_COLOR, width=2)
+
+        title_font = load_font(tuple(SERIF_BOLD_FONTS), 18)
+        sub_font = load_font(tuple(SANS_FONTS), 12)
+        draw.text((44, 8), book_name, font=title_font, fill=TEXT_COLOR)
+        draw.text((44, 32), f"Chapter {chapter_num}", font=sub_font, fill=blend(TEXT_COLOR, HEADER_BG, 0.6))
+
+        # 우측 컨트롤 (A- / A+)
+        pill = [self.width - 136, 10, self.width - 16, 46]
+        draw.rounded_rectangle(pill, radius=18, fill=blend((0, 0, 0), HEADER_BG, 0.05))
+        control_font = load_font(tuple(SERIF_FONTS), 14)
+        draw.text((pill[0] + 50, 19), "A-", font=control_font, fill=TEXT_COLOR)
+        draw.text((pill[0] + 84, 17), "A+", font=load_font(tuple(SERIF_BOLD_FONTS), 18), fill=TEXT_COLOR)
+
+    def _draw_image_panel(self, frame, image_path, book_name, chapter_num):
+        panel_w, panel_h = self.pane_x, self.pane_height
+        # 이미지 + 그라데이션은 버전과 무관하므로 캐시된 것을 복사해서 제목만 다시 그림
+        panel = image_panel_base(image_path, panel_w, panel_h).copy()
+
+        draw = ImageDraw.Draw(panel)
+        title_font = load_font(tuple(SERIF_BOLD_FONTS), 30)
+        sub_font = load_font(tuple(SANS_FONTS), 14)
+        sub_y = panel_h - 32 - 20
+        title_y = sub_y - 8 - 40
+        draw.text((32, title_y), f"{book_name} {chapter_num}", font=title_font, fill=(255, 255, 255))
+        draw.text((32, sub_y), "Meditation and Reading", font=sub_font, fill=(204, 204, 204))
+
+        frame.paste(panel, (0, HEADER_HEIGHT))
+
+    def _render_column(self, wrapped, highlight):
+        total_height = self._verse_boxes[-1][1] + COLUMN_TAIL if self._verse_boxes else self.pane_height
+        column = Image.new("RGB", (self.column_width, max(total_height, self.pane_height)), PAGE_BG)
+        draw = ImageDraw.Draw(column)
+        number_color = blend(TEXT_COLOR, HIGHLIGHT_BG if highlight else PAGE_BG, 0.4)
+        ascent, descent = self.text_font.getmetrics()
+        text_offset = (LINE_HEIGHT - (ascent + descent)) // 2
+
+        item_x = COLUMN_PADDING_X
+        item_w = self.column_width - 2 * COLUMN_PADDING_X
+        for idx, (lines, (top, bottom)) in enumerate(zip(wrapped, self._verse_boxes)):
+            if highlight:
+                draw.rounded_rectangle([item_x, top, item_x + item_w, bottom], radius=4, fill=HIGHLIGHT_BG)
+            number = str(idx + 1)
+            number_x = item_x + VERSE_PADDING + NUMBER_WIDTH - self.number_font.getlength(number)
+            draw.text((number_x, top + VERSE_PADDING + 8), number, font=self.number_font, fill=number_color)
+
+            text_x = item_x + VERSE_PADDING + NUMBER_WIDTH + NUMBER_GAP
+            y = top + VERSE_PADDING
+            for line in lines:
+                draw.text((text_x, y + text_offset), line, font=self.text_font, fill=TEXT_COLOR)
+                y += LINE_HEIGHT
+        return column
+
+    def begin_chapter(self, image_path, book_name, chapter_num, verses):
+        frame = Image.new("RGB", (self.width, self.height), PAGE_BG)
+        self._draw_header(frame, book_name, chapter_num)
+        self._draw_image_panel(frame, image_path, book_name, chapter_num)
+        self._background = frame
+
+        wrapped = [self.wrap_text(str(v)) for v in verses]
+        self._verse_boxes = []
+        y = COLUMN_PADDING_Y
+        for lines in wrapped:
+            height = len(lines) * LINE_HEIGHT + 2 * VERSE_PADDING
+            self._verse_boxes.append((y, y + height))
+            y += height + VERSE_SPACING
+
+        self._column_plain = self._render_column(wrapped, highlight=False)
+        self._column_highlight = self._render_column(wrapped, highlight=True)
+
+    # ----- 프레임 -----
+
+    def render_frame(self, verse_idx):
+        """verse_idx 절을 하이라이트하고 화면 가운데로 스크롤한 프레임을 돌려줍니다."""
+        top, bottom = self._verse_boxes[verse_idx]
+        max_scroll = max(0, self._column_plain.height - self.pane_height)
+        # scrollIntoView({block: 'center'})
+        scroll = int(min(max(0, (top + bottom) / 2 - self.pane_height / 2), max_scroll))
+
+        frame = self._background.copy()
+        view = self._column_plain.crop((0, scroll, self.column_width, scroll + self.pane_height))
+        band_top = max(top, scroll)
+        band_bottom = min(bottom + 1, scroll + self.pane_height)
+        if band_bottom > band_top:
+            band = self._column_highlight.crop((0, band_top, self.column_width, band_bottom))
+            view.paste(band, (0, band_top - scroll))
+        frame.paste(view, (self.column_x, HEADER_HEIGHT))
+        return frame
+
+    def frame_bytes(self, verse_idx, fmt="PNG"):
+        # 스트리밍 인코딩용: 디스크를 거치지 않고 메모리 버퍼로 인코딩
+        buffer = io.BytesIO()
+        self.render_frame(verse_idx).save(buffer, fmt, compress_level=1)
+        return buffer.getvalue()
+
+    def save_frame(self, verse_idx, path):
+        self.render_frame(verse_idx).save(path, compress_level=1)
+        return path
@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import unicodedata
+from collections import Counter
+from bible_text import VERSIONS_DIR, BIBLE_NAMES, CANONICAL_ABBREVS, clean_verse_text, list_versions
+from corpus_pack import CorpusPack, load_corpus, write_pack
+
+# Configuration
+PARALLEL_DIR = os.path.join(VERSIONS_DIR, "parallel")
+CANON_FILE = "canon.json"
+COLUMN_EXT = ".col"
+MAX_GROUP = 4          # 정렬에서 한 번에 묶을 수 있는 최대 절 수 (예: 4절 -> 1절 병합)
+GROUP_PENALTY = 0.1    # 1:1 이 아닌 묶음에서 추가로 묶은 절마다 더하는 비용 (장 길이 대비 비율 단위)
+SKIP_PENALTY = 0.05    # 한쪽에만 있는 절의 비용 (GROUP_PENALTY 보다 작아야 빠진 절이 병합으로 잡히지 않음)
+ANCHOR_BONUS = 0.05    # 두 절에 같은 고유명사/숫자가 있을 때 깎아 주는 비용 (쌍마다)
+ANCHOR_MIN_DICE = 0.5  # 고유명사가 같다고 볼 글자 bigram Dice 하한 (Pison/Pisom, Tigris/Tigre)
+WORD_RE = re.compile(r"\w+")
+
+# 병렬 말뭉치 저장 형식 (json/parallel/):
+# - canon.json: 기준 절 구분(버전 다수결로 정한 장별 절 수), 버전 목록, 절 구분이 다른 곳의 정렬 기록
+# - <버전>.col: 기준 절 구분 모양으로 다시 배치한 corpus_pack 팩 (열 하나 = 버전 하나)
+#   기준 절 k 칸에는 그 버전에서 k 에 대응하는 본문이 들어 있음. 여러 기준 절이 한 절로 합쳐진 버전은
+#   첫 칸에 본문을 두고 나머지 칸은 비워 두며, 그 사실은 정렬 기록(kind: merge)에 남김.
+# 같은 절을 N 개 버전에서 꺼낼 때 각 열에서 오프셋 두 개만 읽으므로 전체 파일을 읽지 않습니다.
+
+
+def canonical_versification(corpora):
+    """장마다 가장 많은 버전이 쓰는 절 수 (동률이면 더 많은 쪽). 반환값: [[장별 절 수] x 책]"""
+    canon = []
+    for book_idx in range(len(CANONICAL_ABBREVS)):
+        counts = []
+        chapter_total = max(len(c[book_idx]['chapters']) for c in corpora.values() if book_idx < len(c))
+        for chapter_idx in range(chapter_total):
+            votes = Counter(
+                len(c[book_idx]['chapters'][chapter_idx]) for c in corpora.values()
+                if book_idx < len(c) and chapter_idx < len(c[book_idx]['chapters'])
+            )
+            counts.append(max(votes, key=lambda n: (votes[n], n)))
+        canon.append(counts)
+    return canon
+
+
+def anchor_words(text):
+    """
+    정렬 기준점으로 쓸 단어: 숫자와, 절 첫 단어가 아닌 대문자 단어 (대부분 고유명사). 악센트를 떼고 소문자로.
+    언어가 달라도 인명/지명은 철자가 비슷해서 길이만으로 애매한 빠진 절의 위치를 잡아 줍니다.
+    """
+    words = []
+    for word in WORD_RE.findall(text)[1:]:
+        if word.isdigit() or (len(word) >= 3 and word[0].isupper()):
+            plain = unicodedata.normalize("NFKD", word)
+            plain = "".join(ch for ch in plain if not unicodedata.combining(ch)).lower()
+            words.append(plain if word.isdigit() else {plain[k:k + 2] for k in range(len(plain) - 1)})
+    return words
+
+
+def anchor_matches(words_a, words_b):
+    """words_a 중 words_b 에 짝이 있는 단어 수 (숫자는 완전 일치, 이름은 bigram Dice)."""
+    matches = 0
+    for a in words_a:
+        for b in words_b:
+            if isinstance(a, str) or isinstance(b, str):
+                same = a == b
+            else:
+                same = 2 * len(a & b) >= ANCHOR_MIN_DICE * (len(a) + len(b))
+            if same:
+                matches += 1
+                break
+    return matches
+
+
+def align_chapter(reference, target, ratio=None):
+    """
+    길이 비율 기반 정렬 (Gale-Church 방식): 기준 버전 절들과 대상 버전 절들을 기준 장 길이 대비 비율로 비교해
+    (기준 a절, 대상 b절) 묶음의 목록을 돌려줍니다. 언어가 달라도 상대 길이는 비슷하다는 가정이고,
+    같은 고유명사/숫자(anchor_words)가 있는 묶음은 비용을 깎아 줍니다.
+    ratio 는 대상 버전이 기준 버전보다 평균적으로 몇 배 긴지 (버전 전체에서 추정). 주지 않으면 이 장의 총 길이 비로
+    맞추는데, 대상에 빠진 절이 있으면 대상 절들이 부풀려져 병합처럼 보이므로 build_parallel 은 항상 ratio 를 줍니다.
+    반환값: [(기준 시작, 기준 개수, 대상 시작, 대상 개수), ...]
+    """
+    ref_lengths = [max(1, len(v)) for v in reference]
+    tgt_lengths = [max(1, len(v)) for v in target]
+    total = sum(ref_lengths)
+    if ratio is None:
+        ratio = sum(tgt_lengths) / total if tgt_lengths else 1.0
+    ref = [n / total for n in ref_lengths]
+    tgt = [n / (total * ratio) for n in tgt_lengths]
+    n, m = len(ref), len(tgt)
+    # 대상 절 j 는 기준 절 i 에서 (절 수 차이 + MAX_GROUP) 보다 멀리 떨어질 수 없으므로 그 띠 안만 계산
+    low, high = min(0, m - n) - MAX_GROUP, max(0, m - n) + MAX_GROUP
+    ref_sums, tgt_sums = [0.0], [0.0]
+    for x in ref:
+        ref_sums.append(ref_sums[-1] + x)
+    for x in tgt:
+        tgt_sums.append(tgt_sums[-1] + x)
+    ref_words, tgt_words = [anchor_words(v) for v in reference], [anchor_words(v) for v in target]
+    anchors = [[anchor_matches(ref_words[i], tgt_words[j])
+                if ref_words[i] and tgt_words[j] and low <= j - i <= high else 0
+                for j in range(m)] for i in range(n)]
+    moves = [(1, 1), (1, 0), (0, 1)]
+    moves += [(k, 1) for k in range(2, MAX_GROUP + 1)] + [(1, k) for k in range(2, MAX_GROUP + 1)]
+    inf = float("inf")
+    cost = [[inf] * (m + 1) for _ in range(n + 1)]
+    back = [[None] * (m + 1) for _ in range(n + 1)]
+    cost[0][0] = 0.0
+    for i in range(n + 1):
+        for j in range(max(0, i + low), min(m, i + high) + 1):
+            if cost[i][j] == inf:
+                continue
+            for a, b in moves:
+                if i + a > n or j + b > m:
+                    continue
+                ra, tb = ref_sums[i + a] - ref_sums[i], tgt_sums[j + b] - tgt_sums[j]
+                if a and b:
+                    step = abs(ra - tb) + GROUP_PENALTY * (a + b - 2)
+                    # 묶음 안에서는 짝 하나를 한 번만 셈 (병합이 같은 이름을 여러 번 보상받지 않도록)
+                    if a == 1:
+                        bonus = max(anchors[i][j:j + b])
+                    else:
+                        bonus = max(anchors[i + x][j] for x in range(a))
+                    step -= ANCHOR_BONUS * bonus
+                else:
+                    step = SKIP_PENALTY + ra + tb
+                if cost[i][j] + step < cost[i + a][j + b]:
+                    cost[i + a][j + b] = cost[i][j] + step
+                    back[i + a][j + b] = (a, b)
+    segments, i, j = [], n, m
+    while i or j:
+        a, b = back[i][j]
+        i, j = i - a, j - b
+        segments.append((i, a, j, b))
+    return segments[::-1]
+
+
+def segment_kind(canon_count, version_count):
+    if canon_count == version_count == 1:
+        return None
+    if version_count == 0:
+        return "missing"
+    if canon_count == 0:
+        return "extra"
+    return "merge" if canon_count > version_count else "split"
+
+
+def align_to_canon(source, reference, ratio=None):
+    """
+    대상 버전의 한 장(source)을 기준 절 칸(reference 의 절 수)에 배치합니다. 반환값: (칸 목록, 정렬 묶음 목록).
+    빈 절은 명시적인 빈칸으로 보고 (missing) 정렬에서 제외하며, 기준에 없는 절은 앞 칸에 이어 붙이고
+    장 맨 앞의 것은 첫 칸 앞에 붙입니다. 묶음은 (기준 시작, 기준 개수, 대상 시작, 대상 개수, 종류) 이고
+    대상 인덱스는 원래 source 기준입니다.
+    """
+    slots = [""] * len(reference)
+    if len(source) == len(reference):
+        slots = list(source)
+        return slots, [(i, 1, i, 0, "missing") for i, text in enumerate(source) if not text.strip()]
+
+    kept = [i for i, text in enumerate(source) if text.strip()]
+    segments, prefix = [], ""
+    for c_start, c_count, k_start, k_count in align_chapter(reference, [source[i] for i in kept], ratio):
+        members = kept[k_start:k_start + k_count]
+        text = " ".join(source[i] for i in members)
+        v_start = members[0] if members else (kept[k_start] if k_start < len(kept) else len(source))
+        if c_count:
+            slots[c_start] = text
+        elif c_start:
+            # 기준에 없는 절은 앞 칸에 이어 붙임
+            slots[c_start - 1] = f"{slots[c_start - 1]} {text}".strip()
+        else:
+            prefix = f"{prefix} {text}".strip()
+        kind = segment_kind(c_count, k_count)
+        if kind:
+            segments.append((c_start, c_count, v_start, len(members), kind))
+    if prefix and slots:
+        slots[0] = f"{prefix} {slots[0]}".strip()
+    return slots, segments
+
+
+def length_ratios(corpora, canon, ranked):
+    """버전마다 (가장 기준에 가까운 버전 대비) 평균 본문 길이 비. 두 버전 모두 기준 절 수와 같은 장만 씁니다."""
+    base = corpora[ranked[0]]
+    ratios = {}
+    for version, corpus in corpora.items():
+        own = other = 0
+        for b, counts in enumerate(canon):
+            for ch, count in enumerate(counts):
+                if (b < len(corpus) and ch < len(corpus[b]['chapters']) and b < len(base)
+                        and ch < len(base[b]['chapters'])
+                        and len(corpus[b]['chapters'][ch]) == count == len(base[b]['chapters'][ch])):
+                    own += sum(len(clean_verse_text(str(v))) for v in corpus[b]['chapters'][ch])
+                    other += sum(len(clean_verse_text(str(v))) for v in base[b]['chapters'][ch])
+        ratios[version] = own / other if own and other else 1.0
+    return ratios
+
+
+def build_parallel(versions=None, versions_dir=VERSIONS_DIR, out_dir=PARALLEL_DIR):
+    """
+    json/ 의 모든 버전을 기준 절 구분에 맞춰 열(column) 팩으로 다시 쓰고, 절 구분이 다른 장은
+    길이 비율 정렬로 대응 관계를 찾아 canon.json 의 alignments 에 기록합니다.
+    """
+    versions = versions or list_versions(versions_dir)
+    corpora = {v: load_corpus(os.path.join(versions_dir, f"{v}.json")) for v in versions}
+    canon = canonical_versification(corpora)
+
+    # 장마다 절 수가 기준과 같은 버전 중 기준과 가장 많이 일치하는 버전을 길이 정렬의 기준 본문으로 사용
+    agreement = {v: sum(len(c[b]['chapters'][ch]) == canon[b][ch]
+                        for b in range(len(canon)) for ch in range(len(canon[b]))
+                        if b < len(c) and ch < len(c[b]['chapters']))
+                 for v, c in corpora.items()}
+    ranked = sorted(versions, key=lambda v: -agreement[v])
+    ratios = length_ratios(corpora, canon, ranked)
+
+    os.makedirs(out_dir, exist_ok=True)
+    alignments = []
+    for version in versions:
+        corpus = corpora[version]
+        books = []
+        for book_idx, counts in enumerate(canon):
+            chapters = []
+            for chapter_idx, canon_count in enumerate(counts):
+                source = []
+                if book_idx < len(corpus) and chapter_idx < len(corpus[book_idx]['chapters']):
+                    source = [clean_verse_text(str(v)) for v in corpus[book_idx]['chapters'][chapter_idx]]
+                reference, ratio = source, None
+                if len(source) != canon_count:
+                    reference_version = next(v for v in ranked if chapter_idx < len(corpora[v][book_idx]['chapters'])
+                                             and len(corpora[v][book_idx]['chapters'][chapter_idx]) == canon_count)
+                    reference = [clean_verse_text(str(v))
+                                 for v in corpora[reference_version][book_idx]['chapters'][chapter_idx]]
+                    ratio = ratios[version] / ratios[reference_version]
+                slots, segments = align_to_canon(source, reference, ratio)
+                for c_start, c_count, v_start, v_count, kind in segments:
+                    alignments.append({
+                        "version": version, "book": CANONICAL_ABBREVS[book_idx], "chapter": chapter_idx + 1,
+                        "canonical": [c_start + 1, c_count], "verses": [v_start + 1, v_count], "kind": kind,
+                    })
+                chapters.append(slots)
+            books.append({"abbrev": CANONICAL_ABBREVS[book_idx], "name": BIBLE_NAMES[CANONICAL_ABBREVS[book_idx]],
+                          "chapters": chapters})
+        write_pack(books, os.path.join(out_dir, version + COLUMN_EXT), version=version)
+
+    canon_data = {
+        "versions": versions,
+        "books": [{"abbrev": CANONICAL_ABBREVS[b], "name": BIBLE_NAMES[CANONICAL_ABBREVS[b]], "verses": counts}
+                  for b, counts in enumerate(canon)],
+        "sources": {v: os.stat(os.path.join(versions_dir, f"{v}.json")).st_mtime_ns for v in versions},
+        "alignments": alignments,
+    }
+    tmp_path = os.path.join(out_dir, CANON_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(canon_data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, os.path.join(out_dir, CANON_FILE))
+    return canon_data
+
+
+class ParallelCorpus:
+    """
+    기준 (책, 장, 절) 로 여러 버전의 같은 절을 한 번에 꺼내는 병렬 말뭉치.
+    열 팩은 처음 쓰일 때 mmap 으로 열기 때문에 N 개 버전을 조회해도 각 버전의 전체 파일을 읽지 않습니다.
+    인덱스는 모두 0부터 (corpus_pack 과 같음).
+    """
+
+    def __init__(self, store_dir=PARALLEL_DIR, versions_dir=VERSIONS_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, CANON_FILE), 'r', encoding='utf-8') as f:
+            self.canon = json.load(f)
+        self.versions = self.canon["versions"]
+        for version, mtime_ns in self.canon.get("sources", {}).items():
+            json_path = os.path.join(versions_dir, f"{version}.json")
+            if os.path.exists(json_path) and os.stat(json_path).st_mtime_ns != mtime_ns:
+                print(f"Warning: {json_path} changed since the parallel corpus was built (run parallel_corpus.py --build).")
+        self._columns = {}
+        self._alignments = {}
+        for record in self.canon["alignments"]:
+            key = (record["version"], record["book"], record["chapter"])
+            self._alignments.setdefault(key, []).append(record)
+
+    def column(self, version):
+        if version not in self._columns:
+            if version not in self.versions:
+                raise KeyError(f"{version} is not in the parallel corpus ({', '.join(self.versions)})")
+            self._columns[version] = CorpusPack(os.path.join(self.store_dir, version + COLUMN_EXT))
+        return self._columns[version]
+
+    def verse_count(self, book_idx, chapter_idx):
+        return self.canon["books"][book_idx]["verses"][chapter_idx]
+
+    def verse(self, book_idx, chapter_idx, verse_idx, versions=None):
+        """{버전: 본문}. 다른 절에 합쳐진 칸은 빈 문자열입니다 (alignments() 로 확인)."""
+        return {v: self.column(v).verse(book_idx, chapter_idx, verse_idx) for v in versions or self.versions}
+
+    def chapter(self, book_idx, chapter_idx, versions=None):
+        """기준 절 순서의 행 목록: [{버전: 본문}, ...]"""
+        versions = versions or self.versions
+        columns = {v: self.column(v).chapter(book_idx, chapter_idx) for v in versions}
+        return [{v: columns[v][i] for v in versions} for i in range(self.verse_count(book_idx, chapter_idx))]
+
+    def alignments(self, book_idx, chapter_idx, version=None):
+        """이 장에서 기준과 절 구분이 다른 곳의 정렬 기록."""
+        abbrev = CANONICAL_ABBREVS[book_idx]
+        versions = [version] if version else self.versions
+        return [r for v in versions for r in self._alignments.get((v, abbrev, chapter_idx + 1), [])]
+
+    def close(self):
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+
+def check_alignment(store_dir=PARALLEL_DIR):
+    """
+    정렬 회귀 검사 (--check): 빠진 절이 병합으로 잡히거나 뒤 절 본문이 앞 칸으로 밀리지 않는지,
+    장 맨 앞의 추가 절이 버려지지 않는지 확인합니다. 병렬 말뭉치가 만들어져 있으면 fi_pr 창세기 2장
+    (2:16-18 이 없는 장) 도 확인합니다. 실패하면 AssertionError.
+    """
+    reference = ["In the beginning the garden was in Eden.", "The first river is Pison and it flows around.",
+                 "The gold of that land is good and there is bdellium.", "The second river is Gihon, around Cush.",
+                 "The third river is Tigris, going east of Assyria."]
+
+    slots, segments = align_to_canon(reference[:2] + reference[3:], reference, ratio=1.0)
+    assert slots == reference[:2] + [""] + reference[3:], slots
+    assert [kind for *_, kind in segments] == ["missing"] and segments[0][0] == 2, segments
+
+    slots, segments = align_to_canon(reference[:1] + [""] + reference[2:], reference, ratio=1.0)
+    assert slots[1] == "" and segments == [(1, 1, 1, 0, "missing")], segments
+
+    slots, segments = align_to_canon(["A Psalm of David."] + reference, reference, ratio=1.0)
+    assert slots[0] == f"A Psalm of David. {reference[0]}" and slots[1:] == reference[1:], slots
+    assert [kind for *_, kind in segments] == ["extra"], segments
+
+    if os.path.exists(os.path.join(store_dir, CANON_FILE)):
+        corpus = ParallelCorpus(store_dir)
+        if "fi_pr" in corpus.versions:
+            gaps = [i + 1 for i, row in enumerate(corpus.chapter(0, 1, ["fi_pr"])) if not row["fi_pr"]]
+            assert gaps == [16, 17, 18], f"fi_pr Genesis 2 gaps {gaps} (expected 16-18)"
+            kinds = {r["kind"] for r in corpus.alignments(0, 1, "fi_pr")}
+            assert kinds == {"missing"}, kinds
+        corpus.close()
+    print("Alignment checks passed.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the verse-aligned parallel corpus (json/parallel/).")
+    parser.add_argument("--build", action="store_true", help="Rebuild canon.json and the per-version columns")
+    parser.add_argument("reference", nargs="*", help="Book abbrev, chapter and verse (1-based), e.g. ps 23 1")
+    parser.add_argument("--versions", help="Comma-separated versions (default: all)")
+    parser.add_argument("--check", action="store_true", help="Run the alignment regression checks")
+    args = parser.parse_args()
+
+    if args.build:
+        data = build_parallel()
+        kinds = Counter(r["kind"] for r in data["alignments"])
+        print(f"Parallel corpus: {len(data['versions'])} versions, "
+              f"{sum(sum(b['verses']) for b in data['books'])} canonical verses, alignment records {dict(kinds)}")
+    if args.check:
+        check_alignment()
+    if args.reference:
+        abbrev, chapter, verse = args.reference[0], int(args.reference[1]), int(args.reference[2])
+        corpus = ParallelCorpus()
+        book_idx = CANONICAL_ABBREVS.index(abbrev)
+        versions = args.versions.split(",") if args.versions else None
+        for version, text in corpus.verse(book_idx, chapter - 1, verse - 1, versions).items():
+            print(f"{version:>14}  {text}")
+        for record in corpus.alignments(book_idx, chapter - 1):
+            print(f"  alignment: {record}")
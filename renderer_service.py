@@ -0,0 +1,151 @@
+import queue
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+from asset_router import AssetRouter, LOCAL_ORIGIN
+
+# Configuration
+BASE_URL = LOCAL_ORIGIN  # 기본은 외부 서버 없이 프로세스 내부에서 자산 제공 (server.sh 불필요)
+VIEWPORT = {'width': 1920, 'height': 1080}
+PAGE_POOL_SIZE = 2
+WARMUP_TIMEOUT_MS = 60000
+# 캡처용 페이지에서는 하이라이트 색 전환 애니메이션을 끔 (최종 화면은 동일, 절마다 0.3초 절약)
+CAPTURE_CSS = ".verse-item, .verse-highlight { transition: none !important; }"
+
+
+class RendererService:
+    """
+    Chromium 하나를 계속 띄워두고, index.html 이 로드된(bibleData 준비 완료) 리더 페이지를
+    풀로 관리합니다. 챕터마다 브라우저를 새로 띄우고 4MB JSON 을 다시 받는 비용을 없애기 위함입니다.
+
+    base_url 이 LOCAL_ORIGIN 이면 AssetRouter 가 index.html / json / images 요청을 메모리에서 응답하므로
+    별도 HTTP 서버가 필요 없습니다. 다른 주소를 주면 기존처럼 그 서버에서 받아옵니다.
+
+    Playwright sync API 는 스레드에 묶이므로, 서비스를 만든 스레드(프로세스)에서만 사용하세요.
+    """
+
+    def __init__(self, base_url=BASE_URL, pool_size=PAGE_POOL_SIZE, headless=True):
+        self.base_url = base_url
+        self.pool_size = max(1, pool_size)
+        self.headless = headless
+        self.router = AssetRouter() if base_url.rstrip('/') == LOCAL_ORIGIN else None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle = queue.Queue()
+        self._crashed = set()
+        self.pages_created = 0
+        self.pages_recycled = 0
+
+    def start(self):
+        if self._browser is not None:
+            return self
+        self._playwright = sync_playwright().start()
+        self._launch_browser()
+        for _ in range(self.pool_size):
+            self._idle.put(self._new_warm_page())
+        print(f"Renderer ready: {self.pool_size} warm page(s) at {self.base_url}")
+        return self
+
+    def close(self):
+        while not self._idle.empty():
+            try:
+                self._idle.get_nowait().close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _launch_browser(self):
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        # 모든 페이지가 같은 컨텍스트(= 같은 라우팅/메모리 캐시)를 공유
+        self._context = self._browser.new_context(viewport=VIEWPORT)
+        if self.router is not None:
+            self.router.attach(self._context)
+
+    def _new_warm_page(self):
+        # 브라우저 자체가 죽었으면 다시 띄움
+        if self._browser is None or not self._browser.is_connected():
+            print("Browser disconnected. Relaunching Chromium...")
+            self._launch_browser()
+
+        page = self._context.new_page()
+        page.on("crash", lambda p: self._crashed.add(id(p)))
+        page.goto(self.base_url)
+        # index.html 의 준비 신호(data-app-ready) + 전체 성경 데이터(66권) 로드까지 대기
+        page.wait_for_function(
+            "() => document.body.dataset.appReady === '1'"
+            " && window.state && window.state.bibleData && window.state.bibleData.length >= 66",
+            timeout=WARMUP_TIMEOUT_MS
+        )
+        page.add_style_tag(content=CAPTURE_CSS)
+        self.pages_created += 1
+        return page
+
+    def _is_healthy(self, page):
+        if id(page) in self._crashed or page.is_closed():
+            return False
+        try:
+            return bool(page.evaluate("() => !!(window.state && window.state.bibleData)"))
+        except Exception:
+            return False
+
+    def _recycle(self, page):
+        self._crashed.discard(id(page))
+        try:
+            page.close()
+        except Exception:
+            pass
+        self.pages_recycled += 1
+        print("Recycling broken renderer page...")
+        return self._new_warm_page()
+
+    def acquire(self):
+        if self._browser is None:
+            self.start()
+        try:
+            page = self._idle.get_nowait()
+        except queue.Empty:
+            page = self._new_warm_page()
+        if not self._is_healthy(page):
+            page = self._recycle(page)
+        return page
+
+    def release(self, page, broken=False):
+        if broken or not self._is_healthy(page):
+            page = self._recycle(page)
+        if self._idle.qsize() < self.pool_size:
+            self._idle.put(page)
+        else:
+            page.close()
+
+    @contextmanager
+    def page(self):
+        """
+        with renderer.page() as page: ... 형태로 사용합니다.
+        작업 중 예외가 나면 해당 페이지만 폐기하고 새 페이지로 교체합니다(전체 실행은 유지).
+        """
+        page = self.acquire()
+        broken = False
+        try:
+            yield page
+        except Exception:
+            broken = True
+            raise
+        finally:
+            try:
+                self.release(page, broken=broken)
+            except Exception as e:
+                print(f"Failed to return page to pool: {e}")
@@ -0,0 +1,313 @@
+import os
+import re
+import json
+import math
+import time
+import bisect
+import hashlib
+import unicodedata
+from collections import defaultdict
+from bible_text import VERSIONS_DIR, clean_verse_text, list_versions
+from corpus_pack import load_corpus
+
+# Configuration
+INDEX_DIR_NAME = "search"    # json/<버전>/search/ (corpus_build.py 의 샤드 옆)
+INDEX_FORMAT = 1             # 형식을 바꾸면 올림 (index.html 이 확인)
+SHARD_COUNT = 64             # 용어 해시로 나눈 포스팅 샤드 수 (웹 앱은 검색어가 걸린 샤드만 받음)
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_LIMIT = 20
+
+# 띄어쓰기가 없는 한자(중국어 등)는 글자 단위 + 두 글자(bigram) 단위로 색인
+CJK_RANGES = ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x2FA1F))
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+# 색인 형식 (index.html 의 검색 코드와 같은 규칙을 써야 함):
+# - 정규화: NFKD 후 결합 부호 제거 + 소문자 (é -> e, ä -> a)
+# - 토큰: 문자/숫자가 이어진 구간. 한자 구간은 글자마다 위치 하나씩, 각 위치에 한 글자와 다음 글자까지의 두 글자 토큰
+# - meta.json: 절 수, 절마다 토큰 수(BM25 길이 보정), 책/장 시작 절 번호
+# - NN.json: {용어: [문서 빈도, 절 번호 차이, 빈도, 위치, 위치 차이..., 절 번호 차이, ...]}
+#   용어가 들어갈 샤드는 UTF-16 코드 단위 기준 FNV-1a 해시 % SHARD_COUNT
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn").lower()
+
+
+def is_cjk(ch):
+    code = ord(ch)
+    return any(lo <= code <= hi for lo, hi in CJK_RANGES)
+
+
+def is_word_char(ch):
+    return unicodedata.category(ch)[0] in "LN"
+
+
+def word_runs(text):
+    """정규화된 텍스트의 (구간, 한자 여부) 목록. 한자와 다른 문자는 서로 다른 구간으로 나눕니다."""
+    runs, current, current_cjk = [], "", False
+    for ch in normalize(text):
+        if not is_word_char(ch):
+            if current:
+                runs.append((current, current_cjk))
+            current = ""
+            continue
+        cjk = is_cjk(ch)
+        if current and cjk != current_cjk:
+            runs.append((current, current_cjk))
+            current = ""
+        current += ch
+        current_cjk = cjk
+    if current:
+        runs.append((current, current_cjk))
+    return runs
+
+
+def tokenize(text):
+    """색인용 (용어, 위치) 목록과 위치 수."""
+    tokens, position = [], 0
+    for run, cjk in word_runs(text):
+        if not cjk:
+            tokens.append((run, position))
+            position += 1
+            continue
+        for i, ch in enumerate(run):
+            tokens.append((ch, position + i))
+            if i + 1 < len(run):
+                tokens.append((run[i:i + 2], position + i))
+        position += len(run)
+    return tokens, position
+
+
+def query_clauses(query):
+    """
+    검색어 -> 절(clause) 목록. 각 절은 [(용어, 상대 위치), ...] 이고 모든 절이 한 절(verse)에 있어야 맞습니다.
+    "따옴표" 안은 구절 검색, 따옴표 밖의 단어는 각각 따로, 한자 구간은 두 글자 토큰을 이은 구절로 봅니다.
+    """
+    clauses = []
+    phrases = PHRASE_PATTERN.findall(query)
+    loose = PHRASE_PATTERN.sub(" ", query)
+    for text, is_phrase in [(p, True) for p in phrases] + [(loose, False)]:
+        phrase, position = [], 0
+        for run, cjk in word_runs(text):
+            if cjk:
+                terms = [(run, 0)] if len(run) == 1 else [(run[i:i + 2], i) for i in range(len(run) - 1)]
+            else:
+                terms = [(run, 0)]
+            if is_phrase:
+                phrase += [(term, position + offset) for term, offset in terms]
+            else:
+                clauses.append(terms)
+            position += len(run) if cjk else 1
+        if phrase:
+            clauses.append(phrase)
+    return clauses
+
+
+def shard_of(term, shard_count=SHARD_COUNT):
+    # FNV-1a (UTF-16 코드 단위) — index.html 의 shardOf 와 같은 값
+    data = term.encode('utf-16-le')
+    h = 2166136261
+    for i in range(0, len(data), 2):
+        h ^= data[i] | (data[i + 1] << 8)
+        h = (h * 16777619) & 0xFFFFFFFF
+    return h % shard_count
+
+
+def index_dir_for(version, versions_dir=VERSIONS_DIR):
+    return os.path.join(versions_dir, version, INDEX_DIR_NAME)
+
+
+def write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def build_index(version, versions_dir=VERSIONS_DIR, shard_count=SHARD_COUNT):
+    """json/<버전>.json 으로 위치 포함 역색인을 만들어 json/<버전>/search/ 에 씁니다."""
+    json_path = os.path.join(versions_dir, f"{version}.json")
+    with open(json_path, 'rb') as f:
+        source_sha256 = hashlib.sha256(f.read()).hexdigest()
+    corpus = load_corpus(json_path)
+
+    postings = defaultdict(list)  # 용어 -> [(절 번호, [위치...]), ...] (절 번호 오름차순)
+    lengths, books = [], []
+    verse_id = 0
+    for book in corpus:
+        chapter_starts = []
+        for chapter in book['chapters']:
+            chapter_starts.append(verse_id)
+            for verse in chapter:
+                tokens, length = tokenize(clean_verse_text(str(verse)))
+                positions = defaultdict(list)
+                for term, position in tokens:
+                    positions[term].append(position)
+                for term, term_positions in positions.items():
+                    postings[term].append((verse_id, term_positions))
+                lengths.append(length)
+                verse_id += 1
+        books.append({"abbrev": book['abbrev'], "name": book.get('name'), "chapter_starts": chapter_starts})
+
+    shards = [dict() for _ in range(shard_count)]
+    for term, entries in postings.items():
+        encoded, previous = [len(entries)], 0
+        for vid, positions in entries:
+            encoded += [vid - previous, len(positions), positions[0]]
+            encoded += [b - a for a, b in zip(positions, positions[1:])]
+            previous = vid
+        shards[shard_of(term, shard_count)][term] = encoded
+
+    out_dir = index_dir_for(version, versions_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    total = sum(write_json(os.path.join(out_dir, f"{i:02d}.json"), shard) for i, shard in enumerate(shards))
+    total += write_json(os.path.join(out_dir, "meta.json"), {
+        "format": INDEX_FORMAT,
+        "version": version,
+        "source_sha256": source_sha256,
+        "shards": shard_count,
+        "verses": verse_id,
+        "avg_length": sum(lengths) / max(1, len(lengths)),
+        "lengths": lengths,
+        "books": books,
+    })
+    return {"terms": len(postings), "verses": verse_id, "bytes": total}
+
+
+def decode_postings(encoded):
+    """[문서 빈도, ...] -> {절 번호: [위치...]}"""
+    result, i, vid = {}, 1, 0
+    while i < len(encoded):
+        vid += encoded[i]
+        count = encoded[i + 1]
+        positions = [encoded[i + 2]]
+        for gap in encoded[i + 3:i + 2 + count]:
+            positions.append(positions[-1] + gap)
+        result[vid] = positions
+        i += 2 + count
+    return result
+
+
+class SearchIndex:
+    """
+    한 버전의 검색 색인. meta.json 만 먼저 읽고, 포스팅 샤드는 검색어가 걸린 것만 처음 필요할 때 읽어 둡니다.
+    search() 는 모든 절(clause)을 포함하는 절(verse)을 BM25 로 정렬해서 돌려줍니다.
+    """
+
+    def __init__(self, version, versions_dir=VERSIONS_DIR):
+        self.version = version
+        self.index_dir = index_dir_for(version, versions_dir)
+        with open(os.path.join(self.index_dir, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{self.index_dir}: unsupported index format {self.meta.get('format')}")
+        self._shards = {}
+        self._postings = {}  # 디코딩한 포스팅 캐시 (자주 쓰는 단어는 디코딩 비용이 큼)
+        # 절 번호 -> (책, 장) 역변환용 평탄화한 장 시작 번호
+        self._chapter_starts, self._chapter_keys = [], []
+        for book_idx, book in enumerate(self.meta["books"]):
+            for chapter_idx, start in enumerate(book["chapter_starts"]):
+                self._chapter_starts.append(start)
+                self._chapter_keys.append((book_idx, chapter_idx))
+
+    def _shard(self, term):
+        number = shard_of(term, self.meta["shards"])
+        if number not in self._shards:
+            with open(os.path.join(self.index_dir, f"{number:02d}.json"), 'r', encoding='utf-8') as f:
+                self._shards[number] = json.load(f)
+        return self._shards[number]
+
+    def document_frequency(self, term):
+        encoded = self._shard(term).get(term)
+        return encoded[0] if encoded else 0
+
+    def postings(self, term):
+        if term not in self._postings:
+            encoded = self._shard(term).get(term)
+            self._postings[term] = decode_postings(encoded) if encoded else {}
+        return self._postings[term]
+
+    def locate(self, verse_id):
+        """절 번호 -> (책 인덱스, 장 인덱스, 절 인덱스), 모두 0부터."""
+        slot = bisect.bisect_right(self._chapter_starts, verse_id) - 1
+        book_idx, chapter_idx = self._chapter_keys[slot]
+        return book_idx, chapter_idx, verse_id - self._chapter_starts[slot]
+
+    def _clause_matches(self, clause):
+        """{절 번호: 일치 횟수}. 구절이면 위치가 상대 위치대로 이어지는 경우만 셉니다."""
+        if not clause or any(self.document_frequency(term) == 0 for term, _ in clause):
+            return {}
+        # 가장 드문 용어부터: 후보 절이 가장 적은 목록을 기준으로 나머지를 확인
+        clause = sorted(clause, key=lambda item: self.document_frequency(item[0]))
+        lists = [(self.postings(term), offset) for term, offset in clause]
+        (first, base), rest = lists[0], lists[1:]
+        matches = {}
+        candidates = [vid for vid in first if all(vid in postings for postings, _ in rest)]
+        for vid in candidates:
+            if not rest:
+                matches[vid] = len(first[vid])
+                continue
+            others = [(set(postings[vid]), offset - base) for postings, offset in rest]
+            count = sum(all(p + delta in positions for positions, delta in others) for p in first[vid])
+            if count:
+                matches[vid] = count
+        return matches
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        clauses = query_clauses(query)
+        if not clauses:
+            return []
+        per_clause = [self._clause_matches(clause) for clause in clauses]
+        candidates = set(per_clause[0]).intersection(*per_clause[1:])
+
+        n, avg = self.meta["verses"], self.meta["avg_length"] or 1
+        lengths = self.meta["lengths"]
+        scores = {}
+        for matches in per_clause:
+            idf = math.log(1 + (n - len(matches) + 0.5) / (len(matches) + 0.5))
+            for vid in candidates:
+                tf = matches[vid]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[vid] / avg)
+                scores[vid] = scores.get(vid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        hits = []
+        for vid in sorted(scores, key=lambda v: (-scores[v], v))[:limit]:
+            book_idx, chapter_idx, verse_idx = self.locate(vid)
+            book = self.meta["books"][book_idx]
+            hits.append({
+                "book_idx": book_idx, "abbrev": book["abbrev"], "name": book["name"],
+                "chapter": chapter_idx + 1, "verse": verse_idx + 1, "score": round(scores[vid], 4),
+            })
+        return hits
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the per-version full-text index.")
+    parser.add_argument("--build", nargs="*", metavar="VERSION",
+                        help="Build indexes for these versions (no names = every json/<version>.json)")
+    parser.add_argument("version", nargs="?", help="Version to query, e.g. zh_ncv")
+    parser.add_argument("query", nargs="*", help='Query text; use "double quotes" for phrases')
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    if args.build is not None:
+        for version in args.build or list_versions():
+            started = time.perf_counter()
+            info = build_index(version)
+            print(f"{version}: {info['terms']} terms, {info['verses']} verses, {info['bytes'] / 1e6:.1f} MB "
+                  f"({time.perf_counter() - started:.1f}s)")
+    if args.version and args.query:
+        index = SearchIndex(args.version)
+        corpus = load_corpus(os.path.join(VERSIONS_DIR, f"{args.version}.json"))
+        started = time.perf_counter()
+        hits = index.search(" ".join(args.query), args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for hit in hits:
+            text = clean_verse_text(str(corpus[hit["book_idx"]]['chapters'][hit["chapter"] - 1][hit["verse"] - 1]))
+            print(f"{hit['score']:7.3f}  {hit['name']} {hit['chapter']}:{hit['verse']}  {text}")
+        print(f"{len(hits)} hit(s) in {elapsed:.1f} ms")
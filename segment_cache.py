@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from chapter_manifest import file_sha256
+from ffmpeg_encoder import encode_segment, segment_settings, probe_duration
+
+# Configuration
+CACHE_DIR = "segment_cache"
+INDEX_FILE = "index.jsonl"
+
+
+class SegmentCache:
+    """
+    절 하나를 인코딩한 mp4 세그먼트를 (텍스트, 음성, 프레임 내용, 오디오 내용, 인코더 설정) 해시로 캐시합니다.
+
+    챕터 영상은 캐시된 세그먼트를 -c copy 로 이어 붙여 만들기 때문에, 절 하나의 텍스트가 고쳐지면
+    그 절(과 화면에 보이는 내용이 바뀐 절)만 다시 인코딩됩니다. 프레임/오디오는 실제 바이트의 해시를
+    키에 넣으므로 화면이나 음성이 조금이라도 달라지면 자동으로 새 세그먼트가 만들어집니다.
+    파일은 segment_cache/<해시 앞 2자리>/<해시>.mp4 로 샤딩하고 메타데이터는 index.jsonl 에 추가합니다.
+    인덱스에는 인코딩된 세그먼트의 실제 길이(ffprobe, 25fps 프레임 반올림/AAC 패딩 포함)도 남겨서
+    이어 붙인 영상의 자막/절 인덱스가 세그먼트 경계와 정확히 맞도록 합니다.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, settings=None):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.settings = settings or segment_settings()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._durations = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_durations()
+
+    def _load_durations(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("duration") is not None:
+                    self._durations[entry["key"]] = entry["duration"]
+
+    def key(self, text, voice, frame, audio_path):
+        if isinstance(frame, (bytes, bytearray)):
+            frame_hash = hashlib.sha256(frame).hexdigest()
+        else:
+            frame_hash = file_sha256(frame)
+        payload = json.dumps([text, voice, frame_hash, file_sha256(audio_path), self.settings],
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp4")
+
+    def get_or_encode(self, text, voice, frame, audio_path):
+        """캐시된 세그먼트 경로를 돌려주고, 없으면 이 절만 인코딩해서 캐시에 넣습니다."""
+        key = self.key(text, voice, frame, audio_path)
+        path = self.path_for(key)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with self._lock:
+                self.hits += 1
+            return path
+
+        with self._lock:
+            self.misses += 1
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{key}.{os.getpid()}.{threading.get_ident()}.tmp.mp4")
+        encode_segment(frame, audio_path, tmp_path, fps=self.settings['fps'],
+                       crf=self.settings['crf'], preset=self.settings['preset'])
+        duration = probe_duration(tmp_path)
+        os.replace(tmp_path, path)
+
+        self._append_entry({
+            "key": key,
+            "text": text[:80],
+            "voice": voice,
+            "size": os.path.getsize(path),
+            "duration": duration,
+            "created_at": datetime.now().isoformat()
+        })
+        return path
+
+    def duration(self, path):
+        """세그먼트의 실제 길이(초). 길이 기록이 없는 예전 항목은 한 번만 ffprobe 하고 인덱스에 남깁니다."""
+        key = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            if key in self._durations:
+                return self._durations[key]
+        duration = probe_duration(path)
+        self._append_entry({"key": key, "size": os.path.getsize(path), "duration": duration,
+                            "created_at": datetime.now().isoformat()})
+        return duration
+
+    def _append_entry(self, entry):
+        with self._lock:
+            if entry.get("duration") is not None:
+                self._durations[entry["key"]] = entry["duration"]
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,22 @@
+import re
+
+SRT_TIME = re.compile(r"(\d+):(\d+):(\d+),(\d+)")
+
+
+def srt_seconds(stamp):
+    h, m, s, ms = (int(v) for v in SRT_TIME.match(stamp.strip()).groups())
+    return h * 3600 + m * 60 + s + ms / 1000
+
+
+def parse_srt(path):
+    """[(시작 초, 끝 초, 텍스트), ...] (자막 번호 = 절 번호)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        blocks = f.read().strip().split("\n\n")
+    entries = []
+    for block in blocks:
+        lines = block.strip().splitlines()
+        if len(lines) < 3 or "-->" not in lines[1]:
+            continue
+        start, end = lines[1].split("-->")
+        entries.append((srt_seconds(start), srt_seconds(end), " ".join(lines[2:])))
+    return entries
@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from PIL import ImageDraw
+from bible_text import BIBLE_NAMES, canonical_book
+from chapter_manifest import file_sha256
+from corpus_pack import load_corpus
+from native_renderer import load_font, chapter_image_path, image_panel_base, SANS_BOLD_FONTS, SANS_FONTS
+
+# Configuration
+JSON_PATH = "json/en_kjv.json"
+THUMB_DIR = "thumbnails"
+THUMB_WIDTH = 1280            # YouTube 권장 썸네일 크기 (16:9)
+THUMB_HEIGHT = 720
+JPEG_QUALITY = 88             # YouTube 썸네일 상한 2MB 보다 충분히 작게
+THUMB_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MARGIN_X = 72
+MARGIN_BOTTOM = 64
+TITLE_FONT_SIZE = 120
+CHAPTER_FONT_SIZE = 84
+LABEL_FONT_SIZE = 40
+TEXT_STROKE = 4
+LAYOUT_VERSION = 1            # 레이아웃을 바꾸면 올려서 캐시를 무효화
+
+BOOK_ABBREVS = {name: abbrev for abbrev, name in BIBLE_NAMES.items()}
+
+
+def thumbnail_key(image_path, book, chapter, version=None):
+    """입력(장 이미지 바이트, 책/장/버전, 레이아웃 설정) 해시. 하나라도 바뀌면 새 썸네일을 만듭니다."""
+    image_hash = file_sha256(image_path) if os.path.exists(image_path) else None
+    payload = json.dumps([image_hash, book, chapter, version, THUMB_WIDTH, THUMB_HEIGHT,
+                          JPEG_QUALITY, LAYOUT_VERSION], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_thumbnail(image_path, book, chapter, out_path, version=None):
+    """장 이미지를 cover 로 채우고 (아래쪽이 어두운 그라데이션) 왼쪽 아래에 책 이름/장을 크게 씁니다."""
+    frame = image_panel_base(image_path, THUMB_WIDTH, THUMB_HEIGHT).copy()
+    draw = ImageDraw.Draw(frame)
+    title_font = load_font(tuple(SANS_BOLD_FONTS), TITLE_FONT_SIZE)
+    chapter_font = load_font(tuple(SANS_BOLD_FONTS), CHAPTER_FONT_SIZE)
+    label_font = load_font(tuple(SANS_FONTS), LABEL_FONT_SIZE)
+
+    # 긴 책 이름(1 Thessalonians 등)은 한 줄에 들어가도록 글자 크기를 줄임
+    size = TITLE_FONT_SIZE
+    while size > 48 and title_font.getlength(book) > THUMB_WIDTH - 2 * MARGIN_X:
+        size -= 8
+        title_font = load_font(tuple(SANS_BOLD_FONTS), size)
+
+    y = THUMB_HEIGHT - MARGIN_BOTTOM - CHAPTER_FONT_SIZE
+    draw.text((MARGIN_X, y), f"Chapter {chapter}", font=chapter_font, fill=(254, 240, 138),
+              stroke_width=TEXT_STROKE, stroke_fill=(0, 0, 0))
+    y -= size + 12
+    draw.text((MARGIN_X, y), book, font=title_font, fill=(255, 255, 255),
+              stroke_width=TEXT_STROKE, stroke_fill=(0, 0, 0))
+    if version:
+        label = version.upper()
+        draw.text((THUMB_WIDTH - MARGIN_X - label_font.getlength(label), 48), label, font=label_font,
+                  fill=(255, 255, 255), stroke_width=2, stroke_fill=(0, 0, 0))
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    frame.save(tmp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def build_thumbnail(book, chapter, version=None, thumb_dir=THUMB_DIR):
+    """
+    워커 프로세스에서 실행: (썸네일 경로, 새로 만들었는지). 같은 입력 해시의 파일이 있으면 그대로 씁니다.
+    파일은 thumbnails/<해시 앞 2자리>/<해시>.jpg 로 샤딩합니다.
+    """
+    image_path = chapter_image_path(BOOK_ABBREVS.get(book, book), book, chapter)
+    key = thumbnail_key(image_path, book, chapter, version)
+    out_path = os.path.join(thumb_dir, key[:2], f"{key}.jpg")
+    if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
+        return out_path, False
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    return render_thumbnail(image_path, book, chapter, out_path, version), True
+
+
+def build_thumbnails(jobs, workers=THUMB_WORKERS):
+    """
+    [(책 이름, 장, 버전), ...] 을 한 번의 프로세스 풀 배치로 처리합니다.
+    반환값: {(책 이름, 장, 버전): 썸네일 경로}. 실패한 항목은 경고만 찍고 빠집니다.
+    """
+    jobs = list(dict.fromkeys(jobs))
+    thumbnails, created = {}, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {job: pool.submit(build_thumbnail, *job) for job in jobs}
+        for job, future in futures.items():
+            try:
+                path, is_new = future.result()
+            except Exception as e:
+                print(f"Thumbnail failed for {job[0]} {job[1]}: {e}")
+                continue
+            thumbnails[job] = path
+            created += is_new
+    print(f"Thumbnails: {len(thumbnails)} ready ({created} rendered, {len(thumbnails) - created} cached).")
+    return thumbnails
+
+
+def all_chapter_jobs(json_path=JSON_PATH, version=None):
+    """성경 전체 장 목록 (KJV 기준 1,189장). 책 이름은 영상 파일 이름과 같은 정경 이름을 씁니다."""
+    books = load_corpus(json_path)
+    return [(canonical_book(book_idx)[1], chapter_idx + 1, version)
+            for book_idx, book in enumerate(books)
+            for chapter_idx in range(len(book['chapters']))]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render 1280x720 chapter thumbnails in a process pool.")
+    parser.add_argument("--json", default=JSON_PATH, help="Bible JSON used to enumerate chapters")
+    parser.add_argument("--version", help="Version label drawn on the thumbnail (matrix mode)")
+    parser.add_argument("--workers", type=int, default=THUMB_WORKERS)
+    args = parser.parse_args()
+
+    build_thumbnails(all_chapter_jobs(args.json, args.version), args.workers)
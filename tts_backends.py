@@ -0,0 +1,215 @@
+import os
+import json
+import shutil
+import asyncio
+import urllib.error
+import urllib.request
+
+# Configuration
+EDGE_MP3_BITRATE = 48000   # edge-tts 출력 (audio-24khz-48kbitrate-mono-mp3, CBR)
+ESPEAK = shutil.which("espeak-ng") or shutil.which("espeak") or "espeak-ng"
+HTTP_TTS_URL = "http://127.0.0.1:8765/synthesize"  # fake_tts_server.py 기본 주소
+HTTP_TIMEOUT = 60
+BATCH_CONCURRENCY = 4
+
+# 언어 코드(버전 약어 앞부분)별 Edge 음성
+EDGE_VOICES = {
+    "en": "en-US-ChristopherNeural",
+    "pt": "pt-BR-AntonioNeural",
+    "es": "es-ES-AlvaroNeural",
+    "fi": "fi-FI-HarriNeural",
+    "zh": "zh-CN-YunxiNeural",
+    "ko": "ko-KR-InJoonNeural",
+    "de": "de-DE-ConradNeural",
+    "fr": "fr-FR-HenriNeural",
+    "el": "el-GR-NestorasNeural",
+    "ar": "ar-SA-HamedNeural",
+    "ro": "ro-RO-EmilNeural",
+    "ru": "ru-RU-DmitryNeural",
+    "vi": "vi-VN-NamMinhNeural",
+}
+
+BACKENDS = {}
+
+
+def register_backend(cls):
+    """클래스 데코레이터: name 으로 TTS 엔진을 등록합니다."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend(name, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS engine '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](**options)
+
+
+class TTSRateLimited(Exception):
+    """서버가 요청 제한(429/503)으로 거절함. TTSPipeline 의 재시도/백오프가 처리합니다."""
+
+
+class TTSBackend:
+    """
+    TTS 엔진 공통 인터페이스. 엔진은 synthesize() 하나만 구현하면 되고,
+    단어 경계 시간을 줄 수 있는 엔진은 supports_boundaries = True 와 synthesize_with_boundaries() 를 구현합니다.
+    languages 가 None 이면 모든 언어를 지원하는 것으로 봅니다.
+    """
+
+    name = None
+    ext = "mp3"
+    languages = None
+    supports_boundaries = False
+
+    def supports(self, language):
+        return self.languages is None or language in self.languages
+
+    def voice_for(self, language):
+        return language
+
+    async def synthesize(self, text, out_path, voice, rate):
+        raise NotImplementedError
+
+    async def synthesize_with_boundaries(self, text, out_path, voice, rate):
+        raise NotImplementedError(f"TTS engine '{self.name}' does not report word boundaries")
+
+    def estimate_duration(self, path):
+        # 엔진별로 빠르게 길이를 알 수 있으면 재정의 (기본은 ffprobe)
+        from ffmpeg_encoder import probe_duration
+        return probe_duration(path)
+
+    async def synthesize_many(self, items, voice, rate, concurrency=BATCH_CONCURRENCY):
+        """
+        공통 비동기 일괄 API: [(텍스트, 출력 경로), ...] 를 최대 concurrency 개씩 동시에 합성합니다.
+        속도 제한/재시도/캐시가 필요하면 TTSPipeline 을 사용하세요.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(text, out_path):
+            async with semaphore:
+                await self.synthesize(text, out_path, voice, rate)
+                return out_path
+
+        return await asyncio.gather(*(one(text, out_path) for text, out_path in items))
+
+
+@register_backend
+class EdgeBackend(TTSBackend):
+    """Microsoft Edge 온라인 TTS (edge-tts 패키지를 프로세스 안에서 직접 호출)."""
+
+    name = "edge"
+    languages = set(EDGE_VOICES)
+    supports_boundaries = True
+
+    def voice_for(self, language):
+        return EDGE_VOICES.get(language, EDGE_VOICES["en"])
+
+    async def synthesize(self, text, out_path, voice, rate):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, rate=rate)
+        await communicate.save(out_path)
+
+    async def synthesize_with_boundaries(self, text, out_path, voice, rate):
+        """
+        긴 텍스트(챕터 또는 절 묶음)를 한 번에 합성하면서 단어 경계(WordBoundary) 시간을 같이 받습니다.
+        반환값: [(시작 초, 길이 초, 단어), ...]
+        """
+        import edge_tts
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate, boundary="WordBoundary")
+        except TypeError:
+            # edge-tts 7 이전 버전은 boundary 인자가 없고 항상 WordBoundary 를 보냄
+            communicate = edge_tts.Communicate(text, voice, rate=rate)
+
+        boundaries = []
+        with open(out_path, 'wb') as f:
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    f.write(chunk["data"])
+                elif chunk["type"] == "WordBoundary":
+                    # offset/duration 단위는 100ns
+                    boundaries.append((chunk["offset"] / 1e7, chunk["duration"] / 1e7, chunk["text"]))
+        return boundaries
+
+    def estimate_duration(self, path):
+        return os.path.getsize(path) * 8 / EDGE_MP3_BITRATE
+
+
+@register_backend
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (gTTS). 속도 조절은 지원하지 않고, voice 는 언어 코드입니다."""
+
+    name = "gtts"
+    # gTTS 언어 코드가 버전 약어와 다른 경우만 매핑
+    LANGUAGE_CODES = {"zh": "zh-CN", "pt": "pt"}
+
+    def voice_for(self, language):
+        return self.LANGUAGE_CODES.get(language, language)
+
+    async def synthesize(self, text, out_path, voice, rate):
+        from gtts import gTTS
+
+        def save():
+            gTTS(text=text, lang=voice, slow=False).save(out_path)
+
+        # gTTS 는 동기 HTTP 호출이므로 이벤트 루프를 막지 않게 스레드에서 실행
+        await asyncio.get_running_loop().run_in_executor(None, save)
+
+
+@register_backend
+class OfflineBackend(TTSBackend):
+    """espeak-ng 로 로컬에서 합성하는 오프라인 엔진 (네트워크 없는 환경의 테스트/벤치마크용)."""
+
+    name = "offline"
+    ext = "wav"
+
+    async def synthesize(self, text, out_path, voice, rate):
+        cmd = [ESPEAK, "-v", voice, "-w", out_path]
+        words_per_minute = self._words_per_minute(rate)
+        if words_per_minute:
+            cmd += ["-s", str(words_per_minute)]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, text, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"{ESPEAK} failed: {stderr.decode(errors='replace').strip()}")
+
+    @staticmethod
+    def _words_per_minute(rate):
+        # Edge 형식 속도("+10%")를 espeak 기본 175 wpm 기준으로 변환
+        try:
+            percent = int(str(rate).strip().rstrip("%"))
+        except ValueError:
+            return None
+        return max(80, int(175 * (100 + percent) / 100))
+
+
+@register_backend
+class HttpBackend(TTSBackend):
+    """
+    JSON POST {text, voice, rate} 를 받아 오디오 바이트를 돌려주는 HTTP TTS 서버용 엔진.
+    fake_tts_server.py 와 함께 쓰면 지연/요청 제한을 흉내 낸 환경에서 파이프라인 처리량을 잴 수 있습니다.
+    """
+
+    name = "http"
+    ext = "wav"
+
+    def __init__(self, url=HTTP_TTS_URL, timeout=HTTP_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, text, out_path, voice, rate):
+        body = json.dumps({"text": text, "voice": voice, "rate": rate}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                audio = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code in (429, 503):
+                raise TTSRateLimited(f"HTTP {e.code} (Retry-After: {e.headers.get('Retry-After')})")
+            raise
+        with open(out_path, 'wb') as f:
+            f.write(audio)
+
+    async def synthesize(self, text, out_path, voice, rate):
+        await asyncio.get_running_loop().run_in_executor(None, self._post, text, out_path, voice, rate)
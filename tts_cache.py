@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+# Configuration
+CACHE_DIR = "tts_cache"
+INDEX_FILE = "index.jsonl"
+
+
+def normalize_text(text):
+    # 공백 차이만 있는 문장은 같은 오디오로 취급
+    return " ".join(str(text).split())
+
+
+class TTSCache:
+    """
+    (정리된 텍스트, 음성, 속도, 엔진) 해시를 키로 하는 영구 TTS 오디오 캐시입니다.
+
+    파일은 tts_cache/<해시 앞 2자리>/<해시>.mp3 로 샤딩해 저장하고,
+    메타데이터는 tts_cache/index.jsonl 에 한 줄씩 추가합니다(여러 워커 프로세스가 동시에 써도 안전).
+    같은 문장(시편 136편 후렴, 족보 등)이나 챕터 재시도는 TTS 호출 없이 재사용됩니다.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text, voice, rate, engine, ext="mp3"):
+        payload = json.dumps([normalize_text(text), voice, rate, engine, ext], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key, ext="mp3"):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{ext}")
+
+    def get(self, key, ext="mp3"):
+        """캐시에 있으면 파일 경로, 없으면 None 을 돌려주고 hit/miss 를 집계합니다."""
+        path = self.path_for(key, ext)
+        found = os.path.exists(path) and os.path.getsize(path) > 0
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path if found else None
+
+    def temp_path(self, key, ext="mp3"):
+        # 같은 샤드 폴더 안의 임시 파일 (os.replace 가 원자적으로 동작하도록)
+        shard_dir = os.path.dirname(self.path_for(key, ext))
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp.{ext}")
+
+    def put(self, key, src_path, text, voice, rate, engine, ext="mp3", **extra):
+        """합성이 끝난 임시 파일을 캐시 위치로 옮기고 메타데이터를 기록합니다."""
+        path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(src_path, path)
+
+        entry = {
+            "key": key,
+            "text": normalize_text(text)[:80],
+            "voice": voice,
+            "rate": rate,
+            "engine": engine,
+            "size": os.path.getsize(path),
+            "created_at": datetime.now().isoformat()
+        }
+        entry.update(extra)
+        with self._lock:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return path
+
+    def load_index(self):
+        entries = {}
+        if not os.path.exists(self.index_path):
+            return entries
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry['key']] = entry
+        return entries
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(hit_rate, 1)}
+
+
+if __name__ == "__main__":
+    cache = TTSCache()
+    index = cache.load_index()
+    total_mb = sum(e.get('size', 0) for e in index.values()) / (1024 * 1024)
+    engines = {}
+    for e in index.values():
+        engines[e.get('engine')] = engines.get(e.get('engine'), 0) + 1
+    print(f"TTS cache: {len(index)} entries, {total_mb:.1f} MB in {cache.cache_dir}/")
+    for engine, count in sorted(engines.items(), key=lambda x: str(x[0])):
+        print(f" - {engine}: {count}")
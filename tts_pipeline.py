@@ -0,0 +1,278 @@
+import os
+import json
+import asyncio
+import random
+import threading
+import time
+from tts_backends import get_backend, TTSBackend
+
+# Configuration
+DEFAULT_ENGINE = "edge"    # tts_backends 에 등록된 엔진 이름 (edge, gtts, offline, http)
+DEFAULT_VOICE = "en-US-ChristopherNeural"  # or en-US-AriaNeural (Female)
+DEFAULT_RATE = "+0%"
+# 기본 엔진이 해당 언어를 지원하지 않을 때 차례로 시도할 엔진 (예: Edge 에는 에스페란토 음성이 없음 -> gTTS)
+ENGINE_FALLBACK_ORDER = ["edge", "gtts", "offline"]
+MAX_IN_FLIGHT = 8          # 동시에 진행할 TTS 요청 수
+REQUESTS_PER_SECOND = 4.0  # 요청 시작 속도 제한 (기존 time.sleep(0.5) 대체)
+MAX_RETRIES = 6            # 절 하나당 최대 시도 횟수
+RETRY_BASE_DELAY = 1.0     # 절 단위 지수 백오프 (1, 2, 4, ... 초)
+RETRY_MAX_DELAY = 60.0
+MAX_BATCH_CHARS = 5000     # 챕터 일괄 합성 시 한 요청에 넣을 최대 글자 수
+
+
+def version_language(version):
+    # 버전 약어 앞부분이 언어 코드 (pt_nvi -> pt). 버전이 없으면 영어
+    return version.split("_")[0] if version else "en"
+
+
+def engine_for_version(version, engine=DEFAULT_ENGINE):
+    """engine 이 그 버전의 언어를 지원하지 않으면 ENGINE_FALLBACK_ORDER 에서 지원하는 엔진을 고릅니다."""
+    language = version_language(version)
+    if get_backend(engine).supports(language):
+        return engine
+    for name in ENGINE_FALLBACK_ORDER:
+        if get_backend(name).supports(language):
+            return name
+    return engine
+
+
+def voice_for_version(version, engine=DEFAULT_ENGINE):
+    return get_backend(engine).voice_for(version_language(version))
+
+
+def split_batches(texts, max_chars=MAX_BATCH_CHARS):
+    """절 목록을 max_chars 이하의 연속된 묶음으로 나눕니다. 반환값: [(첫 절 인덱스, [텍스트...]), ...]"""
+    batches = []
+    start, current, size = 0, [], 0
+    for idx, text in enumerate(texts):
+        if current and size + len(text) + 1 > max_chars:
+            batches.append((start, current))
+            start, current, size = idx, [], 0
+        current.append(text)
+        size += len(text) + 1
+    if current:
+        batches.append((start, current))
+    return batches
+
+
+def verse_durations_from_boundaries(texts, boundaries, total_duration):
+    """
+    묶음 합성 결과의 단어 경계를 각 절에 배정해서 절별 길이(초)를 계산합니다.
+    절 사이 전환 시점은 앞 절 마지막 단어 끝과 다음 절 첫 단어 시작의 중간(쉼 구간 가운데)입니다.
+    """
+    joined = " ".join(texts)
+    verse_starts = []
+    pos = 0
+    for text in texts:
+        verse_starts.append(pos)
+        pos += len(text) + 1
+
+    first_word = [None] * len(texts)   # 절별 첫 단어 시작 시각
+    last_word_end = [None] * len(texts)
+    cursor = 0
+    verse_idx = 0
+    for offset, duration, word in boundaries:
+        found = joined.find(word, cursor) if word else -1
+        # 정규화 차이로 못 찾거나 너무 멀리 떨어진 위치면 현재 절에 그대로 배정
+        if found != -1 and found - cursor <= 200:
+            cursor = found + len(word)
+            while verse_idx + 1 < len(texts) and found >= verse_starts[verse_idx + 1]:
+                verse_idx += 1
+        if first_word[verse_idx] is None:
+            first_word[verse_idx] = offset
+        last_word_end[verse_idx] = offset + duration
+
+    cut_points = [0.0]
+    for idx in range(1, len(texts)):
+        start = first_word[idx]
+        if start is None:
+            # 단어가 하나도 배정되지 않은 절(빈 절 등)은 길이 0
+            cut_points.append(cut_points[-1])
+            continue
+        prev_end = next((last_word_end[j] for j in range(idx - 1, -1, -1) if last_word_end[j] is not None), start)
+        cut_points.append(max(cut_points[-1], (prev_end + start) / 2))
+    cut_points.append(max(cut_points[-1], total_duration))
+    return [cut_points[i + 1] - cut_points[i] for i in range(len(texts))]
+
+
+class TTSPipeline:
+    """
+    TTS 를 화면 캡처와 별도로 돌리는 비동기 파이프라인 단계입니다.
+    백그라운드 스레드의 이벤트 루프에서 최대 MAX_IN_FLIGHT 개의 요청을 동시에 처리하고,
+    요청 시작 간격은 REQUESTS_PER_SECOND 로 제한합니다.
+
+    submit() 은 바로 concurrent.futures.Future 를 돌려주므로, 캡처 루프는 기다리지 않고 진행하고
+    챕터 조립 직전에만 wait_all() 로 결과를 기다리면 됩니다.
+
+    실제 합성은 tts_backends 의 엔진이 담당합니다. engine 은 기본 엔진이고, 요청마다 engine= 으로
+    다른 엔진(언어별 전환 등)을 지정할 수 있습니다. 속도 제한과 동시 요청 수는 엔진과 관계없이 공유합니다.
+    """
+
+    def __init__(self, engine=DEFAULT_ENGINE, max_in_flight=MAX_IN_FLIGHT,
+                 requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES, cache=None):
+        self._backends = {}
+        if isinstance(engine, TTSBackend):
+            self._backends[engine.name] = engine
+            engine = engine.name
+        self.engine = engine
+        self.cache = cache
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.max_retries = max_retries
+        self.requests_sent = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tts-pipeline", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._init_primitives(), self._loop).result()
+
+    async def _init_primitives(self):
+        # asyncio 동기화 객체는 루프 스레드 안에서 생성
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._rate_lock = asyncio.Lock()
+        self._next_slot = 0.0
+        self._pending = {}  # 캐시 키 -> 진행 중인 합성 (같은 문장 중복 요청 방지)
+
+    async def _wait_rate_limit(self):
+        async with self._rate_lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self.min_interval
+
+    def backend(self, engine=None):
+        engine = engine or self.engine
+        if engine not in self._backends:
+            self._backends[engine] = get_backend(engine)
+        return self._backends[engine]
+
+    async def _run(self, text, out_path, voice, rate, backend):
+        if self.cache is None:
+            return await self._synthesize_with_retry(text, out_path, voice, rate, backend.synthesize)
+
+        key = self.cache.key(text, voice, rate, backend.name, backend.ext)
+        cached = self.cache.get(key, backend.ext)
+        if cached:
+            return cached
+
+        # 같은 키가 이미 합성 중이면 그 결과를 같이 기다림
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        task = asyncio.ensure_future(self._synthesize_into_cache(key, text, voice, rate, backend))
+        self._pending[key] = task
+        try:
+            return await task
+        finally:
+            self._pending.pop(key, None)
+
+    async def _synthesize_into_cache(self, key, text, voice, rate, backend):
+        tmp_path = self.cache.temp_path(key, backend.ext)
+        try:
+            await self._synthesize_with_retry(text, tmp_path, voice, rate, backend.synthesize)
+            return self.cache.put(key, tmp_path, text, voice, rate, backend.name, ext=backend.ext)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def _synthesize_with_retry(self, text, out_path, voice, rate, synthesize):
+        for attempt in range(self.max_retries):
+            # 동시 요청 슬롯은 요청하는 동안만 잡고, 백오프 대기 중에는 돌려줘서 다른 절이 계속 나가게 함
+            async with self._semaphore:
+                await self._wait_rate_limit()
+                self.requests_sent += 1
+                try:
+                    result = await synthesize(text, out_path, voice, rate)
+                    return out_path if result is None else result
+                except Exception as e:
+                    if attempt + 1 >= self.max_retries:
+                        raise
+                    error = e
+            # 절 단위 지수 백오프 + 지터 (여러 요청이 동시에 재시도하지 않도록)
+            wait = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)) * (0.5 + random.random() / 2)
+            print(f"TTS Error ({error}). Retrying in {wait:.1f}s...")
+            await asyncio.sleep(wait)
+
+    async def _run_batch(self, texts, out_path, voice, rate, backend):
+        joined = " ".join(texts)
+        boundaries = None
+        key = None
+        engine = backend.name + "-batch"
+        if self.cache is not None:
+            key = self.cache.key(joined, voice, rate, engine, backend.ext)
+            cached_audio = self.cache.get(key, backend.ext)
+            cached_timing = self.cache.get(key, "json") if cached_audio else None
+            if cached_audio and cached_timing:
+                with open(cached_timing, 'r', encoding='utf-8') as f:
+                    boundaries = json.load(f)
+                out_path = cached_audio
+
+        if boundaries is None:
+            target = self.cache.temp_path(key, backend.ext) if key else out_path
+            boundaries = await self._synthesize_with_retry(joined, target, voice, rate,
+                                                           backend.synthesize_with_boundaries)
+            if key:
+                timing_tmp = self.cache.temp_path(key, "json")
+                with open(timing_tmp, 'w', encoding='utf-8') as f:
+                    json.dump(boundaries, f, ensure_ascii=False)
+                out_path = self.cache.put(key, target, joined, voice, rate, engine, ext=backend.ext,
+                                          verses=len(texts))
+                self.cache.put(key, timing_tmp, joined, voice, rate, engine, ext="json")
+
+        total_duration = backend.estimate_duration(out_path)
+        return {
+            "audio": out_path,
+            "durations": verse_durations_from_boundaries(texts, boundaries, total_duration)
+        }
+
+    def submit_batch(self, texts, out_path=None, voice=DEFAULT_VOICE, rate=DEFAULT_RATE, engine=None):
+        """
+        여러 절을 한 번의 요청으로 합성합니다. Future 결과: {'audio': 경로, 'durations': [절별 길이(초)]}
+        캐시를 쓰지 않을 때는 out_path 가 필요합니다. 단어 경계를 주는 엔진(edge)만 지원합니다.
+        """
+        backend = self.backend(engine)
+        if not backend.supports_boundaries:
+            raise ValueError(f"TTS engine '{backend.name}' has no word-boundary timings; use per-verse TTS")
+        if self.cache is None and out_path is None:
+            raise ValueError("submit_batch needs out_path when the TTS cache is disabled")
+        return asyncio.run_coroutine_threadsafe(self._run_batch(list(texts), out_path, voice, rate, backend), self._loop)
+
+    def submit(self, text, out_path=None, voice=DEFAULT_VOICE, rate=DEFAULT_RATE, engine=None):
+        """
+        Future 의 결과는 오디오 파일 경로입니다.
+        캐시를 쓰면 out_path 대신 캐시 안의 파일 경로가 돌아옵니다.
+        """
+        backend = self.backend(engine)
+        return asyncio.run_coroutine_threadsafe(self._run(text, out_path, voice, rate, backend), self._loop)
+
+    async def synthesize_many(self, texts, voice=DEFAULT_VOICE, rate=DEFAULT_RATE, engine=None, out_paths=None):
+        """
+        공통 비동기 일괄 API (이벤트 루프 안에서 await). 캐시/속도 제한/재시도가 모두 적용되고,
+        결과는 texts 순서대로의 오디오 경로 목록입니다.
+        """
+        backend = self.backend(engine)
+        out_paths = out_paths or [None] * len(texts)
+        return await asyncio.gather(*(self._run(text, path, voice, rate, backend)
+                                      for text, path in zip(texts, out_paths)))
+
+    def submit_many(self, texts, voice=DEFAULT_VOICE, rate=DEFAULT_RATE, engine=None, out_paths=None):
+        """synthesize_many 를 파이프라인 루프에서 실행하고 Future(경로 목록)를 돌려줍니다."""
+        return asyncio.run_coroutine_threadsafe(
+            self.synthesize_many(list(texts), voice, rate, engine, out_paths), self._loop
+        )
+
+    def wait_all(self, futures):
+        # 실패한 요청이 있으면 첫 번째 예외를 그대로 올림 (챕터 재시도 로직이 처리)
+        return [future.result() for future in futures]
+
+    def close(self):
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
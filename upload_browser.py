@@ -3,6 +3,7 @@ import json
 import time
 import random
 from playwright.sync_api import sync_playwright
+from thumbnails import build_thumbnails
 
 USER_DATA_DIR = os.path.join(os.getcwd(), "chrome_user_data")
 HISTORY_FILE = "video_history.json"
@@ -23,7 +24,7 @@ def get_next_video(history):
     # Actually just find the first one that is NOT uploaded.
     # We might want to respect the order in the file, which seems chronological/biblical
     for entry in history:
-        if not entry.get('uploaded'):
+        if not entry.get('uploaded') and not entry.get('quarantined'):
              # Check if file exists
              path = os.path.join(MOVIES_DIR, entry['file_name'])
              if os.path.exists(path):
@@ -32,7 +33,7 @@ def get_next_video(history):
                  print(f"Warning: File not found for pending upload: {entry['file_name']}")
     return None, None
 
-def upload_video(entry, file_path):
+def upload_video(entry, file_path, thumbnail_path=None):
     print(f"Starting upload for: {entry['book']} {entry['chapter']}")
     
     with sync_playwright() as p:
@@ -118,6 +119,15 @@ def upload_video(entry, file_path):
             desc_input.fill(desc_text)
             
             time.sleep(2)
+
+            # Thumbnail: Studio 의 "Upload file" 버튼 뒤에 숨은 input#file-loader 에 바로 설정
+            if thumbnail_path:
+                try:
+                    page.locator("input#file-loader").set_input_files(thumbnail_path)
+                    print(f"Thumbnail set: {thumbnail_path}")
+                    time.sleep(2)
+                except Exception as e:
+                    print(f"Warning: could not set thumbnail ({e}). Keeping auto-picked one.")
             
             # Made for kids?
             # Radio button "No, it's not made for kids"
@@ -208,6 +218,10 @@ def upload_video(entry, file_path):
             browser.close()
 
 def main():
+    # 대기 중인 모든 영상의 썸네일을 먼저 한 배치로 만들어 둠 (캐시된 것은 건너뜀)
+    pending = [e for e in load_history() if not e.get('uploaded') and not e.get('quarantined')]
+    thumbnails = build_thumbnails([(e['book'], e['chapter'], e.get('version')) for e in pending])
+
     while True:
         history = load_history()
         entry, path = get_next_video(history)
@@ -216,7 +230,7 @@ def main():
             print("No more pending uploads found or files missing.")
             break
             
-        success = upload_video(entry, path)
+        success = upload_video(entry, path, thumbnails.get((entry['book'], entry['chapter'], entry.get('version'))))
         
         if success:
             # Update history
@@ -10,6 +10,9 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 
+from media_verifier import MediaVerifier, QUARANTINE_DIR
+from thumbnails import build_thumbnails
+
 # Configurations
 CLIENT_SECRETS_FILE = os.path.join("secret", "client_secret.json")
 TOKEN_FILE = os.path.join("secret", "token.json")
@@ -39,12 +42,23 @@ def get_authenticated_service():
     return googleapiclient.discovery.build(
         API_SERVICE_NAME, API_VERSION, credentials=creds)
 
-def upload_video(file_path, title, description, tags=None, privacy="public"):
+def set_thumbnail(youtube, video_id, thumbnail_path):
+    # 업로드에 쓴 클라이언트를 그대로 사용 (인증을 다시 하지 않음). 실패해도 업로드 자체는 성공으로 봄
+    try:
+        youtube.thumbnails().set(
+            videoId=video_id,
+            media_body=MediaFileUpload(thumbnail_path, mimetype="image/jpeg")
+        ).execute()
+        print(f"Thumbnail set for video '{video_id}'.")
+    except googleapiclient.errors.HttpError as e:
+        print(f"Failed to set thumbnail for '{video_id}': {e}")
+
+def upload_video(file_path, title, description, tags=None, privacy="public", thumbnail_path=None, youtube=None):
     if not os.path.exists(file_path):
         print(f"Error: {file_path} not found.")
         return
 
-    youtube = get_authenticated_service()
+    youtube = youtube or get_authenticated_service()
     
     body = dict(
         snippet=dict(
@@ -64,7 +78,10 @@ def upload_video(file_path, title, description, tags=None, privacy="public"):
         media_body=MediaFileUpload(file_path, chunksize=-1, resumable=True)
     )
 
-    return resumable_upload(insert_request)
+    video_id = resumable_upload(insert_request)
+    if video_id and thumbnail_path:
+        set_thumbnail(youtube, video_id, thumbnail_path)
+    return video_id
 
 def resumable_upload(insert_request):
     response = None
@@ -153,11 +170,28 @@ def process_pending_uploads():
     print(f"Loaded {len(history)} videos from history.")
 
     # Filter and Sort pending videos
-    pending_videos = [v for v in history if not v.get('uploaded', False)]
+    pending_videos = [v for v in history if not v.get('uploaded', False) and not v.get('quarantined')]
     pending_videos.sort(key=get_bible_sort_key)
+
+    # 업로드 전에 파일 무결성 검사 (잘린 파일로 할당량을 낭비하지 않도록). 실패한 파일은 격리하고 건너뜀
+    verifier = MediaVerifier()
+    paths = {os.path.join("movies", v.get('file_name')): v for v in pending_videos}
+    results = verifier.verify_many([path for path in paths if os.path.exists(path)])
+    for path, (ok, reason) in results.items():
+        if not ok:
+            verifier.quarantine(path, reason)
+            paths[path]['quarantined'] = reason
+    if any(not ok for ok, _ in results.values()):
+        with open(history_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+    pending_videos = [v for v in pending_videos if not v.get('quarantined')]
     
     print(f"Found {len(pending_videos)} pending uploads (Sorted by Bible Order).")
 
+    # 대기 중인 영상의 썸네일을 한 번에 만들어 둠 (입력 해시 캐시라 이미 만든 것은 건너뜀)
+    thumbnails = build_thumbnails([(v.get('book'), v.get('chapter'), v.get('version')) for v in pending_videos])
+    youtube = get_authenticated_service() if pending_videos else None
+
     for video in pending_videos:
         file_name = video.get('file_name')
         print(f"Processing pending upload: {file_name}")
@@ -170,10 +204,16 @@ def process_pending_uploads():
         chapter = video.get('chapter')
         title = f"{book} Chapter {chapter} (NIRV)"
         description = f"{book} Chapter {chapter} reading from the New International Reader's Version (NIRV) Bible."
+        version = video.get('version')
+        if version:
+            # 매트릭스 모드로 만든 다른 버전 영상
+            title = f"{book} Chapter {chapter} ({version})"
+            description = f"{book} Chapter {chapter} reading ({version})."
         
         print(f"Starting upload for: {title}")
         try:
-            video_id = upload_video(file_path, title, description)
+            thumbnail_path = thumbnails.get((book, chapter, version))
+            video_id = upload_video(file_path, title, description, thumbnail_path=thumbnail_path, youtube=youtube)
             
             # Update history immediately after success
             video['uploaded'] = True
@@ -224,9 +264,19 @@ def sync_history_with_movies():
 
     new_entries = []
     
-    # Scan movies directory
+    # Scan movies directory (+ 매트릭스 모드의 movies/<버전>/ 하위 폴더)
+    candidates = []
     for f in os.listdir(movies_dir):
-        if f.endswith(".mp4") and f not in existing_files:
+        sub_dir = os.path.join(movies_dir, f)
+        if os.path.isdir(sub_dir):
+            if os.path.abspath(sub_dir) == os.path.abspath(QUARANTINE_DIR):
+                continue
+            candidates += [(f, f"{f}/{name}", name) for name in os.listdir(sub_dir)]
+        else:
+            candidates.append((None, f, f))
+
+    for version, rel_name, f in candidates:
+        if f.endswith(".mp4") and rel_name not in existing_files:
             # Parse filename
             # Expected format: Book_Chapter_Num.mp4 or similar containing "_Chapter_"
             if "_Chapter_" in f:
@@ -236,23 +286,31 @@ def sync_history_with_movies():
                     chapter_part = parts[1].replace(".mp4", "")
                     chapter_num = int(chapter_part)
                     
-                    full_path = os.path.join(movies_dir, f)
+                    full_path = os.path.join(movies_dir, rel_name)
                     
                     new_entry = {
                         "book": book_part,
                         "chapter": chapter_num,
-                        "file_name": f,
+                        "file_name": rel_name,
                         "size_mb": get_size_mb(full_path),
                         "created_at": datetime.now().isoformat(),
                         "uploaded": False
                     }
+                    if version:
+                        new_entry["version"] = version
                     new_entries.append(new_entry)
-                    print(f"Adding new video to history: {f}")
+                    print(f"Adding new video to history: {rel_name}")
                 except ValueError:
                     print(f"Skipping file with unexpected format (chapter not int): {f}")
             else:
                 print(f"Skipping file not matching format: {f}")
 
+    # 새로 추가할 파일은 한꺼번에 병렬 검사 (결과는 크기/수정 시각 기준으로 캐시됨)
+    if new_entries:
+        verifier = MediaVerifier()
+        passed = set(verifier.gate([os.path.join(movies_dir, e["file_name"]) for e in new_entries]))
+        new_entries = [e for e in new_entries if os.path.join(movies_dir, e["file_name"]) in passed]
+
     if new_entries:
         history.extend(new_entries)
         # Sort history by book and chapter could be nice, but simple append is enough for now.
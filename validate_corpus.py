@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from bible_text import VERSIONS_DIR, VERSION_INDEX, CANONICAL_ABBREVS, list_versions, version_languages
+
+# Configuration
+REPORT_PATH = "corpus_report.json"
+MAX_SAMPLES = 5   # 문제 종류마다 보고서에 남길 예시 위치 수
+ENTITY_RE = re.compile(r'&(?:#[0-9]+|#x[0-9a-fA-F]+|[a-zA-Z]+);')
+BRACE_RE = re.compile(r'\{[^{}]*\}|[{}]')
+
+# check_abbrevs.py / compare_abbrevs.py 를 대신하는 말뭉치 검사기:
+# - 버전 파일마다 (프로세스 풀에서) BOM, 파싱 오류, 책 약어/순서, 남은 HTML 엔티티, { ... } 표기, 빈 절을 확인
+# - (버전 x 책 x 장) 절 수 행렬을 numpy 로 만들고, 버전 다수결 기준 절 구분 (parallel_corpus 와 같은 규칙) 과 비교
+# - index.json 에는 있는데 파일이 없는 버전, 파일은 있는데 index.json 에 없는 버전
+# 결과는 corpus_report.json 에 기계가 읽을 수 있는 형태로 씁니다.
+
+
+def location(abbrev, chapter_idx, verse_idx):
+    return f"{abbrev} {chapter_idx + 1}:{verse_idx + 1}"
+
+
+def scan_version(json_path):
+    """파일 하나 검사 (프로세스 풀 작업). 절 수는 [[장별 절 수] x 책] 으로 돌려주고 행렬은 부모가 만듭니다."""
+    version = os.path.splitext(os.path.basename(json_path))[0]
+    result = {"version": version, "bytes": os.path.getsize(json_path), "issues": {}, "abbrevs": [], "verses": []}
+
+    def flag(kind, where, sample=None):
+        issue = result["issues"].setdefault(kind, {"count": 0, "samples": []})
+        issue["count"] += 1
+        if len(issue["samples"]) < MAX_SAMPLES:
+            issue["samples"].append(f"{where}: {sample}" if sample else where)
+
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    if raw.startswith(codecs.BOM_UTF8):
+        flag("bom", "file")
+    try:
+        books = json.loads(raw.decode('utf-8-sig'))
+    except ValueError as e:
+        flag("parse_error", "file", str(e))
+        return result
+    # 구조가 [{abbrev, name, chapters: [[절, ...], ...]}, ...] 가 아니면 한 파일의 문제로 보고하고 끝냄 (풀 작업이 죽지 않게)
+    if not isinstance(books, list):
+        flag("parse_error", "file", f"top level is {type(books).__name__}, expected a list of books")
+        return result
+    for book_idx, book in enumerate(books):
+        chapters = book.get('chapters') if isinstance(book, dict) else None
+        if not isinstance(chapters, list) or not all(isinstance(c, list) for c in chapters):
+            flag("parse_error", f"book {book_idx + 1}", "expected {abbrev, name, chapters: [[verse, ...], ...]}")
+    if "parse_error" in result["issues"]:
+        return result
+
+    entities = {}
+    for book_idx, book in enumerate(books):
+        abbrev = book.get('abbrev')
+        result["abbrevs"].append(abbrev)
+        expected = CANONICAL_ABBREVS[book_idx] if book_idx < len(CANONICAL_ABBREVS) else None
+        if abbrev != expected:
+            flag("abbrev_mismatch", f"book {book_idx + 1}", f"{abbrev!r} (expected {expected!r})")
+        if not book.get('name'):
+            flag("missing_name", abbrev or f"book {book_idx + 1}")
+
+        counts = []
+        for chapter_idx, chapter in enumerate(book.get('chapters', [])):
+            counts.append(len(chapter))
+            for verse_idx, verse in enumerate(chapter):
+                where = location(abbrev, chapter_idx, verse_idx)
+                if not isinstance(verse, str):
+                    flag("non_string_verse", where, repr(verse)[:60])
+                    continue
+                if not verse.strip():
+                    flag("empty_verse", where)
+                    continue
+                for entity in ENTITY_RE.findall(verse):
+                    entities[entity] = entities.get(entity, 0) + 1
+                    flag("html_entity", where, entity)
+                for markup in BRACE_RE.findall(verse):
+                    flag("brace_markup", where, markup[:60])
+        result["verses"].append(counts)
+
+    if len(books) != len(CANONICAL_ABBREVS):
+        flag("book_count", "file", f"{len(books)} books (expected {len(CANONICAL_ABBREVS)})")
+    if entities:
+        result["issues"]["html_entity"]["entities"] = entities
+    return result
+
+
+def verse_count_matrix(scans):
+    """(버전 x 책 x 장) 절 수 행렬. 없는 책/장은 -1 (절이 0개인 장과 구분)."""
+    max_chapters = max((len(c) for s in scans for c in s["verses"]), default=0)
+    matrix = np.full((len(scans), len(CANONICAL_ABBREVS), max_chapters), -1, dtype=np.int32)
+    for v, scan in enumerate(scans):
+        for b, counts in enumerate(scan["verses"][:len(CANONICAL_ABBREVS)]):
+            matrix[v, b, :len(counts)] = counts
+    return matrix
+
+
+def canonical_counts(matrix):
+    """
+    칸마다 그 장이 있는 버전들의 다수결 절 수 (동률이면 큰 쪽) — parallel_corpus.canonical_versification 과 같은 규칙.
+    절이 0개인 장도 한 표로 셉니다. 반환값: (책 x 장) 행렬, 아무 버전에도 없는 장은 -1.
+    """
+    present = matrix >= 0
+    votes = (matrix[:, None] == matrix[None, :]).sum(axis=1)   # 버전마다 같은 절 수를 가진 버전 수
+    score = np.where(present, votes.astype(np.int64) * (int(matrix.max(initial=0)) + 1) + matrix, -1)
+    winner = score.argmax(axis=0)
+    canon = np.take_along_axis(matrix, winner[None], axis=0)[0]
+    return np.where(present.any(axis=0), canon, -1)
+
+
+def versification_diffs(versions, matrix, canon):
+    """버전별로 기준과 절 수가 다른 장 목록 (장이 없는 경우 포함)."""
+    diffs = {}
+    for v, b, c in zip(*np.nonzero(matrix != canon[None])):
+        verses, canonical = int(matrix[v, b, c]), int(canon[b, c])
+        diffs.setdefault(versions[v], []).append({
+            "book": CANONICAL_ABBREVS[b], "chapter": int(c) + 1,
+            "verses": verses if verses >= 0 else None,          # None = 이 버전에 없는 장
+            "canonical": canonical if canonical >= 0 else None,  # None = 다수결에 없는 장 (이 버전에만 있음)
+        })
+    return diffs
+
+
+def check_index(versions_dir=VERSIONS_DIR, index_path=VERSION_INDEX):
+    listed = version_languages(index_path)
+    present = set(list_versions(versions_dir))
+    return {
+        "listed_without_file": sorted(set(listed) - present),
+        "file_not_listed": sorted(present - set(listed)),
+    }
+
+
+def validate(versions_dir=VERSIONS_DIR, index_path=VERSION_INDEX, workers=None):
+    versions = list_versions(versions_dir)
+    paths = [os.path.join(versions_dir, f"{v}.json") for v in versions]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        scans = list(pool.map(scan_version, paths))
+
+    parsed = [s for s in scans if "parse_error" not in s["issues"]]
+    matrix = verse_count_matrix(parsed)
+    canon = canonical_counts(matrix) if parsed else np.full((len(CANONICAL_ABBREVS), 0), -1, dtype=np.int32)
+    diffs = versification_diffs([s["version"] for s in parsed], matrix, canon)
+
+    report = {
+        "versions": {
+            s["version"]: {
+                "bytes": s["bytes"],
+                "books": len(s["abbrevs"]),
+                "verses": sum(sum(c) for c in s["verses"]),
+                "issues": s["issues"],
+                "versification": diffs.get(s["version"], []),
+            } for s in scans
+        },
+        "canonical": {
+            "chapters": [int(n) for n in (canon >= 0).sum(axis=1)],
+            "verses": int(canon[canon > 0].sum()),
+        },
+        "index": check_index(versions_dir, index_path),
+    }
+    return report
+
+
+def print_summary(report):
+    for version, info in report["versions"].items():
+        issues = ", ".join(f"{kind} {issue['count']}" for kind, issue in info["issues"].items()) or "ok"
+        print(f"{version:>14}: {info['books']} books, {info['verses']} verses, "
+              f"{len(info['versification'])} chapters off canon; {issues}")
+    print(f"Canonical versification: {report['canonical']['verses']} verses")
+    index = report["index"]
+    if index["listed_without_file"]:
+        print(f"index.json lists versions with no file: {', '.join(index['listed_without_file'])}")
+    if index["file_not_listed"]:
+        print(f"Files missing from index.json: {', '.join(index['file_not_listed'])}")
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate every json/<version>.json and json/index.json.")
+    parser.add_argument("--report", default=REPORT_PATH, help="Where to write the JSON report")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = validate(workers=args.workers)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print_summary(report)
+    print(f"Report written to {args.report} ({time.perf_counter() - started:.2f}s)")
@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import subprocess
+from ffmpeg_encoder import FFMPEG, FFPROBE
+
+# Configuration
+INDEX_SUFFIX = ".verses.json"
+KEYFRAME_EPSILON = 0.001       # 시각 비교 시 부동소수 오차 허용
+DEFAULT_FRAME_DURATION = 0.25  # 프레임레이트를 알 수 없을 때 허용 범위 (가장 낮은 STREAM_FPS=4 의 한 프레임)
+
+
+def verse_index_path(video_path):
+    return os.path.splitext(video_path)[0] + INDEX_SUFFIX
+
+
+def probe_keyframes(video_path):
+    """영상 스트림의 키프레임 패킷 (시각 초, 파일 내 바이트 위치) 목록."""
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,pos,flags", "-of", "json", video_path],
+        capture_output=True, text=True, check=True
+    )
+    keyframes = []
+    for packet in json.loads(result.stdout).get("packets", []):
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A"):
+            pos = packet.get("pos")
+            keyframes.append((float(packet["pts_time"]), int(pos) if pos not in (None, "N/A") else None))
+    return sorted(keyframes)
+
+
+def probe_frame_rate(video_path):
+    """영상 스트림의 프레임레이트 (r_frame_rate). 읽을 수 없으면 None."""
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=r_frame_rate", "-of", "json", video_path],
+        capture_output=True, text=True, check=True
+    )
+    streams = json.loads(result.stdout).get("streams", [])
+    num, _, den = (streams[0].get("r_frame_rate", "0/1") if streams else "0/1").partition("/")
+    try:
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return fps if fps > 0 else None
+
+
+def find_verse_keyframe(keyframes, start, frame_duration):
+    """
+    절 시작에 강제로 넣은 키프레임 = 시작 시각 이후(같은 시각 포함)의 첫 프레임.
+    절 시작은 프레임 경계에 맞춰져 있지 않으므로 [start, start + 한 프레임] 안의 첫 키프레임을 고르고,
+    그런 키프레임이 없을 때만 시작 이전의 가장 가까운 키프레임을 씁니다.
+    """
+    for keyframe in keyframes:
+        if start - KEYFRAME_EPSILON <= keyframe[0] <= start + frame_duration + KEYFRAME_EPSILON:
+            return keyframe
+    candidates = [kf for kf in keyframes if kf[0] <= start + KEYFRAME_EPSILON]
+    return candidates[-1] if candidates else (0.0, None)
+
+
+def build_verse_index(video_path, timestamps, texts=None, fps=None):
+    """
+    절별 (시작, 끝) 시각에 실제 키프레임 시각/바이트 위치를 붙인 인덱스를 만듭니다.
+    인코더가 절 시작마다 키프레임을 넣었으므로 각 절의 키프레임은 시작 시각 이후 한 프레임 안에 있습니다.
+    fps 를 주지 않으면 ffprobe 로 읽습니다.
+    """
+    keyframes = probe_keyframes(video_path)
+    fps = fps or probe_frame_rate(video_path)
+    frame_duration = 1.0 / fps if fps else DEFAULT_FRAME_DURATION
+    verses = []
+    for i, (start, end) in enumerate(timestamps):
+        keyframe_time, byte_offset = find_verse_keyframe(keyframes, start, frame_duration)
+        entry = {
+            "verse": i + 1,
+            "start": round(start, 6),
+            "end": round(end, 6),
+            "keyframe_time": round(keyframe_time, 6),
+            "byte_offset": byte_offset
+        }
+        if texts is not None:
+            entry["text"] = texts[i]
+        verses.append(entry)
+    return {"video": os.path.basename(video_path), "verses": verses}
+
+
+def write_verse_index(video_path, timestamps, index_path, texts=None, fps=None):
+    index = build_verse_index(video_path, timestamps, texts, fps)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index_path
+
+
+def load_verse_index(video_path):
+    with open(verse_index_path(video_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def extract_verses(video_path, first, last, out_path):
+    """
+    first~last 절(1부터 시작)을 재인코딩 없이(-c copy) 잘라냅니다.
+    시작은 키프레임 위치이고, 끝은 다음 절의 키프레임(마지막 절이면 파일 끝)이라 디코딩이 필요 없습니다.
+    """
+    verses = load_verse_index(video_path)["verses"]
+    if not (1 <= first <= last <= len(verses)):
+        raise ValueError(f"Verse range {first}-{last} is outside 1-{len(verses)}")
+
+    start = verses[first - 1]["keyframe_time"]
+    cmd = [FFMPEG, "-y", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.6f}", "-i", video_path]
+    if last < len(verses):
+        cmd += ["-t", f"{verses[last]['keyframe_time'] - start:.6f}"]
+    cmd += ["-map", "0", "-c", "copy", "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", out_path]
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def parse_range(spec):
+    # "5" 또는 "5-9"
+    if "-" in spec:
+        first, last = spec.split("-", 1)
+        return int(first), int(last)
+    return int(spec), int(spec)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract verses from a chapter video by stream copy.")
+    parser.add_argument("video", help="Chapter video in movies/ (needs the .verses.json sidecar)")
+    parser.add_argument("verses", help="Verse number or range, e.g. 16 or 16-18")
+    parser.add_argument("-o", "--output", help="Output path (default: <video>_v<range>.mp4)")
+    args = parser.parse_args()
+
+    first, last = parse_range(args.verses)
+    out_path = args.output or f"{os.path.splitext(args.video)[0]}_v{args.verses}.mp4"
+    try:
+        extract_verses(args.video, first, last, out_path)
+    except (ValueError, FileNotFoundError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Saved {out_path}")